@@ -0,0 +1,41 @@
+#
+# Library calls saved by coalescing concurrent position reads
+#
+# Several threads read the position and status of one axis as fast as
+#   they can through a DeviceWorker, with and without a CoalescingReader
+#   in front of it. The simulated library takes a fixed time per call,
+#   modelling the USB/Ethernet round trip.
+#
+
+import os, sys, threading, time
+#import pyanc350 from the checkout this script is in
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pyanc350.v4
+from pyanc350.coalesce import CoalescingReader
+from pyanc350.simulator import SimulatedANC350
+from pyanc350.worker import DeviceWorker
+
+def run(reader, threads, reads):
+    def client():
+        for i in range(reads):
+            reader.getPosition(0)
+            reader.getAxisStatus(0)
+    workers = [threading.Thread(target=client) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    reads = 100
+    for maxAge in [None, 0.0, 0.002]:
+        library = SimulatedANC350(latency=0.001)
+        with DeviceWorker(pyanc350.v4.Positioner(library=library)) as worker:
+            library.calls.clear()
+            reader = worker if maxAge is None else CoalescingReader(worker, maxAge)
+            elapsed = run(reader, threads, reads)
+        name = 'direct' if maxAge is None else 'maxAge {:g} s'.format(maxAge)
+        print('{:<14} {:5d} reads {:5d} library calls {:6.3f} s'.format(name, 2*threads*reads, sum(library.calls.values()), elapsed))
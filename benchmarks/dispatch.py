@@ -0,0 +1,38 @@
+#
+# Call dispatch overhead of untyped and typed ctypes functions
+#
+# The ANC350 libraries are not available everywhere, so a C function of the
+#   C runtime with a similar signature stands in: ldexp(double, int). The
+#   untyped call wraps its float argument in ctypes.c_double on every call,
+#   as the v3/v4 Positioner used to; the typed call declares argtypes as
+#   the prototype table does and passes plain Python numbers. Both have
+#   the error check attached that the bindings use.
+#
+# On CPython the typed call is not faster: from_param conversion costs about
+#   as much as constructing the ctypes object by hand, and more for pointer
+#   arguments. Both are small against a USB or Ethernet round trip; the
+#   prototypes are declared for type safety (a Python int passed untyped
+#   where the DLL expects a double is silently misread).
+#
+
+import ctypes, ctypes.util, sys, timeit
+
+def errcheck(result, func, args):
+    return result
+
+def function():
+    name = ctypes.util.find_library('m') or ctypes.util.find_library('c') or 'msvcrt'
+    func = ctypes.CDLL(name)['ldexp']
+    func.restype = ctypes.c_double
+    func.errcheck = errcheck
+    return func
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    untyped = function()
+    typed = function()
+    typed.argtypes = [ctypes.c_double, ctypes.c_int]
+    before = min(timeit.repeat(lambda: untyped(ctypes.c_double(1.5), 3), number=number, repeat=5))
+    after = min(timeit.repeat(lambda: typed(1.5, 3), number=number, repeat=5))
+    print('untyped, c_double() per call: {:6.0f} ns per call'.format(before/number*1e9))
+    print('typed, argtypes declared:     {:6.0f} ns per call'.format(after/number*1e9))
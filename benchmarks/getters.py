@@ -0,0 +1,64 @@
+#
+# Per-call overhead of the Positioner getters
+#
+# Compares the getters, which reuse per-axis output buffers, with the
+#   previous implementation that allocated new ctypes objects on every call.
+#   The library is a stand-in whose functions return immediately, so the
+#   timings only contain the Python side of each call.
+#
+
+import ctypes, gc, os, sys, timeit
+#import pyanc350 from the checkout this script is in
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pyanc350.v2.ANC350lib as ANC350lib
+import pyanc350.v4.ANC350libv4 as ANC
+from pyanc350.simulator import SimulatedANC350
+
+class NullLibrary(SimulatedANC350):
+    '''
+    Simulated library whose getters return without touching their arguments.
+    '''
+    def __getattr__(self, symbol):
+        entry = super().__getattr__(symbol)
+        if 'get' not in symbol.lower():
+            return entry
+        null = lambda *args: 0
+        null.__name__ = symbol
+        return null
+
+def getPosition(self, axisNo):
+    position = ctypes.c_double()
+    ANC.getPosition(self.device, axisNo, ctypes.byref(position))
+    return position.value
+
+def getAxisStatus(self, axisNo):
+    connected = ctypes.c_int()
+    enabled = ctypes.c_int()
+    moving = ctypes.c_int()
+    target = ctypes.c_int()
+    eotFwd = ctypes.c_int()
+    eotBwd = ctypes.c_int()
+    error = ctypes.c_int()
+    ANC.getAxisStatus(self.device, axisNo, ctypes.byref(connected), ctypes.byref(enabled), ctypes.byref(moving), ctypes.byref(target), ctypes.byref(eotFwd), ctypes.byref(eotBwd), ctypes.byref(error))
+    return connected.value, enabled.value, moving.value, target.value, eotFwd.value, eotBwd.value, error.value
+
+def getStatus(self, axis):
+    self.status = ANC350lib.Int32(0)
+    ANC350lib.positionerGetStatus(self.handle, axis, ctypes.byref(self.status))
+    return self.status.value
+
+def report(name, before, after, number):
+    print('{:<16} {:8.0f} ns -> {:6.0f} ns per call'.format(name, before/number*1e9, after/number*1e9))
+
+if __name__ == '__main__':
+    import pyanc350.v2, pyanc350.v4
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    p4 = pyanc350.v4.Positioner(library=NullLibrary())
+    p2 = pyanc350.v2.Positioner(library=NullLibrary())
+    gc.collect()
+    for name, old, new in [('getPosition', lambda: getPosition(p4, 0), lambda: p4.getPosition(0)),
+                           ('getAxisStatus', lambda: getAxisStatus(p4, 0), lambda: p4.getAxisStatus(0)),
+                           ('v2 getStatus', lambda: getStatus(p2, 0), lambda: p2.getStatus(0))]:
+        before = min(timeit.repeat(old, number=number, repeat=5))
+        after = min(timeit.repeat(new, number=number, repeat=5))
+        report(name, before, after, number)
@@ -0,0 +1,34 @@
+#
+# Import-time benchmark for pyanc350
+#
+# Runs each import statement in a fresh interpreter and reports the median
+#   wall time above that of an empty interpreter. Importing must not load
+#   any vendor library, so this also runs on machines without the DLLs.
+#
+
+import os, statistics, subprocess, sys, time
+
+#the checkout the benchmark is in, imported from its root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+statements = [
+    'import pyanc350',
+    'import pyanc350.v2',
+    'import pyanc350.v4',
+    'import pyanc350.v2, pyanc350.v3, pyanc350.v4',
+    ]
+
+def run(statement, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', statement], check=True, cwd=ROOT)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    baseline = run('pass', repeat)
+    print('empty interpreter: {:.1f} ms'.format(baseline*1e3))
+    for statement in statements:
+        print('{:<48} +{:.1f} ms'.format(statement, (run(statement, repeat) - baseline)*1e3))
@@ -0,0 +1,26 @@
+#
+# Overhead of call instrumentation
+#
+# Times Positioner.getPosition against a simulated library with and without
+#   an Instrument attached to the v4 backend. The simulator answers in a few
+#   microseconds, far less than a USB or Ethernet round trip, so the
+#   difference is the full cost of timing and recording each call.
+#
+
+import os, sys, timeit
+#import pyanc350 from the checkout this script is in
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pyanc350.v4
+import pyanc350.v4.ANC350libv4 as ANC
+from pyanc350.instrument import Instrument
+from pyanc350.simulator import SimulatedANC350
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    pos = pyanc350.v4.Positioner(library=SimulatedANC350())
+    before = min(timeit.repeat(lambda: pos.getPosition(0), number=number, repeat=5))
+    with Instrument(ANC.backend) as calls:
+        after = min(timeit.repeat(lambda: pos.getPosition(0), number=number, repeat=5))
+    print('getPosition:                  {:6.0f} ns per call'.format(before/number*1e9))
+    print('getPosition, instrumented:    {:6.0f} ns per call'.format(after/number*1e9))
+    print(calls.report())
@@ -0,0 +1,59 @@
+#
+# Throughput and latency of the network server
+#
+# Serves a v4 Positioner on a simulated library over loopback TCP (or a Unix
+#   socket, if a path is given) and times getPosition called through a
+#   RemotePositioner: one call per round trip, pipelined (all requests sent
+#   before the first answer is read), and in batches of several calls per
+#   request. The simulator answers in microseconds, so the figures are the
+#   cost of the protocol, the sockets and the DeviceWorker.
+#
+
+import os, statistics, sys, time
+#import pyanc350 from the checkout this script is in
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pyanc350.v4
+from pyanc350.server import RemotePositioner, Server
+from pyanc350.simulator import SimulatedANC350
+
+
+def latencies(pos, number):
+    times = []
+    for i in range(number):
+        start = time.perf_counter()
+        pos.getPosition(0)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def pipelined(pos, number):
+    start = time.perf_counter()
+    futures = [pos.submit('getPosition', 0) for i in range(number)]
+    for future in futures:
+        future.result()
+    return time.perf_counter() - start
+
+
+def batched(pos, number, size):
+    start = time.perf_counter()
+    for i in range(number//size):
+        with pos.batch() as batch:
+            futures = [batch.getPosition(0) for j in range(size)]
+        futures[-1].result()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    address = sys.argv[2] if len(sys.argv) > 2 else ('127.0.0.1', 0)
+    positioner = pyanc350.v4.Positioner(library=SimulatedANC350())
+    with Server(positioner, address) as server, RemotePositioner(server.address) as pos:
+        latencies(pos, 100) #warm up
+        times = sorted(latencies(pos, number))
+        total = sum(times)
+        print('unbatched:     {:8.0f} calls/s, latency median {:6.1f} us, 99% {:6.1f} us'.format(
+            number/total, statistics.median(times)*1e6, times[int(0.99*len(times))]*1e6))
+        print('pipelined:     {:8.0f} calls/s'.format(number/pipelined(pos, number)))
+        for size in (10, 100):
+            print('batches of {:<3} {:8.0f} calls/s'.format(size, number//size*size/batched(pos, number, size)))
+        print('requests served: {}, calls: {}'.format(server.requests, server.calls))
@@ -24,41 +24,22 @@ for axis in sorted(ax.keys()):
 # #set staticAmplitude to 2V to ensure accurate positioning info
 # staticAmplitude function does not exist in v4
 print('-------------------------------------------------------------')
-print('moving to x = 3mm')
+print('moving to x = 9mm')
 anc.setAxisOutput(ax['x'], 1, 0)
-anc.setTargetRange(ax['x'],1e-6)
-anc.setTargetPosition(ax['x'], 9e-3)
-anc.startAutoMove(ax['x'], 1, 0)
-
-#check what's happening
-time.sleep(0.5)
-moving = 1
-target = 0
-while target == 0:
-    connected, enabled, moving, target, eotFwd, eotBwd, error = anc.getAxisStatus(ax['x']) #find bitmask of status
-    if target == 0:
-        print('axis moving, currently at',anc.getPosition(ax['x']))
-    elif target == 1:
-        print('axis arrived at',anc.getPosition(ax['x']))
-        anc.startAutoMove(ax['x'], 0, 0)
-    time.sleep(0.5)
-    
+stats = anc.moveTo(ax['x'], 9e-3, 1e-6)
+#moveTo polls the status adaptively and returns as soon as the target flag is set
+print('axis arrived at',stats.position,'after',stats.elapsed,'s and',stats.polls,'polls')
 
 print('and moving y:')
 anc.setAxisOutput(ax['y'], 1, 0)
-anc.setTargetRange(ax['y'],1e-6)
-anc.setTargetPosition(ax['y'], 8e-3)
-anc.startAutoMove(ax['y'], 1, 0)
-time.sleep(0.5)
-target = 0
-while target == 0:
-    connected, enabled, moving, target, eotFwd, eotBwd, error = anc.getAxisStatus(ax['y']) #find bitmask of status
-    if target == 0:
-        print('axis moving, currently at',anc.getPosition(ax['y']))
-    elif target == 1:
-        print('axis arrived at',anc.getPosition(ax['y']))
-        anc.startAutoMove(ax['y'], 0, 0)
-    time.sleep(0.5)
+stats = anc.moveTo(ax['y'], 8e-3, 1e-6)
+print('axis arrived at',stats.position,'after',stats.elapsed,'s and',stats.polls,'polls')
+
+print('moving x and y together back to 5mm:')
+stats = anc.moveMany({ax['x']: 5e-3, ax['y']: 5e-3}, 1e-6, synchronize=True)
+#both axes are polled in one loop and arrive at about the same time
+for axis in stats.values():
+    print('axis',axis.axis,'arrived at',axis.position,'after',axis.elapsed,'s')
     
 
     
@@ -78,9 +59,7 @@ print('-------------------------------------------------------------')
 print('testing \'functions for manual positioning\'')
 anc.setFrequency(ax['x'],50)
 print('set frequency to 50Hz')
-for i in range(30):
-    anc.startSingleStep(ax['x'],0)
-    time.sleep(0.1)
+anc.stepN(ax['x'],30,0)
 print('arrived at:',anc.getPosition(ax['x']),'after 30 pulses')
 anc.startContinuousMove(ax['x'],1, 0)
 print('waiting 3 seconds...')
@@ -21,36 +21,13 @@ anc.staticAmplitude(2000)
 #set staticAmplitude to 2V to ensure accurate positioning info
 print('-------------------------------------------------------------')
 print('moving to x = 2mm')
-anc.moveAbsolute(ax['x'],2000000)
-
-#check what's happening
-time.sleep(0.5)
-state = 1
-while state == 1:
-    newstate = anc.getStatus(ax['x']) #find bitmask of status
-    if newstate == 1:
-        print('axis moving, currently at',anc.getPosition(ax['x']))
-    elif newstate == 0:
-        print('axis arrived at',anc.getPosition(ax['x']))
-    else:
-        print('axis has value',newstate)
-    state = newstate
-    time.sleep(0.5)
+stats = anc.moveTo(ax['x'],2000000)
+#moveTo polls the status adaptively and returns as soon as the axis has stopped
+print('axis arrived at',stats.position,'after',stats.elapsed,'s and',stats.polls,'polls')
 
 print('and moving y:')
-anc.moveAbsolute(ax['y'],2000000)
-time.sleep(0.5)
-state = 1
-while state == 1:
-    newstate = anc.getStatus(ax['y']) #find bitmask of status
-    if newstate == 1:
-        print('axis moving, currently at',anc.getPosition(ax['y']))
-    elif newstate == 0:
-        print('axis arrived at',anc.getPosition(ax['y']))
-    else:
-        print('axis has value',newstate)
-    state = newstate
-    time.sleep(0.5)
+stats = anc.moveTo(ax['y'],2000000)
+print('axis arrived at',stats.position,'after',stats.elapsed,'s and',stats.polls,'polls')
     
 print('-------obtaining all possible get\'able values for x---------')
 #get every possible get'able value
@@ -75,22 +52,16 @@ anc.setTargetPos(ax['x'],2500000)
 anc.setTargetPos(ax['y'],2500000)
 anc.moveAbsoluteSync(3)
 
-statex, statey = 1, 1
-while statex == 1 or statey == 1:
-    print('x:',anc.getPosition(ax['x']),'y:',anc.getPosition(ax['y']))
-    time.sleep(0.5)
-    statex = anc.getStatus(ax['x'])
-    statey = anc.getStatus(ax['y'])
-    print('statex:',statex,'statey:',statey)
+statsx = anc.waitForTarget(ax['x'])
+statsy = anc.waitForTarget(ax['y'])
+print('x:',statsx.position,'y:',statsy.position)
 print('arrived by moveAbsoluteSync')
 print('could use a function to create the bitmask for moveAbsoluteSync!')
 print('-------------------------------------------------------------')
 print('testing \'functions for manual positioning\'')
 anc.frequency(ax['x'],50)
 print('set frequency to 50Hz')
-for i in range(30):
-    anc.moveSingleStep(ax['x'],1)
-    time.sleep(0.1)
+anc.stepN(ax['x'],30,1)
 print('arrived at:',anc.getPosition(ax['x']),'after 30 pulses')
 anc.moveContinuous(ax['x'],1)
 print('waiting 3 seconds...')
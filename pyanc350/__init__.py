@@ -1,21 +1,8 @@
-import logging
-
-logger = logging.getLogger(__name__)
-
-try:
-	import pyanc350.v2
-	logger.info('found anc350v2.dll')
-except OSError:
-	logger.warning('could not find anc350v2.dll')
-
-try:
-	import pyanc350.v3
-	logger.info('found anc350v3.dll')
-except OSError:
-	logger.warning('could not find anc350v3.dll')
-
-try:
-	import pyanc350.v4
-	logger.info('found anc350v4.dll')
-except OSError:
-	logger.warning('could not find anc350v4.dll')
\ No newline at end of file
+import importlib
+
+#the library versions are imported on first access (eg. pyanc350.v4), and
+#each one only loads its DLL when the first Positioner is created
+def __getattr__(name):
+	if name in ('v2', 'v3', 'v4'):
+		return importlib.import_module(__name__ + '.' + name)
+	raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,159 @@
+#
+#  aio provides an asyncio interface to the v3 and v4 Positioners.
+#
+#  Every library call of an AsyncPositioner runs on a thread owned by
+#    that device, so the event loop is never blocked (measureCapacitance
+#    takes seconds) and calls to one device are serialized in the order
+#    they were awaited. Moves of several axes can be awaited together:
+#
+#      pos = await AsyncPositioner.open()
+#      await asyncio.gather(pos.moveTo(0, 1e-3), pos.moveTo(1, 2e-3), detector.read())
+#
+#  Cancelling a moveTo stops the automatic motion of its axis.
+#  All other Positioner methods are available as coroutines with the
+#    same name and arguments, eg. await pos.setFrequency(0, 200).
+#
+
+import asyncio, functools
+from concurrent.futures import ThreadPoolExecutor
+from pyanc350.motion import AdaptivePoller, MoveStats, waitForAsync
+
+
+class AsyncPositioner:
+
+    def __init__(self, positioner, executor=None):
+        '''
+        Parameters
+            positioner	Connected v3 or v4 Positioner. It must not be used directly while it is wrapped.
+            executor	Executor running the library calls; by default a single thread owned by this object
+        '''
+        self.positioner = positioner
+        self._ownsExecutor = executor is None
+        self.executor = executor if executor is not None else ThreadPoolExecutor(1, thread_name_prefix='anc350')
+
+
+    @classmethod
+    async def open(cls, *args, positioner=None, **kwargs):
+        '''
+        Creates (discovers and connects) a Positioner on the device thread and wraps it.
+
+        Parameters
+            args, kwargs	Arguments of the Positioner, eg. library
+            positioner	Positioner class. Default: pyanc350.v4.Positioner
+        Returns
+            positioner	AsyncPositioner
+        '''
+        if positioner is None:
+            from pyanc350.v4 import Positioner as positioner
+        executor = ThreadPoolExecutor(1, thread_name_prefix='anc350')
+        loop = asyncio.get_running_loop()
+        try:
+            instance = await loop.run_in_executor(executor, functools.partial(positioner, *args, **kwargs))
+        except BaseException:
+            executor.shutdown(wait=False)
+            raise
+        self = cls(instance, executor)
+        self._ownsExecutor = True
+        return self
+
+
+    async def close(self):
+        '''
+        Disconnects the device and stops the device thread.
+        '''
+        try:
+            await self.call(self.positioner.disconnect)
+        finally:
+            if self._ownsExecutor:
+                self.executor.shutdown(wait=False)
+
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+    def call(self, func, *args, **kwargs):
+        '''
+        Runs func(*args, **kwargs) on the device thread and returns an awaitable for its result.
+        '''
+        return asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+
+    def __getattr__(self, name):
+        method = getattr(self.positioner, name)
+        if not callable(method) or name.startswith('_'):
+            return method
+        @functools.wraps(method)
+        async def coroutine(*args, **kwargs):
+            return await self.call(method, *args, **kwargs)
+        self.__dict__[name] = coroutine
+        return coroutine
+
+
+    async def getPosition(self, axisNo):
+        '''
+        Retrieves the current actuator position. For linear type actuators the position unit is m; for goniometers and rotators it is degree.
+        '''
+        return await self.call(self.positioner.getPosition, axisNo)
+
+
+    async def moveTo(self, axisNo, target, targetRange=None, timeout=None, hold=False):
+        '''
+        Moves an axis to a target position by automatic motion and waits until it has arrived. Cancelling the task stops the motion.
+
+        Parameters
+            axisNo	Axis number (0 ... 2)
+            target	Target position [m] or [°]
+            targetRange	Target range [m] or [°]; None keeps the current setting
+            timeout	Maximum time to wait [s], None to wait indefinitely. TimeoutError is raised when it is exceeded.
+            hold	Keep automatic motion enabled after arrival so the position is held. Default: False
+        Returns
+            stats	MoveStats(axis, target, position, arrived, elapsed, polls)
+        '''
+        positioner = self.positioner
+        def start():
+            if targetRange is not None:
+                positioner.setTargetRange(axisNo, targetRange)
+            positioner.setTargetPosition(axisNo, target)
+            positioner.startAutoMove(axisNo, 1, 0)
+        await self.call(start)
+        try:
+            stats = await self.waitForTarget(axisNo, target, timeout)
+        except BaseException:
+            # the stop is queued immediately; shielding it means a second
+            # cancellation cannot leave the axis moving
+            await asyncio.shield(self.call(positioner.startAutoMove, axisNo, 0, 0))
+            raise
+        if not hold:
+            await self.call(positioner.startAutoMove, axisNo, 0, 0)
+        return stats
+
+
+    async def waitForTarget(self, axisNo, target=None, timeout=None):
+        '''
+        Waits until automatic motion has reached the target without blocking the event loop; see Positioner.waitForTarget.
+
+        Parameters
+            axisNo	Axis number (0 ... 2)
+            target	Target position [m] or [°]. Default: the last target set with setTargetPosition
+            timeout	Maximum time to wait [s], None to wait indefinitely. TimeoutError is raised when it is exceeded.
+        Returns
+            stats	MoveStats(axis, target, position, arrived, elapsed, polls)
+        '''
+        positioner = self.positioner
+        if target is None:
+            target = positioner._targets.get(axisNo)
+        state = {}
+        poll = lambda: self.call(positioner._pollTarget, axisNo, target, state)
+        clock = positioner.ANC.backend.clock
+        arrived, position, elapsed, polls = await waitForAsync(clock, poll, AdaptivePoller(target), timeout)
+        return MoveStats(axisNo, target, position, arrived, elapsed, polls)
+
+
+    #asyncio-style names
+    get_position = getPosition
+    move_to = moveTo
+    wait_for_target = waitForTarget
@@ -0,0 +1,182 @@
+#
+#  backend resolves the attocube ANC350 libraries on demand.
+#
+#  The ANC350lib modules describe the entry points of their library in a
+#    table and hand it to a Backend. Nothing is loaded at import time:
+#    the library is resolved the first time one of its functions is
+#    looked up (normally when the first Positioner is created), and each
+#    function pointer is bound the first time it is used.
+#
+#  A library can be injected before (or instead of) the default lookup:
+#      import pyanc350.v4.ANC350libv4 as ANC
+#      ANC.load('C:\\attocube\\anc350v4.dll')   # explicit path
+#      ANC.load(ctypes.CDLL('libanc350v4.so'))  # already loaded ctypes library
+#      ANC.load(stand_in)                       # any Python object with the same entry points
+#
+#  Wrappers (see addWrapper) see every call into the library, eg. for
+#    instrumentation. With no wrapper installed calls take the direct path.
+#
+
+import ctypes, os, sys, threading
+from pyanc350.clock import SYSTEM_CLOCK
+
+
+class Backend:
+
+    def __init__(self, name, namespace, prototypes, errcheck, unchecked=(), restype=ctypes.c_int, idempotent=()):
+        '''
+        Parameters
+            name	Name of the library, eg. 'anc350v4'
+            namespace	Globals of the module the bound functions are published in
+            prototypes	Sequence of (alias, symbol, argtypes); argtypes may be None
+            errcheck	Function checking the return code of each call
+            unchecked	Aliases whose return value is not a return code
+            restype	Return type of all functions
+            idempotent	Aliases that can safely be called again after a failure (see pyanc350.errors.RetryPolicy)
+        '''
+        self.name = name
+        self.namespace = namespace
+        self.prototypes = {alias: (symbol, argtypes) for alias, symbol, argtypes in prototypes}
+        self.errcheck = errcheck
+        self.unchecked = frozenset(unchecked)
+        self.restype = restype
+        self.idempotent = frozenset(idempotent)
+        self.library = None
+        self.connections = set() #handles of the devices connected through this library
+        self.wrappers = []
+        self._lock = threading.RLock()
+
+
+    def load(self, library=None):
+        '''
+        Selects the library used by all subsequent calls. Functions bound from a previously loaded library are dropped.
+
+        Parameters
+            library	None to search for the vendor library, a path to it, a ctypes library, or a Python stand-in
+        Returns
+            library	The library in use
+        '''
+        if library is None:
+            library = self._find()
+        elif isinstance(library, (str, os.PathLike)):
+            library = _open(os.fspath(library))
+        with self._lock:
+            self._unbind()
+            self.library = library
+            self.connections.clear()
+        import logging #kept out of the import path of the package
+        logging.getLogger(__name__).info('loaded %s from %r', self.name, library)
+        return library
+
+
+    def bind(self, alias):
+        '''
+        Binds the function published as alias, loading the library first if necessary. Raises AttributeError for unknown aliases.
+        '''
+        try:
+            symbol, argtypes = self.prototypes[alias]
+        except KeyError:
+            raise AttributeError("module {!r} has no attribute {!r}".format(self.namespace['__name__'], alias)) from None
+        with self._lock:
+            if self.library is None:
+                self.load()
+            func = self._resolve(alias, symbol, argtypes, alias not in self.unchecked)
+            self.namespace[alias] = func
+        return func
+
+
+    def addWrapper(self, wrapper):
+        '''
+        Installs a wrapper around every function of the library. wrapper(alias, func) is called once per function as it is bound and returns the function to call instead; func returns the raw result of the library (return codes are checked after the wrapper). Wrappers added later wrap earlier ones.
+        '''
+        with self._lock:
+            self.wrappers.append(wrapper)
+            self._unbind()
+
+
+    def removeWrapper(self, wrapper):
+        '''
+        Removes a wrapper installed with addWrapper.
+        '''
+        with self._lock:
+            self.wrappers.remove(wrapper)
+            self._unbind()
+
+
+    @property
+    def clock(self):
+        '''
+        Time base for waiting on the library: the clock of a simulated library, otherwise real time.
+        '''
+        library = self.library
+        if library is None or isinstance(library, ctypes.CDLL):
+            return SYSTEM_CLOCK
+        return getattr(library, 'clock', SYSTEM_CLOCK)
+
+
+    def _unbind(self):
+        #drops the bound functions, so they are bound again on their next use
+        for alias in self.prototypes:
+            self.namespace.pop(alias, None)
+
+
+    def _find(self):
+        if sys.platform == 'win32':
+            return _open(self.name)
+        import ctypes.util #slow to import, and only needed here
+        path = ctypes.util.find_library(self.name)
+        if path is None:
+            raise OSError('could not find {} library'.format(self.name))
+        return _open(path)
+
+
+    def _resolve(self, alias, symbol, argtypes, checked):
+        library = self.library
+        if isinstance(library, ctypes.CDLL):
+            # indexing creates a new function pointer, so configuring it cannot
+            # leak into other users of the same library object
+            func = library[symbol]
+            func.restype = self.restype
+            if argtypes is not None:
+                func.argtypes = argtypes
+            if checked and not self.wrappers:
+                func.errcheck = self.errcheck
+                return func
+        else:
+            func = getattr(library, symbol)
+        raw = func
+        for wrapper in self.wrappers:
+            raw = wrapper(alias, raw)
+        if not checked:
+            return raw
+        errcheck = self.errcheck
+        def call(*args):
+            return errcheck(raw(*args), func, args)
+        call.__name__ = symbol
+        return call
+
+
+def _open(name):
+    # the vendor DLLs use stdcall on Windows; builds for other platforms are cdecl
+    if sys.platform == 'win32':
+        return ctypes.WinDLL(name)
+    return ctypes.CDLL(name)
+
+
+class OutParams(dict):
+    '''
+    Reusable output parameters for a getter, allocated per axis on first use.
+
+    outs[axisNo] is (buffer, byref(buffer)) for a single ctypes type, or a tuple of buffers and a tuple of byref()s when several types are given. Reusing them saves allocating ctypes objects on every call; callers sharing an axis from several threads must serialize their calls.
+    '''
+
+    def __init__(self, *types):
+        self.types = types
+
+    def __missing__(self, axisNo):
+        buffers = tuple(type_() for type_ in self.types)
+        refs = tuple(ctypes.byref(buffer) for buffer in buffers)
+        if len(buffers) == 1:
+            buffers, refs = buffers[0], refs[0]
+        self[axisNo] = (buffers, refs)
+        return buffers, refs
@@ -0,0 +1,75 @@
+#
+#  cache remembers the parameters of a device so that Positioners can
+#    skip redundant library calls.
+#
+#  Values are stored per (name, axis), with axis None for parameters of
+#    the whole device. A setter called with the value it last wrote is
+#    skipped, and static data (firmware version, actuator name) is read
+#    from the device only once. The Positioner decides what is cached
+#    and when entries become invalid (eg. selecting another actuator).
+#
+
+class ParamCache:
+
+    def __init__(self, enabled=True):
+        '''
+        Parameters
+            enabled	If False, nothing is stored and every lookup misses
+        '''
+        self.enabled = enabled
+        self.values = {}
+        self.saved = 0 #library calls avoided
+        self.misses = 0 #lookups that had to call the library
+
+
+    def lookup(self, name, axis=None):
+        '''
+        Returns (True, value) for a cached parameter, otherwise (False, None).
+        '''
+        key = (name, axis)
+        if key in self.values:
+            self.saved += 1
+            return True, self.values[key]
+        if self.enabled:
+            self.misses += 1
+        return False, None
+
+
+    def unchanged(self, name, axis, value):
+        '''
+        Returns True (and counts a saved call) if value is the value cached for the parameter, ie. writing it again would have no effect.
+        '''
+        key = (name, axis)
+        if key in self.values and self.values[key] == value:
+            self.saved += 1
+            return True
+        if self.enabled:
+            self.misses += 1
+        return False
+
+
+    def store(self, name, axis, value):
+        '''
+        Records the value of a parameter after it was written to or read from the device.
+        '''
+        if self.enabled:
+            self.values[(name, axis)] = value
+
+
+    def invalidate(self, axis=None, names=None):
+        '''
+        Forgets cached parameters: all of them, those of one axis, or only the given names (of one axis, or of all axes if axis is None).
+        '''
+        if axis is None and names is None:
+            self.values.clear()
+            return
+        for key in list(self.values):
+            if (names is None or key[0] in names) and (axis is None or key[1] == axis):
+                del self.values[key]
+
+
+    def stats(self):
+        '''
+        Returns the counters: saved (library calls avoided) and misses (library calls made for cached parameters).
+        '''
+        return {'saved': self.saved, 'misses': self.misses}
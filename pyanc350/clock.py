@@ -0,0 +1,74 @@
+#
+#  clock provides the time base used by pyanc350 for waiting and timing.
+#
+#  Code that waits on the hardware (polling loops, timed moves, schedulers)
+#    asks the library backend for its clock instead of calling time.sleep
+#    directly. Real libraries run on the SystemClock; a simulated library
+#    can bring a VirtualClock so the same code runs faster than real time.
+#
+
+import threading, time
+
+
+class SystemClock:
+    '''
+    Real time, from time.monotonic.
+    '''
+    rate = 1.0
+
+    def time(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    '''
+    Simulated time, starting at 0.
+
+    With a rate, virtual time runs that many times faster than real time (eg. rate=100 turns a 10 s wait into 0.1 s) and keeps running while nothing sleeps, so threads and polling loops behave as they would in real time.
+    With rate=None, time only advances when something sleeps on the clock and sleeping returns immediately. This is deterministic but only meaningful when one thread drives the simulation.
+    '''
+
+    def __init__(self, rate=100.0):
+        self.rate = rate
+        self._start = time.monotonic()
+        self._now = 0.0
+        self._lock = threading.Lock()
+
+    def time(self):
+        if self.rate is None:
+            return self._now
+        return (time.monotonic() - self._start)*self.rate
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        if self.rate is None:
+            with self._lock:
+                self._now += seconds
+        else:
+            time.sleep(seconds/self.rate)
+
+    def advance(self, seconds):
+        '''
+        Moves time forward without sleeping.
+        '''
+        if self.rate is None:
+            with self._lock:
+                self._now += seconds
+        else:
+            self._start -= seconds/self.rate
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+def clockOf(positioner):
+    '''
+    Returns the clock of the library used by a Positioner (or an object standing in for one).
+    '''
+    ANC = getattr(positioner, 'ANC', None)
+    return ANC.backend.clock if ANC is not None else SYSTEM_CLOCK
@@ -0,0 +1,102 @@
+#
+#  coalesce shares position and status reads between concurrent callers.
+#
+#  A CoalescingReader stands in front of a Positioner (or a DeviceWorker)
+#    and answers getPosition, getAxisStatus and getStatus without calling
+#    the library when
+#      - the same read is already in flight: the caller waits for it and
+#        gets its result, or
+#      - the last result is younger than maxAge: it is returned directly.
+#    Everything else is passed through unchanged:
+#
+#      reader = CoalescingReader(worker, maxAge=0.005)
+#      reader.getPosition(0)     # from the GUI, logger and feedback threads
+#      print(reader.stats())     # {'hits': ..., 'shared': ..., 'misses': ...}
+#
+
+import threading
+from concurrent.futures import Future
+from pyanc350.clock import clockOf
+
+#reads that are coalesced by default
+READS = ('getPosition', 'getAxisStatus', 'getStatus')
+
+
+class CoalescingReader:
+
+    def __init__(self, positioner, maxAge=0.0, reads=READS):
+        '''
+        Parameters
+            positioner	Positioner or DeviceWorker the reads are forwarded to; it must be safe to call from several threads (eg. a DeviceWorker)
+            maxAge	Age [s] up to which a finished read is reused, measured from the start of the read. 0 only shares reads in flight.
+            reads	Names of the methods to coalesce
+        '''
+        self.positioner = positioner
+        self.maxAge = maxAge
+        self.reads = frozenset(reads)
+        self.clock = clockOf(positioner)
+        self.hits = 0 #answered from a finished read younger than maxAge
+        self.shared = 0 #answered by waiting for a read in flight
+        self.misses = 0 #answered by calling the library
+        self._lock = threading.Lock()
+        self._results = {} #(name, args) -> (time, value)
+        self._inflight = {} #(name, args) -> Future
+
+
+    def read(self, name, *args):
+        '''
+        Calls the method name of the positioner, or shares the result of an equal call in flight or younger than maxAge.
+        '''
+        key = (name, args)
+        with self._lock:
+            now = self.clock.time()
+            result = self._results.get(key)
+            if result is not None and now - result[0] <= self.maxAge:
+                self.hits += 1
+                return result[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+            else:
+                self.shared += 1
+        if not owner:
+            return future.result()
+        try:
+            value = getattr(self.positioner, name)(*args)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._results[key] = (now, value)
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+
+    def invalidate(self, axis=None):
+        '''
+        Forgets the finished reads (of one axis, or all), eg. after a move was commanded.
+        '''
+        with self._lock:
+            if axis is None:
+                self._results.clear()
+            else:
+                for key in [key for key in self._results if key[1][:1] == (axis,)]:
+                    del self._results[key]
+
+
+    def stats(self):
+        '''
+        Returns the counters: hits (reused finished reads), shared (joined reads in flight) and misses (library calls).
+        '''
+        return {'hits': self.hits, 'shared': self.shared, 'misses': self.misses}
+
+
+    def __getattr__(self, name):
+        if name in self.reads:
+            return lambda *args: self.read(name, *args)
+        return getattr(self.positioner, name)
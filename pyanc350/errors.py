@@ -0,0 +1,167 @@
+#
+#  errors defines the exceptions raised for the return codes of the
+#    ANC350 libraries, and a retry policy for transient failures.
+#
+#  Every exception derives from ANC350Error (and so from Exception, which
+#    is what checkError raised before) and carries the return code, the
+#    name of the library function and its arguments. The parameter errors
+#    share ParameterError; communication timeouts are TransientError:
+#
+#      try:
+#          pos.setFrequency(0, 1e6)
+#      except OutOfRange as e:
+#          print(e.code, e.func, e.arguments)
+#
+#  A RetryPolicy installs itself as a wrapper on library backends (see
+#    Backend.addWrapper) and repeats idempotent calls (getters, absolute
+#    setters, stops) that failed with a transient code, with exponential
+#    backoff and jitter, so a long scan survives a short USB glitch:
+#
+#      import pyanc350.v4.ANC350libv4 as ANC
+#      retry = RetryPolicy(ANC.backend, attempts=5, delay=0.01)
+#      ...
+#      print(retry.stats())
+#
+
+
+class ANC350Error(Exception):
+    '''
+    Error returned by an ANC350 library.
+
+    Attributes
+        code	Return code
+        func	Name of the library function
+        arguments	Arguments of the call
+    '''
+
+    def __init__(self, message, code=None, func=None, arguments=()):
+        super().__init__(message)
+        self.code = code
+        self.func = func
+        self.arguments = arguments
+
+
+class TransientError(ANC350Error):
+    '''
+    Error that may not occur again if the call is repeated.
+    '''
+
+class UnspecificError(ANC350Error): pass
+class CommTimeout(TransientError): pass
+class NotConnected(ANC350Error): pass
+class DriverError(ANC350Error): pass
+class FileNotFound(ANC350Error): pass
+class DeviceLocked(ANC350Error): pass
+class UnknownError(ANC350Error): pass
+class NoDevice(ANC350Error): pass
+class NotAvailable(ANC350Error): pass
+
+class ParameterError(ANC350Error):
+    '''
+    A parameter of the call was not accepted.
+    '''
+
+class InvalidParam(ParameterError): pass
+class NotSpecifiedParam(ParameterError): pass
+class NoAxis(ParameterError): pass
+class OutOfRange(ParameterError): pass
+
+
+class RetryPolicy:
+
+    def __init__(self, *backends, attempts=5, delay=0.01, factor=2.0, maxDelay=1.0, jitter=0.5, codes=(1,)):
+        '''
+        Parameters
+            backends	Library backends to attach to right away (eg. pyanc350.v4.ANC350libv4.backend)
+            attempts	Maximum number of repetitions of a failed call
+            delay	Wait before the first repetition [s]
+            factor	Growth of the wait after each repetition
+            maxDelay	Longest wait [s]
+            jitter	Random fraction (0 ... 1) by which each wait is shortened, so that several programs do not retry in step
+            codes	Return codes that are retried. Default: the communication timeout (NCB_Timeout, ANC_Timeout)
+        '''
+        self.attempts = attempts
+        self.delay = delay
+        self.factor = factor
+        self.maxDelay = maxDelay
+        self.jitter = jitter
+        self.codes = frozenset(codes)
+        self.retries = 0 #repetitions of calls
+        self.recovered = 0 #calls that succeeded after repetitions
+        self.failed = 0 #calls that still failed after all repetitions
+        import random, threading #kept out of the import path of the package, which imports this module
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._wrappers = {}
+        for backend in backends:
+            self.attach(backend)
+
+
+    def attach(self, backend):
+        '''
+        Starts retrying the idempotent calls (Backend.idempotent) into the library of backend.
+        '''
+        if backend not in self._wrappers:
+            wrapper = self._wrapper(backend)
+            self._wrappers[backend] = wrapper
+            backend.addWrapper(wrapper)
+        return self
+
+
+    def detach(self, backend=None):
+        '''
+        Stops retrying calls into the library of backend, or of all attached backends if None.
+        '''
+        for attached in ([backend] if backend is not None else list(self._wrappers)):
+            attached.removeWrapper(self._wrappers.pop(attached))
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.detach()
+
+
+    def stats(self):
+        '''
+        Returns {retries, recovered, failed}.
+        '''
+        with self._lock:
+            return {'retries': self.retries, 'recovered': self.recovered, 'failed': self.failed}
+
+
+    def waits(self):
+        '''
+        Yields the waits [s] before each repetition.
+        '''
+        delay = self.delay
+        for i in range(self.attempts):
+            yield delay*(1 - self.jitter*self._random.random())
+            delay = min(self.maxDelay, delay*self.factor)
+
+
+    def _wrapper(self, backend):
+        def wrap(alias, func):
+            if alias not in backend.idempotent:
+                return func
+            codes = self.codes
+            def call(*args):
+                code = func(*args)
+                if code not in codes:
+                    return code
+                for wait in self.waits():
+                    backend.clock.sleep(wait)
+                    with self._lock:
+                        self.retries += 1
+                    code = func(*args)
+                    if code not in codes:
+                        with self._lock:
+                            self.recovered += 1
+                        return code
+                with self._lock:
+                    self.failed += 1
+                return code
+            call.__name__ = getattr(func, '__name__', alias)
+            return call
+        return wrap
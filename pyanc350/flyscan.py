@@ -0,0 +1,169 @@
+#
+#  flyscan acquires while the axis moves, instead of stepping and settling.
+#
+#  Each line is one continuous move (startContinuousMove on v3/v4,
+#    moveContinuous on v2). While it runs, position reads and detector
+#    reads alternate, each stamped with the middle of its call. Afterwards
+#    the position is interpolated to the detector timestamps and the
+#    detector values onto a uniform grid, vectorized with NumPy:
+#
+#      scan = FlyScan(pos, axis=0, grid=xs, detector=counter.read, slow=[{1: y} for y in ys])
+#      image = scan.run()               # shape (len(ys), len(xs)), NaN where not covered
+#      for line in scan.lines:
+#          print(line.velocity, line.density)
+#
+#  Requires NumPy (pip install pyanc350[numpy]).
+#
+
+import numpy as np
+from pyanc350.clock import clockOf
+from pyanc350.motion import checkRunning, continuous
+
+
+class FlyLine:
+    '''
+    Samples captured along one line.
+
+    Attributes
+        line	Index of the line
+        backward	If the line ran backward
+        tPosition, position	Times [s] and positions of the position reads
+        tDetector, values	Times [s] and values of the detector reads
+        elapsed	Duration of the continuous move [s]
+    '''
+
+    def __init__(self, line, backward, tPosition, position, tDetector, values, elapsed):
+        self.line = line
+        self.backward = backward
+        self.tPosition = tPosition
+        self.position = position
+        self.tDetector = tDetector
+        self.values = values
+        self.elapsed = elapsed
+
+
+    @property
+    def detectorPosition(self):
+        '''
+        Position at each detector read, interpolated from the position reads.
+        '''
+        return np.interp(self.tDetector, self.tPosition, self.position)
+
+
+    @property
+    def velocity(self):
+        '''
+        Mean velocity over the line [units/s], from a linear fit of the position reads.
+        '''
+        if len(self.tPosition) < 2:
+            return float('nan')
+        return float(np.polyfit(self.tPosition, self.position, 1)[0])
+
+
+    @property
+    def density(self):
+        '''
+        Detector samples per unit length along the line.
+        '''
+        span = np.ptp(self.detectorPosition) if len(self.tDetector) else 0
+        return len(self.tDetector)/span if span else float('nan')
+
+
+    def regrid(self, grid):
+        '''
+        Returns the detector values interpolated onto grid, NaN outside the range covered.
+        '''
+        x = self.detectorPosition
+        order = np.argsort(x, kind='stable')
+        x, values = x[order], np.asarray(self.values)[order]
+        if values.ndim == 1:
+            return np.interp(grid, x, values, left=np.nan, right=np.nan)
+        return np.stack([np.interp(grid, x, column, left=np.nan, right=np.nan) for column in values.T], axis=-1)
+
+
+class FlyScan:
+
+    def __init__(self, positioner, axis, grid, detector, slow=None, lines=None, margin=None, serpentine=True, interval=0.0, timeout=None, check=0.01):
+        '''
+        Parameters
+            positioner	v2, v3 or v4 Positioner
+            axis	Fast axis, moved continuously along each line
+            grid	Uniform coordinates of the fast axis the results are interpolated onto, in the position units of the library
+            detector	Function returning one detector reading (a number or a 1D array)
+            slow	Optional list with one {axis: target} per line, moved to (with moveTo) before the line
+            lines	Number of lines if slow is not given. Default: 1
+            margin	Run-up before and run-out after the grid. Default: two grid steps. Keep it larger than the target range, or the run-up may be skipped and the first grid points left uncovered.
+            serpentine	Run every other line backward, avoiding flyback
+            interval	Minimum time [s] between samples; 0 samples as fast as the link allows
+            timeout	Maximum time [s] for each line and each move
+            check	Time [s] between reads of the axis status during a line, which catch an axis stopped early; the status is not read with every sample, which would halve the sampling rate
+        '''
+        self.positioner = positioner
+        self.axis = axis
+        self.grid = np.asarray(grid, dtype=float)
+        self.detector = detector
+        self.slow = slow
+        self.count = len(slow) if slow is not None else (lines or 1)
+        if margin is None:
+            margin = 2*abs(self.grid[1] - self.grid[0]) if len(self.grid) > 1 else 0.0
+        self.margin = margin
+        self.serpentine = serpentine
+        self.interval = interval
+        self.timeout = timeout
+        self.check = check
+        self.v2 = hasattr(positioner, 'updateAbsolute')
+        self.lines = []
+
+
+    def run(self):
+        '''
+        Runs all lines and returns the detector values regridded, shape (lines, len(grid)) plus the shape of a detector reading.
+        '''
+        self.lines = []
+        for line in range(self.count):
+            if self.slow is not None:
+                for axis, target in self.slow[line].items():
+                    self.positioner.moveTo(axis, target, None, self.timeout)
+            self.lines.append(self.runLine(line))
+        return np.stack([line.regrid(self.grid) for line in self.lines])
+
+
+    def runLine(self, line):
+        '''
+        Runs one line and returns its FlyLine. Raises RuntimeError if the axis stops before the end of the line (end of travel, output disabled, sensor error).
+        '''
+        positioner, axis = self.positioner, self.axis
+        clock = clockOf(positioner)
+        lower, upper = self.grid.min() - self.margin, self.grid.max() + self.margin
+        backward = self.serpentine and line % 2 == 1
+        start, stop = (upper, lower) if backward else (lower, upper)
+        sign = -1 if backward else 1
+        positioner.moveTo(axis, int(round(start)) if self.v2 else start, None, self.timeout)
+        tPosition, position, tDetector, values = [], [], [], []
+        began = clock.time()
+        state = {}
+        checked = None #time of the last status check
+        continuous(positioner, axis, True, backward)
+        try:
+            while True:
+                before = clock.time()
+                x = positioner.getPosition(axis)
+                after = clock.time()
+                tPosition.append((before + after)/2)
+                position.append(x)
+                if sign*(x - stop) >= 0:
+                    break
+                if self.timeout is not None and after - began > self.timeout:
+                    raise TimeoutError('line {} did not finish within {} s, last position {}'.format(line, self.timeout, x))
+                if checked is None or after - checked >= self.check:
+                    checkRunning(positioner, axis, backward, state, after)
+                    checked = after
+                value = self.detector()
+                tDetector.append((after + clock.time())/2)
+                values.append(value)
+                if self.interval:
+                    clock.sleep(self.interval)
+        finally:
+            continuous(positioner, axis, False, backward)
+        return FlyLine(line, backward, np.array(tPosition), np.array(position, dtype=float),
+            np.array(tDetector), np.array(values), clock.time() - began)
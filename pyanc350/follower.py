@@ -0,0 +1,197 @@
+#
+#  follower streams a changing target position to one axis at a fixed rate.
+#
+#  A SetpointFollower takes setpoints from an iterable (one per tick) or
+#    from put() calls (any thread, any rate) and sends them on a steady
+#    schedule: with v2 through moveAbsolute and then updateAbsolute, which
+#    adjusts the running approach, with v3/v4 through setTargetPosition while automatic motion
+#    stays enabled. If sending falls behind, intermediate setpoints are
+#    dropped rather than queued, so the axis always chases the newest one:
+#
+#      with SetpointFollower(pos, 0, rate=100) as follower:
+#          for setpoint in trajectory:
+#              follower.put(setpoint)
+#              ...
+#      print(follower.stats())
+#
+
+import collections, math, threading
+from pyanc350.clock import clockOf
+
+#statistics of a follower run; errors are in position units, jitter in s
+FollowerStats = collections.namedtuple('FollowerStats', ['ticks', 'sent', 'dropped', 'overruns', 'rmsError', 'maxError', 'rmsJitter', 'maxJitter'])
+
+
+class SetpointFollower:
+
+    def __init__(self, positioner, axis, rate=100.0, source=None, measure=True):
+        '''
+        Parameters
+            positioner	v2, v3 or v4 Positioner (or a DeviceWorker for one)
+            axis	Axis to drive
+            rate	Setpoints sent per second, typically 50 ... 200
+            source	Optional iterable of setpoints, one per tick; the follower stops when it is exhausted. Values for ticks that were missed are skipped.
+            measure	Read the position every tick to compute the tracking error
+        '''
+        self.positioner = positioner
+        self.axis = axis
+        self.period = 1/rate
+        self.source = source
+        self.measure = measure
+        self.clock = clockOf(positioner)
+        self.error = None
+        self._v2 = hasattr(positioner, 'updateAbsolute')
+        self._lock = threading.Lock()
+        self._setpoint = None
+        self._fresh = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._reset()
+
+
+    def _reset(self):
+        self.ticks = self.sent = self.dropped = self.overruns = 0
+        self._errorSum = self._errorMax = 0.0
+        self._measured = 0
+        self._jitterSum = self._jitterMax = 0.0
+
+
+    def put(self, setpoint):
+        '''
+        Sets the newest setpoint; it is sent at the next tick. A setpoint replaced before it was sent counts as dropped.
+        '''
+        with self._lock:
+            if self._fresh:
+                self.dropped += 1
+            self._setpoint = setpoint
+            self._fresh = True
+
+
+    def start(self):
+        '''
+        Starts following on a background thread.
+        '''
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError('follower is already running')
+        self._stop.clear()
+        self.error = None
+        self._reset()
+        self._thread = threading.Thread(target=self._run, name='SetpointFollower', daemon=True)
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        '''
+        Stops following and the motion of the axis.
+        '''
+        self._stop.set()
+        self.join()
+
+
+    def join(self, timeout=None):
+        '''
+        Waits until the follower has finished (its source is exhausted or it was stopped). Errors raised on the follower thread are raised again here.
+        '''
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.error is not None:
+            raise self.error
+
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+    def stats(self):
+        '''
+        Returns FollowerStats(ticks, sent, dropped, overruns, rmsError, maxError, rmsJitter, maxJitter). The tracking error is the distance between the position and the setpoint sent one tick earlier; jitter is the lateness of each tick against the schedule.
+        '''
+        ticks = max(self.ticks, 1)
+        measured = max(self._measured, 1)
+        return FollowerStats(self.ticks, self.sent, self.dropped, self.overruns,
+            math.sqrt(self._errorSum/measured), self._errorMax, math.sqrt(self._jitterSum/ticks), self._jitterMax)
+
+
+    def _next(self, iterator, missed):
+        #setpoint for this tick, or None if there is nothing new to send
+        if iterator is not None:
+            for i in range(missed):
+                next(iterator)
+            self.dropped += missed
+            return next(iterator)
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._fresh = False
+            return self._setpoint
+
+
+    def _send(self, setpoint, first):
+        positioner, axis = self.positioner, self.axis
+        if self._v2:
+            # updateAbsolute only adjusts an approach that is already running
+            if first:
+                positioner.moveAbsolute(axis, setpoint)
+            else:
+                positioner.updateAbsolute(axis, setpoint)
+        else:
+            positioner.setTargetPosition(axis, setpoint)
+            if first:
+                positioner.startAutoMove(axis, 1, 0)
+
+
+    def _halt(self):
+        if self._v2:
+            self.positioner.stopApproach(self.axis)
+        else:
+            self.positioner.startAutoMove(self.axis, 0, 0)
+
+
+    def _run(self):
+        clock, period = self.clock, self.period
+        iterator = iter(self.source) if self.source is not None else None
+        sent = None
+        missed = 0
+        deadline = clock.time()
+        started = False
+        try:
+            while not self._stop.is_set():
+                lateness = clock.time() - deadline
+                self.ticks += 1
+                self._jitterSum += lateness*lateness
+                self._jitterMax = max(self._jitterMax, lateness)
+                if self.measure and sent is not None:
+                    error = abs(self.positioner.getPosition(self.axis) - sent)
+                    self._measured += 1
+                    self._errorSum += error*error
+                    self._errorMax = max(self._errorMax, error)
+                try:
+                    setpoint = self._next(iterator, missed)
+                except StopIteration:
+                    break
+                if setpoint is not None and setpoint != sent:
+                    self._send(setpoint, not started)
+                    started = True
+                    sent = setpoint
+                    self.sent += 1
+                deadline += period
+                now = clock.time()
+                missed = 0
+                if now > deadline:
+                    # skip the ticks that can no longer be met instead of bursting to catch up
+                    missed = int((now - deadline)/period) + 1
+                    self.overruns += missed
+                    deadline += missed*period
+                clock.sleep(deadline - now)
+        except Exception as e:
+            self.error = e
+        finally:
+            if started:
+                try:
+                    self._halt()
+                except Exception as e:
+                    self.error = self.error or e
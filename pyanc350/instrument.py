@@ -0,0 +1,187 @@
+#
+#  instrument measures every call into the ANC350 libraries.
+#
+#  An Instrument installs itself as a wrapper on library backends (see
+#    Backend.addWrapper) and records, per function, the number of calls,
+#    the return codes other than 0 and a histogram of the latency with
+#    power-of-two buckets from 1 us. Detaching it restores the direct
+#    call path, so there is no cost when it is not in use:
+#
+#      import pyanc350.v4.ANC350libv4 as ANC
+#      with Instrument(ANC.backend) as calls:
+#          scan.run()
+#      print(calls.report())
+#      calls.dump('calls.json')
+#
+
+import json, threading, time
+
+#latencies below 2**FIRST ns (~1 us) share the first bucket
+FIRST = 10
+
+
+class CallStats:
+    '''
+    Statistics of one library function.
+
+    Attributes
+        count	Number of calls
+        errors	{return code or exception name: count} of the calls that failed
+        total	Sum of the latencies [ns]
+        max	Longest latency [ns]
+        buckets	Calls per latency bucket: bucket i counts latencies below 2**(FIRST + i) ns
+    '''
+
+    def __init__(self, buckets):
+        self.count = 0
+        self.errors = {}
+        self.total = 0
+        self.max = 0
+        self.buckets = [0]*buckets
+
+
+    def record(self, latency, error=None):
+        self.count += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+        bucket = max(0, latency.bit_length() - FIRST)
+        self.buckets[min(bucket, len(self.buckets) - 1)] += 1
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+
+    def percentile(self, fraction):
+        '''
+        Upper bound [s] of the bucket containing the given fraction (0 ... 1) of the calls, at most the longest latency.
+        '''
+        if not self.count:
+            return 0.0
+        rank = fraction*self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(2**(FIRST + i), self.max)*1e-9
+        return self.max*1e-9
+
+
+    def toDict(self):
+        return {
+            'count': self.count,
+            'errors': {str(code): n for code, n in self.errors.items()},
+            'total': self.total*1e-9,
+            'mean': self.total*1e-9/self.count if self.count else 0.0,
+            'max': self.max*1e-9,
+            'p50': self.percentile(0.5),
+            'p99': self.percentile(0.99),
+            'histogram': {'{:g}'.format(2**(FIRST + i)*1e-9): n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+class Instrument:
+
+    def __init__(self, *backends, buckets=24):
+        '''
+        Parameters
+            backends	Library backends to attach to right away (eg. pyanc350.v4.ANC350libv4.backend)
+            buckets	Number of histogram buckets; the last one collects all longer calls (24 buckets: up to ~8 s)
+        '''
+        self.buckets = buckets
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._wrappers = {}
+        for backend in backends:
+            self.attach(backend)
+
+
+    def attach(self, backend):
+        '''
+        Starts recording the calls into the library of backend.
+        '''
+        if backend not in self._wrappers:
+            wrapper = self._wrapper(backend)
+            self._wrappers[backend] = wrapper
+            backend.addWrapper(wrapper)
+        return self
+
+
+    def detach(self, backend=None):
+        '''
+        Stops recording the calls into the library of backend, or of all attached backends if None. The statistics are kept.
+        '''
+        for attached in ([backend] if backend is not None else list(self._wrappers)):
+            attached.removeWrapper(self._wrappers.pop(attached))
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.detach()
+
+
+    def reset(self):
+        '''
+        Clears the statistics.
+        '''
+        with self._lock:
+            self.stats = {}
+
+
+    def snapshot(self):
+        '''
+        Returns {'library.function': {count, errors, total, mean, max, p50, p99, histogram}} with times in s. The histogram maps the upper bound of each non-empty bucket to its number of calls.
+        '''
+        with self._lock:
+            return {name: stats.toDict() for name, stats in sorted(self.stats.items())}
+
+
+    def dump(self, file):
+        '''
+        Writes the snapshot as JSON to a file name or an open text file.
+        '''
+        if isinstance(file, str):
+            with open(file, 'w') as f:
+                json.dump(self.snapshot(), f, indent=1)
+        else:
+            json.dump(self.snapshot(), file, indent=1)
+
+
+    def report(self):
+        '''
+        Returns a table of all functions, sorted by total time.
+        '''
+        rows = sorted(self.snapshot().items(), key=lambda item: -item[1]['total'])
+        lines = ['{:<32} {:>8} {:>7} {:>10} {:>10} {:>10} {:>10}'.format('function', 'calls', 'errors', 'total [s]', 'mean [us]', 'p99 [us]', 'max [us]')]
+        for name, stats in rows:
+            lines.append('{:<32} {:>8} {:>7} {:>10.4f} {:>10.1f} {:>10.1f} {:>10.1f}'.format(name, stats['count'],
+                sum(stats['errors'].values()), stats['total'], stats['mean']*1e6, stats['p99']*1e6, stats['max']*1e6))
+        return '\n'.join(lines)
+
+
+    def _wrapper(self, backend):
+        def wrap(alias, func):
+            name = '{}.{}'.format(backend.name, alias)
+            returnsCode = alias not in backend.unchecked
+            clock = time.perf_counter_ns
+            def call(*args):
+                start = clock()
+                try:
+                    result = func(*args)
+                except BaseException as e:
+                    self._record(name, clock() - start, type(e).__name__)
+                    raise
+                self._record(name, clock() - start, result if returnsCode and result else None)
+                return result
+            call.__name__ = getattr(func, '__name__', alias)
+            return call
+        return wrap
+
+
+    def _record(self, name, latency, error):
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = CallStats(self.buckets)
+            stats.record(latency, error)
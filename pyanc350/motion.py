@@ -0,0 +1,206 @@
+#
+#  motion contains the polling logic shared by the blocking moves of the
+#    v2, v3 and v4 Positioners (moveTo, moveMany, waitForTarget).
+#
+#  Instead of sleeping a fixed time between status reads, AdaptivePoller
+#    estimates the velocity from successive positions and sleeps for a
+#    fraction of the predicted remaining travel time: long while the axis
+#    is far from its target, short as it closes in, so the arrival is
+#    noticed within a few ms without flooding the link on long moves.
+#
+
+import collections
+
+#statistics of a finished move; position and target are in the units of the library
+MoveStats = collections.namedtuple('MoveStats', ['axis', 'target', 'position', 'arrived', 'elapsed', 'polls'])
+
+
+class AdaptivePoller:
+    '''
+    Chooses the interval until the next poll of a moving axis.
+
+    Parameters
+        target	Target position, or None if unknown (the interval then grows geometrically)
+        minInterval	Shortest interval [s]
+        maxInterval	Longest interval [s]
+        fraction	Fraction of the predicted remaining travel time to sleep
+    '''
+
+    def __init__(self, target=None, minInterval=1e-3, maxInterval=0.5, fraction=0.5):
+        self.target = target
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.fraction = fraction
+        self.velocity = None
+        self.interval = minInterval
+        self._last = None
+
+
+    def update(self, position, now):
+        '''
+        Records a position read at time now and returns the interval until the next poll.
+        '''
+        last, self._last = self._last, (position, now)
+        if last is not None and now > last[1]:
+            velocity = abs(position - last[0])/(now - last[1])
+            self.velocity = velocity if self.velocity is None else (self.velocity + velocity)/2
+        if self.target is None or self.velocity is None:
+            interval = self.interval*2
+        elif self.velocity == 0:
+            interval = self.maxInterval
+        else:
+            interval = self.fraction*abs(self.target - position)/self.velocity
+        self.interval = min(self.maxInterval, max(self.minInterval, interval))
+        return self.interval
+
+
+#time [s] an axis must be seen idle before a wait counts it as stopped; the moving flag is set shortly after a move is started
+IDLE_GRACE = 0.02
+
+
+def stopped(state, moving, now):
+    '''
+    Follows the moving flag over the polls of one wait. Returns True once the axis has been seen idle on two polls in a row at least IDLE_GRACE apart, ie. its motion was stopped (eg. from another thread) or never started.
+
+    Parameters
+        state	Dict kept over the polls of the wait, initially empty; state['moved'] tells if motion was seen
+        moving	Moving flag of this poll
+        now	Time of this poll [s]
+    '''
+    if moving:
+        state['moved'] = True
+        state.pop('idleSince', None)
+        state['idlePolls'] = 0
+        return False
+    since = state.setdefault('idleSince', now)
+    state['idlePolls'] = state.get('idlePolls', 0) + 1
+    return state['idlePolls'] >= 2 and now - since >= IDLE_GRACE
+
+
+def checkRunning(positioner, axis, backward, state, now):
+    '''
+    Reads the status of an axis in continuous motion and raises RuntimeError if it cannot go on: end of travel in the direction of motion (stop detected on v2), output disabled, sensor error, or no longer moving (see stopped).
+
+    Parameters
+        positioner	v2 or v3/v4 Positioner
+        axis	Axis number
+        backward	Direction of the motion
+        state	Dict kept over the checks of one motion, initially empty
+        now	Time of the check [s]
+    '''
+    if hasattr(positioner, 'updateAbsolute'):
+        status = positioner.getStatus(axis)
+        moving, reason = status & 1, 'stop detected (end of travel)' if status & 0b10 else 'sensor error' if status & 0b1100 else None
+    else:
+        connected, enabled, moving, onTarget, eotFwd, eotBwd, error = positioner.getAxisStatus(axis)
+        reason = 'end of travel' if (eotBwd if backward else eotFwd) else 'output disabled' if not enabled else 'sensor error' if error else None
+    if reason is None and stopped(state, moving, now):
+        reason = 'not moving'
+    if reason is not None:
+        raise RuntimeError('axis {} stopped: {}'.format(axis, reason))
+
+
+def continuous(positioner, axis, start, backward):
+    '''
+    Starts or stops continuous motion of an axis: startContinuousMove on v3/v4, moveContinuous/stopMoving on v2.
+    '''
+    if hasattr(positioner, 'startContinuousMove'):
+        positioner.startContinuousMove(axis, int(start), int(backward))
+    elif start:
+        positioner.moveContinuous(axis, int(backward))
+    else:
+        positioner.stopMoving(axis)
+
+
+def waitFor(clock, poll, poller, timeout=None):
+    '''
+    Polls a move until it is finished, sleeping on clock for the intervals chosen by poller.
+
+    Parameters
+        clock	Time base, eg. Backend.clock
+        poll	Function returning (finished, arrived, position)
+        poller	AdaptivePoller for the move
+        timeout	Maximum time to wait [s], or None to wait indefinitely
+    Returns
+        arrived	If the move ended on target
+        position	Last position read
+        elapsed	Time from the first to the last poll [s]
+        polls	Number of polls
+    '''
+    start = clock.time()
+    polls = 0
+    while True:
+        finished, arrived, position = poll()
+        polls += 1
+        now = clock.time()
+        if finished:
+            return arrived, position, now - start, polls
+        interval = poller.update(position, now)
+        if timeout is not None:
+            if now - start >= timeout:
+                raise TimeoutError('move did not finish within {} s, last position {}'.format(timeout, position))
+            interval = min(interval, start + timeout - now)
+        clock.sleep(interval)
+
+
+def waitForMany(clock, polls, timeout=None):
+    '''
+    Polls several moves in one loop until all are finished, sleeping for the shortest interval chosen by the pollers of the moves still running.
+
+    Parameters
+        clock	Time base, eg. Backend.clock
+        polls	{key: (poll, poller)} with poll and poller as in waitFor
+        timeout	Maximum time to wait for all moves [s], or None to wait indefinitely
+    Returns
+        results	{key: (arrived, position, elapsed, polls)} as returned by waitFor
+    '''
+    start = clock.time()
+    counts = dict.fromkeys(polls, 0)
+    results = {}
+    while True:
+        interval = None
+        for key, (poll, poller) in polls.items():
+            if key in results:
+                continue
+            finished, arrived, position = poll()
+            counts[key] += 1
+            now = clock.time()
+            if finished:
+                results[key] = arrived, position, now - start, counts[key]
+                continue
+            next_ = poller.update(position, now)
+            interval = next_ if interval is None else min(interval, next_)
+        if interval is None:
+            return results
+        now = clock.time()
+        if timeout is not None:
+            if now - start >= timeout:
+                running = ', '.join(str(key) for key in polls if key not in results)
+                raise TimeoutError('moves of {} did not finish within {} s'.format(running, timeout))
+            interval = min(interval, start + timeout - now)
+        clock.sleep(interval)
+
+
+async def waitForAsync(clock, poll, poller, timeout=None):
+    '''
+    Coroutine version of waitFor: poll is a coroutine function and the event loop keeps running between polls.
+    '''
+    import asyncio #only needed by the asyncio interface
+    start = clock.time()
+    polls = 0
+    while True:
+        finished, arrived, position = await poll()
+        polls += 1
+        now = clock.time()
+        if finished:
+            return arrived, position, now - start, polls
+        interval = poller.update(position, now)
+        if timeout is not None:
+            if now - start >= timeout:
+                raise TimeoutError('move did not finish within {} s, last position {}'.format(timeout, position))
+            interval = min(interval, start + timeout - now)
+        if clock.rate is None:
+            #stepped virtual time: advance it instead of waiting
+            clock.sleep(interval)
+            interval = 0
+        await asyncio.sleep(interval/(clock.rate or 1))
@@ -0,0 +1,218 @@
+#
+#  openloop positions axes without a working sensor by dead reckoning.
+#
+#  A StepModel holds, per actuator, the step size measured at a number of
+#    (frequency, amplitude, direction) settings. It is calibrated on an
+#    axis whose sensor works, with counted steps and getPosition, or filled
+#    from user data, and can be saved to and loaded from JSON:
+#
+#      model = StepModel()
+#      model.calibrate(pos, 0, frequencies=(200, 1000), amplitudes=(30, 45))
+#      model.save('steps.json')
+#
+#  An OpenLoopAxis then moves an axis without a sensor by the number of
+#    steps the model predicts for a distance, and keeps the estimated
+#    position. On v3/v4 short moves are made of counted single steps, as
+#    in the calibration; longer ones in one shot (Positioner.stepN), a
+#    continuous move timed by the host:
+#
+#      axis = OpenLoopAxis(pos, 2, StepModel.load('steps.json'), actuator='ANPz101')
+#      axis.moveBy(2e-6)
+#      axis.moveTo(0.0)
+#
+
+import bisect, json
+from pyanc350.clock import clockOf
+
+
+class StepModel:
+
+    def __init__(self, table=None):
+        '''
+        Parameters
+            table	Optional {actuator: [(frequency, amplitude, backward, step), ...]}
+        '''
+        self.table = {}
+        for actuator, entries in (table or {}).items():
+            for entry in entries:
+                self.add(actuator, *entry)
+
+
+    def add(self, actuator, frequency, amplitude, backward, step):
+        '''
+        Records the step size of an actuator at a frequency [Hz], amplitude [V] and direction (backward 0 or 1), in the position units of the library.
+        '''
+        self.table.setdefault(actuator, {})[(float(frequency), float(amplitude), int(bool(backward)))] = float(step)
+
+
+    def actuators(self):
+        return list(self.table)
+
+
+    def step(self, actuator, frequency, amplitude, backward):
+        '''
+        Returns the step size of an actuator. Between calibrated amplitudes the step size is interpolated linearly, at the calibrated frequency closest to frequency; outside them the nearest amplitude is used.
+        '''
+        entries = self.table.get(actuator)
+        if not entries:
+            raise KeyError('actuator {!r} is not calibrated'.format(actuator))
+        backward = int(bool(backward))
+        frequencies = {f for f, a, b in entries if b == backward}
+        if not frequencies:
+            raise KeyError('actuator {!r} is not calibrated {}'.format(actuator, 'backward' if backward else 'forward'))
+        f = min(frequencies, key=lambda f: abs(f - frequency))
+        points = sorted((a, s) for (fa, a, b), s in entries.items() if fa == f and b == backward)
+        amplitudes = [a for a, s in points]
+        i = bisect.bisect_left(amplitudes, amplitude)
+        if i == 0:
+            return points[0][1]
+        if i == len(points):
+            return points[-1][1]
+        (a0, s0), (a1, s1) = points[i - 1], points[i]
+        return s0 + (s1 - s0)*(amplitude - a0)/(a1 - a0)
+
+
+    def steps(self, actuator, frequency, amplitude, distance):
+        '''
+        Returns (steps, backward): the number of steps that moves an actuator closest to distance, and their direction.
+        '''
+        backward = distance < 0
+        size = self.step(actuator, frequency, amplitude, backward)
+        return int(round(abs(distance)/size)), backward
+
+
+    def calibrate(self, positioner, axis, frequencies, amplitudes, steps=50, actuator=None):
+        '''
+        Measures the step size of an axis with a working sensor at every combination of frequencies and amplitudes, in both directions, moving steps counted steps each: single steps (startSingleStep) one period apart on v3/v4, whose stepN is a timed continuous move, and the hardware step count (stepN) on v2. The axis ends up close to where it started and its frequency and amplitude are restored.
+
+        Parameters
+            positioner	v2, v3 or v4 Positioner
+            axis	Axis number
+            frequencies	Frequencies [Hz]
+            amplitudes	Amplitudes [V]
+            steps	Steps per measurement
+            actuator	Key of the table; default: the actuator name (v3/v4) or 'axis<n>' (v2)
+        Returns
+            actuator	The key the results were stored under
+        '''
+        v2 = hasattr(positioner, 'updateAbsolute')
+        if actuator is None:
+            actuator = 'axis{}'.format(axis) if v2 else positioner.getActuatorName(axis)
+        restore = _getDrive(positioner, axis)
+        try:
+            for frequency in frequencies:
+                for amplitude in amplitudes:
+                    _setDrive(positioner, axis, frequency, amplitude)
+                    for backward in (0, 1):
+                        start = positioner.getPosition(axis)
+                        _countedSteps(positioner, axis, steps, backward, frequency)
+                        size = abs(positioner.getPosition(axis) - start)/steps
+                        if not size:
+                            raise RuntimeError('axis {} did not move at {} Hz, {} V; is its sensor connected?'.format(axis, frequency, amplitude))
+                        self.add(actuator, frequency, amplitude, backward, size)
+        finally:
+            _setDrive(positioner, axis, *restore)
+        return actuator
+
+
+    def toDict(self):
+        return {actuator: [[f, a, b, s] for (f, a, b), s in sorted(entries.items())] for actuator, entries in self.table.items()}
+
+
+    def save(self, filename):
+        '''
+        Writes the table to a JSON file.
+        '''
+        with open(filename, 'w') as f:
+            json.dump(self.toDict(), f, indent=1)
+
+
+    @classmethod
+    def load(cls, filename):
+        '''
+        Reads a table written by save.
+        '''
+        with open(filename) as f:
+            return cls(json.load(f))
+
+
+def _countedSteps(positioner, axis, n, backward, frequency):
+    #moves exactly n steps, so host timing does not enter the calibration
+    if hasattr(positioner, 'updateAbsolute'):
+        positioner.stepN(axis, n, backward)
+        return
+    clock = clockOf(positioner)
+    for i in range(n):
+        positioner.startSingleStep(axis, backward)
+        clock.sleep(1/frequency)
+
+
+def _getDrive(positioner, axis):
+    amplitude = positioner.getAmplitude(axis)
+    if hasattr(positioner, 'updateAbsolute'):
+        amplitude /= 1000 #v2 amplitudes are in mV
+    return positioner.getFrequency(axis), amplitude
+
+
+def _setDrive(positioner, axis, frequency, amplitude):
+    if hasattr(positioner, 'updateAbsolute'):
+        positioner.frequency(axis, int(frequency))
+        positioner.amplitude(axis, int(round(amplitude*1000)))
+    else:
+        positioner.setFrequency(axis, frequency)
+        positioner.setAmplitude(axis, amplitude)
+
+
+class OpenLoopAxis:
+
+    def __init__(self, positioner, axis, model, actuator=None, position=0.0, counted=100):
+        '''
+        Parameters
+            positioner	v2, v3 or v4 Positioner
+            axis	Axis number
+            model	Calibrated StepModel
+            actuator	Key of the model to use; default as in StepModel.calibrate
+            position	Estimated position to start from
+            counted	Moves of up to this many steps are made of single steps one period apart on v3/v4, as in StepModel.calibrate. Longer moves use stepN, whose count depends on the host timing a continuous move. v2 counts the steps in hardware either way.
+        '''
+        self.positioner = positioner
+        self.axis = axis
+        self.model = model
+        self.v2 = hasattr(positioner, 'updateAbsolute')
+        if actuator is None:
+            actuator = 'axis{}'.format(axis) if self.v2 else positioner.getActuatorName(axis)
+        self.actuator = actuator
+        self.position = position #estimated position
+        self.counted = counted
+        self.steps = 0 #steps issued
+
+
+    def drive(self):
+        '''
+        Returns the current (frequency [Hz], amplitude [V]) of the axis.
+        '''
+        return _getDrive(self.positioner, self.axis)
+
+
+    def moveBy(self, distance):
+        '''
+        Moves by distance with the number of steps the model predicts, and returns the distance the estimated position changed (a whole number of steps).
+        '''
+        frequency, amplitude = self.drive()
+        count, backward = self.model.steps(self.actuator, frequency, amplitude, distance)
+        if count and (self.v2 or count <= self.counted):
+            _countedSteps(self.positioner, self.axis, count, int(backward), frequency)
+        elif count:
+            self.positioner.stepN(self.axis, count, int(backward))
+        moved = (-1 if backward else 1)*count*self.model.step(self.actuator, frequency, amplitude, backward)
+        self.position += moved
+        self.steps += count
+        return moved
+
+
+    def moveTo(self, target):
+        '''
+        Moves to target, relative to the estimated position.
+        '''
+        return self.moveBy(target - self.position)
+
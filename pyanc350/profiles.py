@@ -0,0 +1,272 @@
+#
+#  profiles saves the configuration of a controller to a file and applies
+#    it again later, eg. to switch between a fast survey and a fine
+#    alignment setup.
+#
+#  A profile holds, for v3/v4, the actuator, amplitude, frequency,
+#    A-Quad-B and trigger settings of every axis and the NSL trigger; for
+#    v2 the amplitude, frequency and amplitude control of every axis, the
+#    duty cycle and trigger modes, and the quadrature units and triggers:
+#
+#      pos = pyanc350.v4.Positioner(cache=True)
+#      save(snapshot(pos), 'survey.toml')
+#      ...
+#      stats = apply(pos, load('survey.toml'))
+#
+#  apply reads the current value of every setting before writing it and
+#    only writes those that differ. Settings the device cannot report
+#    (A-Quad-B, triggers, duty cycle, amplitude control) are compared with
+#    the parameter cache of the Positioner, so apply needs one created with
+#    cache=True. Such a setting that has not been written since the
+#    Positioner was created is unknown: it is written, but only a change
+#    of a known persisted setting calls saveParams (a flash write).
+#
+#  Profiles are stored as JSON, or as TOML if the file name ends in .toml
+#    (reading TOML requires Python 3.11, or tomli).
+#
+
+import collections, json, math
+
+#a setting: group is 'device' (no index), 'axes', 'quadratures' or 'triggers'; read returns MISSING if the value is unknown
+Setting = collections.namedtuple('Setting', ['name', 'group', 'read', 'write', 'tolerance', 'persisted'])
+
+#result of apply: changes lists (group, index, name, old value, new value) of every write
+ApplyStats = collections.namedtuple('ApplyStats', ['written', 'skipped', 'saved', 'changes'])
+
+MISSING = object()
+
+#indices of the groups in a snapshot, besides the axes
+INDICES = {'quadratures': range(3), 'triggers': range(6)}
+
+
+def _args(index, value):
+    args = [] if index is None else [index]
+    return args + (list(value) if isinstance(value, (list, tuple)) else [value])
+
+def _setter(method):
+    return lambda positioner, index, value: getattr(positioner, method)(*_args(index, value))
+
+def _getter(method):
+    return lambda positioner, index: getattr(positioner, method)(index)
+
+def _cached(name):
+    return lambda positioner, index: positioner.cache.values.get((name, index), MISSING)
+
+def _actuator(positioner, index):
+    #number of the selected preset, from its name
+    name = positioner.getActuatorName(index)
+    if name in positioner.ACTUATORS:
+        return positioner.ACTUATORS.index(name)
+    return _cached('actuator')(positioner, index)
+
+
+#selectActuator comes first, as it loads the amplitude and frequency of the preset
+V4_SETTINGS = [
+    Setting('actuator', 'axes', _actuator, _setter('selectActuator'), 0, True),
+    Setting('amplitude', 'axes', _getter('getAmplitude'), _setter('setAmplitude'), 0.5e-3, True),
+    Setting('frequency', 'axes', _getter('getFrequency'), _setter('setFrequency'), 0.5, True),
+    Setting('aQuadBIn', 'axes', _cached('aQuadBIn'), _setter('configureAQuadBIn'), 0, True),
+    Setting('aQuadBOut', 'axes', _cached('aQuadBOut'), _setter('configureAQuadBOut'), 0, True),
+    Setting('extTrigger', 'axes', _cached('extTrigger'), _setter('configureExtTrigger'), 0, True),
+    Setting('rngTrigger', 'axes', _cached('rngTrigger'), _setter('configureRngTrigger'), 0, True),
+    Setting('rngTriggerEps', 'axes', _cached('rngTriggerEps'), _setter('configureRngTriggerEps'), 0, True),
+    Setting('rngTriggerPol', 'axes', _cached('rngTriggerPol'), _setter('configureRngTriggerPol'), 0, True),
+    Setting('nslTrigger', 'device', _cached('nslTrigger'), _setter('configureNslTrigger'), 0, True),
+    Setting('nslTriggerAxis', 'device', _cached('nslTriggerAxis'), _setter('configureNslTriggerAxis'), 0, True),
+    ]
+
+#the v2 library has no flash memory for the settings
+V2_SETTINGS = [
+    Setting('amplitudeControl', 'axes', _cached('amplitudeControl'), _setter('amplitudeControl'), 0, False),
+    Setting('amplitude', 'axes', _getter('getAmplitude'), _setter('amplitude'), 0, False),
+    Setting('frequency', 'axes', _getter('getFrequency'), _setter('frequency'), 0, False),
+    Setting('dutyCycleEnable', 'device', _cached('dutyCycleEnable'), _setter('dutyCycleEnable'), 0, False),
+    Setting('dutyCycleOffTime', 'device', _cached('dutyCycleOffTime'), _setter('dutyCycleOffTime'), 0, False),
+    Setting('dutyCyclePeriod', 'device', _cached('dutyCyclePeriod'), _setter('dutyCyclePeriod'), 0, False),
+    Setting('triggerModeIn', 'device', _cached('triggerModeIn'), _setter('triggerModeIn'), 0, False),
+    Setting('triggerModeOut', 'device', _cached('triggerModeOut'), _setter('triggerModeOut'), 0, False),
+    Setting('quadratureAxis', 'quadratures', _cached('quadratureAxis'), _setter('quadratureAxis'), 0, False),
+    Setting('quadratureInputPeriod', 'quadratures', _cached('quadratureInputPeriod'), _setter('quadratureInputPeriod'), 0, False),
+    Setting('quadratureOutputPeriod', 'quadratures', _cached('quadratureOutputPeriod'), _setter('quadratureOutputPeriod'), 0, False),
+    Setting('trigger', 'triggers', _cached('trigger'), _setter('trigger'), 0, False),
+    Setting('triggerAxis', 'triggers', _cached('triggerAxis'), _setter('triggerAxis'), 0, False),
+    Setting('triggerEpsilon', 'triggers', _cached('triggerEpsilon'), _setter('triggerEpsilon'), 0, False),
+    Setting('triggerPolarity', 'triggers', _cached('triggerPolarity'), _setter('triggerPolarity'), 0, False),
+    ]
+
+
+def settingsOf(positioner):
+    '''
+    Returns the list of Settings of a v2 or v3/v4 Positioner.
+    '''
+    return V2_SETTINGS if hasattr(positioner, 'updateAbsolute') else V4_SETTINGS
+
+
+def _library(positioner):
+    return 'v2' if hasattr(positioner, 'updateAbsolute') else 'v4'
+
+
+def _plain(value):
+    #tuples become lists, as they are stored in JSON and TOML
+    return list(value) if isinstance(value, tuple) else value
+
+
+def _same(current, value, tolerance):
+    if current is MISSING:
+        return False
+    if isinstance(current, (list, tuple)) or isinstance(value, (list, tuple)):
+        if not (isinstance(current, (list, tuple)) and isinstance(value, (list, tuple))) or len(current) != len(value):
+            return False
+        return all(_same(c, v, tolerance) for c, v in zip(current, value))
+    if isinstance(current, float) or isinstance(value, float):
+        return abs(current - value) <= tolerance or current == value or (math.isnan(current) and math.isnan(value))
+    return current == value
+
+
+def _entries(profile, settings):
+    #yields (setting, index, value) in the order of settings
+    for setting in settings:
+        if setting.group == 'device':
+            values = profile.get('device', {})
+            if setting.name in values:
+                yield setting, None, values[setting.name]
+            continue
+        for key, values in sorted(profile.get(setting.group, {}).items(), key=lambda item: int(item[0])):
+            if setting.name in values:
+                yield setting, int(key), values[setting.name]
+
+
+def snapshot(positioner, axes=(0, 1, 2)):
+    '''
+    Reads the configuration of a controller.
+
+    Parameters
+        positioner	v2 or v3/v4 Positioner
+        axes	Axes included
+    Returns
+        profile	{'library': 'v2' or 'v4', 'device': {name: value}, 'axes': {'0': {name: value}, ...}, ...}; settings whose value is unknown are left out
+    '''
+    profile = {'library': _library(positioner), 'device': {}}
+    indices = dict(INDICES, axes=axes)
+    for setting in settingsOf(positioner):
+        if setting.group == 'device':
+            value = setting.read(positioner, None)
+            if value is not MISSING:
+                profile['device'][setting.name] = _plain(value)
+            continue
+        if setting.group not in indices:
+            continue
+        for index in indices[setting.group]:
+            value = setting.read(positioner, index)
+            if value is not MISSING:
+                profile.setdefault(setting.group, {}).setdefault(str(index), {})[setting.name] = _plain(value)
+    return profile
+
+
+def diff(positioner, profile):
+    '''
+    Compares a profile with the configuration of a controller.
+
+    Returns
+        changes	List of (group, index, name, current value, profile value) of the settings that differ; the current value is None if it is unknown
+    '''
+    changes = []
+    for setting, index, value in _entries(profile, _check(positioner, profile)):
+        current = setting.read(positioner, index)
+        if not _same(current, value, setting.tolerance):
+            changes.append((setting.group, index, setting.name, None if current is MISSING else _plain(current), value))
+    return changes
+
+
+def apply(positioner, profile, save=True):
+    '''
+    Writes the settings of a profile that differ from the configuration of the controller.
+
+    Parameters
+        positioner	v2 or v3/v4 Positioner
+        profile	Profile, as returned by snapshot or load
+        save	Call saveParams (v3/v4) if a persisted setting whose current value was known changed, so it is the default after the next power-on. Settings whose value is unknown (see the cache of the Positioner) are written without saving.
+    Returns
+        stats	ApplyStats(written, skipped, saved, changes)
+    '''
+    cache = getattr(positioner, 'cache', None)
+    if cache is None or not cache.enabled:
+        raise ValueError('apply needs a Positioner created with cache=True, which remembers the settings the device cannot report')
+    written = skipped = 0
+    changes = []
+    persisted = False
+    for setting, index, value in _entries(profile, _check(positioner, profile)):
+        current = setting.read(positioner, index)
+        if _same(current, value, setting.tolerance):
+            skipped += 1
+            continue
+        setting.write(positioner, index, value)
+        written += 1
+        # a write of a value that was not known may not change anything, so it does not call for a flash write
+        persisted = persisted or (setting.persisted and current is not MISSING)
+        changes.append((setting.group, index, setting.name, None if current is MISSING else _plain(current), value))
+    saved = save and persisted
+    if saved:
+        positioner.saveParams()
+    return ApplyStats(written, skipped, saved, changes)
+
+
+def _check(positioner, profile):
+    library = profile.get('library', _library(positioner))
+    if library != _library(positioner):
+        raise ValueError('profile for the {} library cannot be applied to a {} Positioner'.format(library, _library(positioner)))
+    return settingsOf(positioner)
+
+
+def save(profile, path):
+    '''
+    Writes a profile to a file, as TOML if path ends in .toml, otherwise as JSON.
+    '''
+    with open(path, 'w') as f:
+        if str(path).endswith('.toml'):
+            f.write(_toml(profile))
+        else:
+            json.dump(profile, f, indent=1)
+
+
+def load(path):
+    '''
+    Reads a profile written by save (or by hand).
+    '''
+    if str(path).endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            import tomli as tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+
+def _tomlValue(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        return repr(value) if math.isfinite(value) else ('nan' if math.isnan(value) else ('inf' if value > 0 else '-inf'))
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(_tomlValue(item) for item in value) + ']'
+    if isinstance(value, int):
+        return str(value)
+    return json.dumps(str(value))
+
+
+def _toml(profile):
+    #the subset of TOML needed for profiles: plain values, and tables of them nested two deep
+    lines = ['{} = {}'.format(key, _tomlValue(value)) for key, value in profile.items() if not isinstance(value, dict)]
+    for key, table in profile.items():
+        if not isinstance(table, dict):
+            continue
+        if all(not isinstance(value, dict) for value in table.values()):
+            lines += ['', '[{}]'.format(key)]
+            lines += ['{} = {}'.format(name, _tomlValue(value)) for name, value in table.items()]
+            continue
+        for index, values in table.items():
+            lines += ['', '[{}.{}]'.format(key, index)]
+            lines += ['{} = {}'.format(name, _tomlValue(value)) for name, value in values.items()]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,206 @@
+#
+#  reconnect keeps a v3/v4 Positioner usable when its controller drops off
+#    USB or Ethernet.
+#
+#  A Reconnector stands in front of a Positioner and passes every call on.
+#    When a call fails with NotConnected, it closes the dead handle,
+#    discovers the devices again until the controller with the same serial
+#    number is back, connects it, and restores the axis configuration: for
+#    each parameter the device can report (amplitude, frequency, output
+#    enable, actuator) only values that differ are written, write-only
+#    parameters (target range, DC voltage) are written again. Then the
+#    failed call is repeated:
+#
+#      pos = Reconnector(pyanc350.v4.Positioner(), deadline=10)
+#      pos.setFrequency(0, 500)          # remembered for restoring
+#      pos.moveTo(0, 5e-3)               # survives a replugged cable
+#      print(pos.history)                # ReconnectStats of every reconnect
+#
+#  Single steps and relative moves are not repeated, since they may have
+#    been carried out before the connection was lost.
+#
+
+import collections, inspect, threading
+from pyanc350.clock import clockOf
+from pyanc350.errors import ANC350Error, NotConnected
+
+#result of one reconnect: written and skipped count the parameters restored and those already right
+ReconnectStats = collections.namedtuple('ReconnectStats', ['attempts', 'elapsed', 'written', 'skipped'])
+
+#calls that are not repeated after a reconnect
+NO_REPEAT = frozenset(['startSingleStep', 'stepN'])
+
+#setters whose last value is restored: name -> parameter
+SETTERS = {'setAmplitude': 'amplitude', 'setFrequency': 'frequency', 'setTargetRange': 'targetRange',
+    'setDcVoltage': 'dcVoltage', 'selectActuator': 'actuator', 'setAxisOutput': 'output'}
+
+
+class Reconnector:
+
+    def __init__(self, positioner, deadline=10.0, interval=0.2, ifaces=3, axes=(0, 1, 2)):
+        '''
+        Parameters
+            positioner	Connected v3 or v4 Positioner
+            deadline	Maximum time [s] for one reconnect, including waiting for the device to come back
+            interval	Time [s] between attempts to find the device
+            ifaces	Interfaces searched, as in Positioner.discover
+            axes	Axes whose configuration is captured and restored
+        '''
+        if not hasattr(positioner, 'discover'):
+            raise TypeError('Reconnector needs a v3 or v4 Positioner')
+        self.positioner = positioner
+        self.deadline = deadline
+        self.interval = interval
+        self.ifaces = ifaces
+        self.axes = tuple(axes)
+        self.clock = clockOf(positioner)
+        self.serialNo = positioner.getDeviceInfo(positioner.devNo)[2]
+        self.config = {} #(parameter, axis) -> last value written or captured
+        self.history = []
+        self._lock = threading.RLock()
+        self.capture()
+
+
+    def capture(self):
+        '''
+        Reads the configuration of the axes from the device: amplitude, frequency, output enable and actuator. Write-only parameters are only known once they are set through the Reconnector.
+        '''
+        positioner = self.positioner
+        for axis in self.axes:
+            self.config[('amplitude', axis)] = positioner.getAmplitude(axis)
+            self.config[('frequency', axis)] = positioner.getFrequency(axis)
+            enabled = positioner.getAxisStatus(axis)[1]
+            previous = self.config.get(('output', axis))
+            self.config[('output', axis)] = (enabled, previous[1] if previous else 0)
+            name = self.config[('actuatorName', axis)] = positioner.getActuatorName(axis)
+            if name in positioner.ACTUATORS:
+                # the preset selected, so it is restored if the device comes back with another one
+                self.config[('actuator', axis)] = positioner.ACTUATORS.index(name)
+
+
+    def __getattr__(self, name):
+        attribute = getattr(self.positioner, name)
+        if not callable(attribute):
+            return attribute
+        def call(*args, **kwargs):
+            try:
+                result = getattr(self.positioner, name)(*args, **kwargs)
+            except NotConnected:
+                self.reconnect()
+                if name in NO_REPEAT or (name == 'startAutoMove' and (args[2] if len(args) > 2 else kwargs.get('relative'))):
+                    raise
+                result = getattr(self.positioner, name)(*args, **kwargs)
+            self._remember(name, args, kwargs)
+            return result
+        return call
+
+
+    def _remember(self, name, args, kwargs):
+        parameter = SETTERS.get(name)
+        if parameter is None:
+            return
+        if kwargs:
+            # the arguments in the order of the signature of the setter
+            args = list(inspect.signature(getattr(self.positioner, name)).bind(*args, **kwargs).arguments.values())
+        if parameter == 'output':
+            self.config[('output', args[0])] = (args[1], args[2])
+        else:
+            self.config[(parameter, args[0])] = args[1]
+            if parameter == 'actuator':
+                # selecting an actuator loads its presets
+                self.config.pop(('amplitude', args[0]), None)
+                self.config.pop(('frequency', args[0]), None)
+                self.config[('actuatorName', args[0])] = self.positioner.getActuatorName(args[0])
+
+
+    def reconnect(self):
+        '''
+        Closes the connection, waits for the device with the same serial number, connects it and restores the configuration. Raises TimeoutError if this takes longer than deadline.
+
+        Returns
+            stats	ReconnectStats(attempts, elapsed, written, skipped)
+        '''
+        with self._lock:
+            positioner, clock = self.positioner, self.clock
+            start = clock.time()
+            connections = positioner.ANC.backend.connections
+            try:
+                positioner.disconnect()
+            except ANC350Error:
+                connections.discard(positioner.device.value)
+            attempts = 0
+            while True:
+                attempts += 1
+                if connections:
+                    raise RuntimeError('cannot discover devices while other devices are connected ({} connected)'.format(len(connections)))
+                devNo = self._find()
+                if devNo is not None:
+                    try:
+                        positioner.device = positioner.connect(devNo)
+                        positioner.devNo = devNo
+                        break
+                    except ANC350Error:
+                        pass
+                remaining = start + self.deadline - clock.time()
+                if remaining <= 0:
+                    raise TimeoutError('device {} did not come back within {} s'.format(self.serialNo, self.deadline))
+                clock.sleep(min(self.interval, remaining))
+            written, skipped = self.restore()
+            elapsed = clock.time() - start
+            stats = ReconnectStats(attempts, elapsed, written, skipped)
+            self.history.append(stats)
+            if elapsed > self.deadline:
+                raise TimeoutError('reconnecting device {} took {:.3f} s, more than {} s'.format(self.serialNo, elapsed, self.deadline))
+            return stats
+
+
+    def _find(self):
+        #devNo of the device with our serial number, or None
+        positioner = self.positioner
+        for devNo in range(positioner.discover(self.ifaces)):
+            if positioner.getDeviceInfo(devNo)[2] == self.serialNo:
+                return devNo
+        return None
+
+
+    def restore(self):
+        '''
+        Writes the configuration to the device where it differs from what the device reports.
+
+        Returns
+            written	Number of parameters written
+            skipped	Number of parameters that were already right
+        '''
+        positioner, config = self.positioner, self.config
+        written = skipped = 0
+        for axis in self.axes:
+            actuator = config.get(('actuator', axis))
+            name = config.get(('actuatorName', axis))
+            if actuator is not None and positioner.getActuatorName(axis) != name:
+                positioner.selectActuator(axis, actuator)
+                written += 1
+            elif actuator is not None:
+                skipped += 1
+            for parameter, read, write in (('amplitude', positioner.getAmplitude, positioner.setAmplitude),
+                                           ('frequency', positioner.getFrequency, positioner.setFrequency)):
+                value = config.get((parameter, axis))
+                if value is None:
+                    continue
+                if abs(read(axis) - value) > 1e-9*max(1.0, abs(value)):
+                    write(axis, value)
+                    written += 1
+                else:
+                    skipped += 1
+            for parameter, write in (('targetRange', positioner.setTargetRange), ('dcVoltage', positioner.setDcVoltage)):
+                value = config.get((parameter, axis))
+                if value is not None:
+                    write(axis, value)
+                    written += 1
+            output = config.get(('output', axis))
+            if output is not None:
+                if bool(positioner.getAxisStatus(axis)[1]) != bool(output[0]):
+                    positioner.setAxisOutput(axis, *output)
+                    written += 1
+                else:
+                    skipped += 1
+        return written, skipped
@@ -0,0 +1,202 @@
+#
+#  sampler records the trajectory of a Positioner in the background.
+#
+#  A PositionSampler owns a thread that reads the position of each
+#    configured axis at a fixed rate (and the status every few samples)
+#    and writes the readings into a preallocated NumPy ring buffer. Any
+#    number of consumers can then read the latest values, views of the
+#    recorded samples, or block until new samples arrive, without adding
+#    traffic on the link to the controller:
+#
+#      with PositionSampler(pos, axes=(0, 1), rate=200) as sampler:
+#          seq = sampler.wait()
+#          print(sampler.latest(0))
+#          t, axis, position, status = sampler.snapshot()[['t', 'axis', 'position', 'status']]
+#
+#  Requires NumPy (pip install pyanc350[numpy]).
+#
+
+import threading, time
+import numpy as np
+from pyanc350.clock import SYSTEM_CLOCK, clockOf
+
+#one row per reading: t is in ns of the backend clock (time.monotonic_ns for real devices)
+SAMPLE = np.dtype([('t', np.int64), ('axis', np.uint8), ('position', np.float64), ('status', np.int32)])
+
+
+def packAxisStatus(connected, enabled, moving, target, eotFwd, eotBwd, error):
+    '''
+    Packs the flags returned by the v3/v4 getAxisStatus into one integer: bit0 connected, bit1 enabled, bit2 moving, bit3 target, bit4 eotFwd, bit5 eotBwd, bit6 error.
+    '''
+    return connected | enabled << 1 | moving << 2 | target << 3 | eotFwd << 4 | eotBwd << 5 | error << 6
+
+
+class PositionSampler:
+
+    def __init__(self, positioner, axes=(0, 1, 2), rate=100.0, statusEvery=10, capacity=2**16, lock=None):
+        '''
+        Parameters
+            positioner	v2, v3 or v4 Positioner
+            axes	Axes to sample
+            rate	Samples per second and axis
+            statusEvery	Read the status every this many samples (the last status is repeated in between); 0 never reads it
+            capacity	Number of rows in the ring buffer
+            lock	Optional lock held around each set of reads, for sharing the positioner with other threads
+        '''
+        self.positioner = positioner
+        self.axes = tuple(axes)
+        self.period = 1/rate
+        self.statusEvery = statusEvery
+        self.buffer = np.zeros(capacity, SAMPLE)
+        self.count = 0 #rows written since start; row n is buffer[n % capacity]
+        self.overruns = 0 #samples skipped because the reads took longer than the period
+        self.error = None
+        self.clock = clockOf(positioner)
+        self._lock = lock
+        self._latest = {}
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        if hasattr(positioner, 'getAxisStatus'):
+            self._readStatus = lambda axis: packAxisStatus(*positioner.getAxisStatus(axis))
+        else:
+            self._readStatus = positioner.getStatus
+
+
+    def start(self):
+        '''
+        Starts the sampler thread.
+        '''
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError('sampler is already running')
+        self._stop.clear()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name='PositionSampler', daemon=True)
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        '''
+        Stops the sampler thread and waits for it to finish. The recorded samples stay available.
+        '''
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        with self._cond:
+            self._cond.notify_all()
+
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+
+    def latest(self, axis):
+        '''
+        Returns the most recent (t, position, status) of an axis, or None if it has not been sampled yet.
+        '''
+        return self._latest.get(axis)
+
+
+    def wait(self, after=None, timeout=None):
+        '''
+        Blocks until rows beyond sequence number after (default: the current count) have been written.
+
+        Parameters
+            after	Sequence number, eg. the value returned by the previous call
+            timeout	Maximum time to wait [s], None to wait indefinitely
+        Returns
+            count	Sequence number of the next row to be written, to be passed to read() or wait()
+        '''
+        with self._cond:
+            if after is None:
+                after = self.count
+            if not self._cond.wait_for(lambda: self.count > after or not self.running, timeout):
+                raise TimeoutError('no samples within {} s'.format(timeout))
+            if self.count <= after:
+                raise RuntimeError('sampler is not running') from self.error
+            return self.count
+
+
+    def read(self, since=0):
+        '''
+        Returns views of the rows written from sequence number since onwards, without copying. The views refer to the ring buffer, so rows are overwritten once capacity newer rows have been written; copy them if they are kept.
+
+        Parameters
+            since	Sequence number of the first row wanted; older rows that have been overwritten are skipped
+        Returns
+            views	List of zero, one or two arrays (two if the rows wrap around the end of the buffer), oldest first
+            count	Sequence number following the last row returned
+        '''
+        capacity = len(self.buffer)
+        count = self.count
+        since = max(since, count - capacity, 0)
+        start, stop = since % capacity, count % capacity
+        if since == count:
+            return [], count
+        if start < stop:
+            return [self.buffer[start:stop]], count
+        return [view for view in (self.buffer[start:], self.buffer[:stop]) if len(view)], count
+
+
+    def snapshot(self, since=0):
+        '''
+        Returns a copy of the rows written from sequence number since onwards, oldest first.
+        '''
+        views, count = self.read(since)
+        return np.concatenate(views) if views else np.empty(0, SAMPLE)
+
+
+    def _run(self):
+        clock, period = self.clock, self.period
+        if clock is SYSTEM_CLOCK:
+            now_ns = time.monotonic_ns
+        else:
+            now_ns = lambda: int(clock.time()*1e9)
+        getPosition = self.positioner.getPosition
+        buffer, capacity = self.buffer, len(self.buffer)
+        status = dict.fromkeys(self.axes, -1)
+        samples = 0
+        deadline = clock.time()
+        try:
+            while not self._stop.is_set():
+                readStatus = self.statusEvery and samples % self.statusEvery == 0
+                rows = []
+                if self._lock is not None:
+                    self._lock.acquire()
+                try:
+                    for axis in self.axes:
+                        if readStatus:
+                            status[axis] = self._readStatus(axis)
+                        rows.append((now_ns(), axis, getPosition(axis), status[axis]))
+                finally:
+                    if self._lock is not None:
+                        self._lock.release()
+                with self._cond:
+                    for row in rows:
+                        buffer[self.count % capacity] = row
+                        self.count += 1
+                        self._latest[row[1]] = (row[0], row[2], row[3])
+                    self._cond.notify_all()
+                samples += 1
+                deadline += period
+                now = clock.time()
+                if now > deadline:
+                    missed = int((now - deadline)/period) + 1
+                    self.overruns += missed
+                    samples += missed
+                    deadline += missed*period
+                clock.sleep(deadline - now)
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._cond:
+                self._cond.notify_all()
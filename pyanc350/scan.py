@@ -0,0 +1,132 @@
+#
+#  scan runs point-by-point scans over 1D, 2D or 3D grids.
+#
+#  The grid is given as one coordinate array per axis. The visiting
+#    order is computed up front with NumPy, by default as a serpentine
+#    (boustrophedon) path in which consecutive points differ in one axis
+#    by one step, so there is no flyback. At each point the axes that are
+#    not yet within their target range are moved (see Positioner.moveTo)
+#    and a user function is called; its results are stored in an array
+#    shaped like the grid:
+#
+#      scan = RasterScan(pos, axes=(0, 1), coords=(xs, ys), acquire=lambda index, point: detector.read())
+#      image = scan.run()
+#
+#  Requires NumPy (pip install pyanc350[numpy]).
+#
+
+import numpy as np
+from pyanc350.clock import clockOf
+
+
+def serpentine(shape):
+    '''
+    Returns the grid indices of an array of the given shape in serpentine order, as an array of shape (number of points, dimensions). The last axis varies fastest; each axis reverses direction whenever a slower axis advances.
+    '''
+    shape = tuple(shape)
+    seq = np.arange(int(np.prod(shape)))
+    indices = np.empty((len(seq), len(shape)), dtype=np.intp)
+    for k, n in enumerate(shape):
+        inner = int(np.prod(shape[k+1:]))
+        outer = int(np.prod(shape[k:]))
+        index = (seq//inner) % n
+        reverse = (seq//outer) % 2 == 1
+        indices[:, k] = np.where(reverse, n - 1 - index, index)
+    return indices
+
+
+def raster(shape):
+    '''
+    Returns the grid indices of an array of the given shape in raster (C) order, as an array of shape (number of points, dimensions).
+    '''
+    return np.indices(shape).reshape(len(shape), -1).T
+
+
+ORDERS = {'serpentine': serpentine, 'raster': raster}
+
+
+class RasterScan:
+
+    def __init__(self, positioner, axes, coords, acquire, targetRange=None, timeout=None, order='serpentine', out=None):
+        '''
+        Parameters
+            positioner	v2, v3 or v4 Positioner (or a DeviceWorker for one)
+            axes	Axis numbers, one per grid dimension (1 ... 3), slowest first
+            coords	Coordinates of the grid along each axis, in the position units of the library
+            acquire	Function called at each point as acquire(index, point) with the grid index and the target coordinates; its return value is stored in the results
+            targetRange	Target range, for all axes or one per axis. An axis already within it of its next coordinate is not moved. None uses the current target range of the device (v3/v4) or accepts wherever the approach stops (v2).
+            timeout	Maximum time [s] for each move
+            order	'serpentine' or 'raster', or a function returning the indices in order (see serpentine)
+            out	Array for the results, shaped like the grid (plus the shape of each result); by default allocated for the first result
+        '''
+        if not 1 <= len(axes) <= 3 or len(axes) != len(coords):
+            raise ValueError('need one coordinate array for each of 1 ... 3 axes')
+        self.positioner = positioner
+        self.axes = tuple(axes)
+        self.coords = [np.asarray(c) for c in coords]
+        self.shape = tuple(len(c) for c in self.coords)
+        self.acquire = acquire
+        if targetRange is None or np.ndim(targetRange) == 0:
+            targetRange = [targetRange]*len(axes)
+        self.targetRange = list(targetRange)
+        self.timeout = timeout
+        self.order = ORDERS[order] if isinstance(order, str) else order
+        self.results = out
+        self.moves = 0
+        self.skipped = 0 #moves left out because the axis was within its target range
+        self.missed = [] #grid indices of points where an axis did not arrive
+        self.elapsed = 0.0
+
+
+    def points(self):
+        '''
+        Returns the grid indices and target coordinates in the order they are visited, as two arrays of shape (number of points, dimensions).
+        '''
+        indices = self.order(self.shape)
+        targets = np.stack([c[indices[:, k]] for k, c in enumerate(self.coords)], axis=1)
+        return indices, targets
+
+
+    def run(self):
+        '''
+        Runs the scan and returns the results array.
+        '''
+        positioner = self.positioner
+        clock = clockOf(positioner)
+        indices, targets = self.points()
+        v2 = hasattr(positioner, 'updateAbsolute')
+        moveRange = self.targetRange if v2 else [None]*len(self.axes)
+        if v2:
+            # the v2 library takes positions as integers (nm)
+            targets = np.rint(targets).astype(np.int64)
+        if not v2:
+            # set once, rather than on every move
+            for axis, targetRange in zip(self.axes, self.targetRange):
+                if targetRange is not None:
+                    positioner.setTargetRange(axis, targetRange)
+        positions = [positioner.getPosition(axis) for axis in self.axes]
+        last = [None]*len(self.axes) #coordinate each axis was last moved to
+        start = clock.time()
+        for index, target in zip(map(tuple, indices), targets.tolist()):
+            arrived = True
+            for k, axis in enumerate(self.axes):
+                if target[k] == last[k]:
+                    continue
+                last[k] = target[k]
+                targetRange = self.targetRange[k]
+                if targetRange is not None and abs(positions[k] - target[k]) <= targetRange:
+                    self.skipped += 1
+                    continue
+                stats = positioner.moveTo(axis, target[k], moveRange[k], self.timeout)
+                positions[k] = stats.position
+                arrived = arrived and stats.arrived
+                self.moves += 1
+            if not arrived:
+                self.missed.append(index)
+            value = self.acquire(index, target)
+            if self.results is None:
+                value = np.asarray(value)
+                self.results = np.zeros(self.shape + value.shape, value.dtype)
+            self.results[index] = value
+        self.elapsed = clock.time() - start
+        return self.results
@@ -0,0 +1,466 @@
+#
+#  server shares one ANC350 between several processes over TCP or a Unix
+#    socket. The library locks a controller to the process that connected
+#    it (DeviceLocked), so a Server owns the Positioner, runs its calls on
+#    a DeviceWorker and serves any number of clients:
+#
+#      python -m pyanc350.server 127.0.0.1:7350 --library v4
+#
+#      pos = RemotePositioner(('127.0.0.1', 7350))
+#      pos.setFrequency(0, 200)                    # same methods as the Positioner
+#      pos.moveTo(0, 1e-3)
+#
+#  The protocol is a stream of frames (pyanc350.wire.frame): after a hello
+#    frame from the server ({'library', 'methods'}) the client sends
+#    requests [id, [[method, args, kwargs], ...]] and the server answers
+#    each with [id, [[ok, result or error], ...]]. A request can hold a
+#    batch of calls, which costs one round trip, and the client does not
+#    have to wait for an answer before sending the next request
+#    (pipelining):
+#
+#      positions = [pos.submit('getPosition', axis) for axis in range(3)]
+#      with pos.batch() as batch:
+#          status = batch.getAxisStatus(0)
+#          position = batch.getPosition(0)
+#      print(position.result())
+#
+#  The requests of one connection run in the order they were sent; a
+#    request holding only stops (see worker.defaultPriority) runs right
+#    away, so a stop is not stuck behind a moveTo of the same client.
+#
+
+import itertools, os, socket, socketserver, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pyanc350 import errors, wire
+from pyanc350.motion import MoveStats
+from pyanc350.worker import COMPOSITE, STOP, DeviceWorker, defaultPriority
+
+#Positioner methods not served: connecting and disconnecting is up to the server
+LIFECYCLE = frozenset(['connect', 'disconnect', 'discover', 'close', 'check', 'load', 'refresh'])
+
+#named tuples rebuilt by the client
+RESULT_TYPES = {'MoveStats': MoveStats}
+
+#exceptions re-raised by the client with their own type; others become RemoteError
+BUILTIN_ERRORS = {e.__name__: e for e in (ValueError, TypeError, KeyError, IndexError, RuntimeError, TimeoutError, AttributeError, ZeroDivisionError)}
+
+
+class RemoteError(Exception):
+    '''
+    Error raised on the server of a type the client does not know. type is the name of its class.
+    '''
+
+    def __init__(self, message, type_=None):
+        super().__init__(message)
+        self.type = type_
+
+
+def _pack(value):
+    #named tuples are sent as {'$type': name, 'values': [...]}
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return {'$type': type(value).__name__, 'values': [_pack(item) for item in value]}
+    if isinstance(value, (list, tuple)):
+        return [_pack(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _pack(item) for key, item in value.items()}
+    return value
+
+
+def _unpack(value):
+    if isinstance(value, list):
+        return [_unpack(item) for item in value]
+    if isinstance(value, dict):
+        if '$type' in value:
+            values = [_unpack(item) for item in value['values']]
+            cls = RESULT_TYPES.get(value['$type'])
+            return cls(*values) if cls is not None else tuple(values)
+        return {key: _unpack(item) for key, item in value.items()}
+    return value
+
+
+def _error(e):
+    #error as sent to the client: [type, message, code, func]
+    return [type(e).__name__, str(e), getattr(e, 'code', None), getattr(e, 'func', None)]
+
+
+def _raise(error):
+    name, message, code, func = error
+    cls = getattr(errors, name, None)
+    if isinstance(cls, type) and issubclass(cls, errors.ANC350Error):
+        return cls(message, code, func)
+    if name in BUILTIN_ERRORS:
+        return BUILTIN_ERRORS[name](message)
+    return RemoteError(message, name)
+
+
+def methodsOf(positioner):
+    '''
+    Returns the names of the Positioner methods a Server serves.
+    '''
+    return sorted(name for name in dir(type(positioner))
+                  if not name.startswith('_') and name not in LIFECYCLE and callable(getattr(type(positioner), name)))
+
+
+def libraryOf(positioner):
+    '''
+    Returns the library version of a Positioner: 'v2', 'v3' or 'v4'.
+    '''
+    if hasattr(positioner, 'updateAbsolute'):
+        return 'v2'
+    # the v3 Positioner shares the methods of v4 but binds anc350v3
+    return 'v3' if positioner.ANC.backend.name == 'anc350v3' else 'v4'
+
+
+def _parse(address):
+    #'host:port' -> (host, port); anything else is the path of a Unix socket
+    if isinstance(address, str) and ':' in address and not address.startswith(('/', '.')):
+        host, port = address.rsplit(':', 1)
+        return (host, int(port))
+    return address
+
+
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        server = self.server.owner
+        connection = self.request
+        if connection.family != getattr(socket, 'AF_UNIX', None):
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        lock = threading.Lock()
+        def send(message):
+            data = wire.frame(message)
+            with lock:
+                connection.sendall(data)
+        send({'library': server.library, 'methods': server.methods})
+        ordered = ThreadPoolExecutor(1, thread_name_prefix='anc350-connection')
+        stream = connection.makefile('rb')
+        try:
+            while True:
+                try:
+                    request = wire.readFrame(stream)
+                except (OSError, ValueError, IndexError):
+                    break
+                if request is None:
+                    break
+                id_, calls = request
+                if calls and all(server.priority(name, args, kwargs) == STOP for name, args, kwargs in calls):
+                    server._respond(send, id_, calls)
+                else:
+                    ordered.submit(server._respond, send, id_, calls)
+        finally:
+            ordered.shutdown(wait=True)
+            stream.close()
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+class Server:
+
+    def __init__(self, positioner, address=('127.0.0.1', 7350), worker=None):
+        '''
+        Parameters
+            positioner	Connected Positioner (v2, v3 or v4); once served it must only be used through the server
+            address	(host, port) or 'host:port' for TCP, or the path of a Unix socket. Port 0 picks a free port, see address
+            worker	DeviceWorker of the positioner, if it is also used by this process; by default the server creates one
+        '''
+        self.positioner = positioner
+        self.worker = worker if worker is not None else DeviceWorker(positioner)
+        self._ownsWorker = worker is None
+        self.library = libraryOf(positioner)
+        self.methods = methodsOf(positioner)
+        self._allowed = frozenset(self.methods)
+        self.requests = 0 #requests answered
+        self.calls = 0 #calls in them
+        self._lock = threading.Lock()
+        address = _parse(address)
+        if isinstance(address, tuple):
+            self._server = _TCPServer(address, _Handler)
+        else:
+            if os.path.exists(address):
+                os.unlink(address)
+            self._server = _UnixServer(address, _Handler)
+        self._server.owner = self
+        self.address = self._server.server_address
+        self._thread = None
+        self._serving = False
+
+
+    def start(self):
+        '''
+        Serves clients on a background thread.
+        '''
+        self._serving = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='anc350-server', daemon=True)
+        self._thread.start()
+        return self
+
+
+    def serveForever(self):
+        '''
+        Serves clients on the calling thread until close is called (eg. from a signal handler).
+        '''
+        self._serving = True
+        self._server.serve_forever()
+
+
+    def close(self):
+        '''
+        Stops serving and closes the worker, if the server created it. The Positioner stays connected.
+        '''
+        if self._serving:
+            self._server.shutdown()
+            self._serving = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        if self._ownsWorker:
+            self.worker.close()
+
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def priority(self, name, args, kwargs=None):
+        return defaultPriority(name, args, kwargs, getattr(self.positioner, name, None) if name in self._allowed else None)
+
+
+    def _respond(self, send, id_, calls):
+        with self._lock:
+            self.requests += 1
+            self.calls += len(calls)
+        results = []
+        pending = [] #consecutive plain calls, run as one job of the worker
+        for name, args, kwargs in calls:
+            if name not in self._allowed:
+                self._flush(pending, results)
+                results.append([False, ['AttributeError', 'the server does not offer {!r}'.format(name), None, None]])
+            elif name in COMPOSITE:
+                self._flush(pending, results)
+                results.append(self._run(lambda: getattr(self.worker, name)(*args, **kwargs)))
+            else:
+                pending.append((name, args, kwargs))
+        self._flush(pending, results)
+        try:
+            send([id_, results])
+        except TypeError as e:
+            send([id_, [[False, _error(e)]]*len(calls)])
+        except OSError:
+            pass
+
+
+    def _flush(self, pending, results):
+        if len(pending) == 1:
+            name, args, kwargs = pending[0]
+            results.append(self._run(lambda: self.worker.submit(name, *args, **kwargs).result()))
+        elif pending:
+            calls = list(pending)
+            def job():
+                return [self._run(lambda: getattr(self.positioner, name)(*args, **kwargs)) for name, args, kwargs in calls]
+            priority = min(self.priority(name, args, kwargs) for name, args, kwargs in calls)
+            results.extend(self.worker.submit(job, priority=priority).result())
+        del pending[:]
+
+
+    def _run(self, call):
+        try:
+            return [True, _pack(call())]
+        except Exception as e:
+            return [False, _error(e)]
+
+
+class _Batch:
+
+    def __init__(self, client):
+        self._client = client
+        self._calls = []
+        self._futures = []
+
+    def submit(self, method, *args, **kwargs):
+        future = Future()
+        self._calls.append([method, list(args), kwargs])
+        self._futures.append(future)
+        return future
+
+    def __getattr__(self, name):
+        self._client._check(name)
+        return lambda *args, **kwargs: self.submit(name, *args, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc, *rest):
+        if exc is None and self._calls:
+            self._client._send(self._calls, self._futures)
+
+
+class RemotePositioner:
+
+    def __init__(self, address=('127.0.0.1', 7350), timeout=None):
+        '''
+        Connects to a Server.
+
+        Parameters
+            address	(host, port) or 'host:port' for TCP, or the path of a Unix socket
+            timeout	Time [s] to wait for each answer; default: no limit
+        '''
+        address = _parse(address)
+        if isinstance(address, tuple):
+            self._socket = socket.create_connection(address)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(address)
+        self.timeout = timeout
+        self._stream = self._socket.makefile('rb')
+        hello = wire.readFrame(self._stream)
+        if hello is None:
+            raise ConnectionError('server closed the connection')
+        self.library = hello['library']
+        self.methods = frozenset(hello['methods'])
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read, name='anc350-client', daemon=True)
+        self._reader.start()
+
+
+    def submit(self, method, *args, **kwargs):
+        '''
+        Sends a call without waiting for its answer and returns a concurrent.futures.Future for its result.
+        '''
+        self._check(method)
+        future = Future()
+        self._send([[method, list(args), kwargs]], [future])
+        return future
+
+
+    def call(self, method, *args, **kwargs):
+        '''
+        Calls a method of the Positioner on the server and returns its result.
+        '''
+        return self.submit(method, *args, **kwargs).result(self.timeout)
+
+
+    def batch(self):
+        '''
+        Returns a context collecting calls, which are sent in one request when the context is left. Its methods return futures, eg.
+            with pos.batch() as batch:
+                position = batch.getPosition(0)
+            print(position.result())
+        '''
+        return _Batch(self)
+
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self.__dict__.get('methods', ()):
+            raise AttributeError('{!r} is not offered by the server'.format(name))
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+
+    def close(self):
+        '''
+        Closes the connection; calls still waiting for an answer fail with ConnectionError.
+        '''
+        with self._lock:
+            self._closed = True
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._reader.join()
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def _check(self, name):
+        if name not in self.methods:
+            raise AttributeError('{!r} is not offered by the server'.format(name))
+
+
+    def _send(self, calls, futures):
+        with self._lock:
+            if self._closed:
+                raise ConnectionError('connection is closed')
+            id_ = next(self._ids)
+            self._pending[id_] = futures
+            self._socket.sendall(wire.frame([id_, calls]))
+
+
+    def _read(self):
+        try:
+            while True:
+                response = wire.readFrame(self._stream)
+                if response is None:
+                    break
+                id_, results = response
+                with self._lock:
+                    futures = self._pending.pop(id_)
+                for future, (ok, value) in zip(futures, results):
+                    if ok:
+                        future.set_result(_unpack(value))
+                    else:
+                        future.set_exception(_raise(value))
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self._lock:
+                self._closed = True
+                pending, self._pending = self._pending, {}
+            for futures in pending.values():
+                for future in futures:
+                    future.set_exception(ConnectionError('connection to the server was lost'))
+
+
+def main(argv=None):
+    import argparse #only needed on the command line
+    parser = argparse.ArgumentParser(prog='python -m pyanc350.server', description='Serves an ANC350 to other processes.')
+    parser.add_argument('address', help='host:port to listen on TCP, or the path of a Unix socket')
+    parser.add_argument('--library', choices=('v2', 'v3', 'v4'), default='v4', help='library version')
+    parser.add_argument('--simulate', action='store_true', help='serve a simulated controller')
+    args = parser.parse_args(argv)
+    library = None
+    if args.simulate:
+        from pyanc350.simulator import SimulatedANC350
+        library = SimulatedANC350()
+    if args.library == 'v2':
+        import pyanc350.v2
+        positioner = pyanc350.v2.Positioner(library=library)
+    elif args.library == 'v3':
+        import pyanc350.v3
+        positioner = pyanc350.v3.Positioner(library=library)
+    else:
+        import pyanc350.v4
+        positioner = pyanc350.v4.Positioner(library=library)
+    server = Server(positioner, args.address)
+    print('serving on', server.address)
+    try:
+        server.serveForever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
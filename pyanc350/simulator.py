@@ -0,0 +1,949 @@
+#
+#  simulator is a pure-Python stand-in for the attocube ANC350 libraries.
+#
+#  SimulatedANC350 exposes the entry points of anc350v2.dll
+#    (_Positioner*@N) as well as those of anc350v3.dll/anc350v4.dll (ANC_*)
+#    and answers with the same return codes, so it can be loaded in place
+#    of any of them:
+#      from pyanc350.simulator import SimulatedANC350
+#      from pyanc350.clock import VirtualClock
+#      sim = SimulatedANC350(devices=2, clock=VirtualClock(rate=100))
+#      pos = pyanc350.v4.Positioner(library=sim)
+#
+#  Behind the entry points sits a simple model of stick-slip positioners:
+#    the step size grows with amplitude above a threshold voltage and falls
+#    off at high frequencies, steps backwards are a little shorter than
+#    forwards, the travel is limited (setting the end-of-travel flags), and
+#    automatic moves stop once they are within the target range. Motion
+#    is integrated lazily whenever an axis is accessed, so the simulation
+#    costs nothing while idle and runs at the speed of its clock.
+#
+#  Range triggers (configureRngTrigger in v3/v4, trigger/triggerAxis with
+#    triggerModeOut(1) in v2) are modelled as well: every change of a
+#    trigger output is logged with the time the axis crossed the window
+#    edge, in SimDevice.triggerLog.
+#
+#  Devices can be unplugged and plugged back in (SimulatedANC350.unplug),
+#    invalidating their handles and optionally resetting their settings
+#    as a power cycle would.
+#
+#  Positions are in m (or ° for goniometers and rotators), as in the v3/v4
+#    libraries; the v2 entry points convert to the units of that library
+#    (nm, mV, Hz).
+#
+
+import ctypes, random, threading
+import pyanc350.v2.ANC350lib as NCB
+import pyanc350.v4.ANC350libv4 as ANC
+from pyanc350.clock import SystemClock
+
+#actuator presets of the v4 library: (name, type {0: linear, 1: goniometer, 2: rotator})
+ACTUATORS = [
+    ('ANPg101res', 1),
+    ('ANGt101res', 1),
+    ('ANPx51res', 0),
+    ('ANPx101res', 0),
+    ('ANPx121res', 0),
+    ('ANPx122res', 0),
+    ('ANPz51res', 0),
+    ('ANPz101res', 0),
+    ('ANR50res', 2),
+    ('ANR51res', 2),
+    ('ANR101res', 2),
+    ('Test', 0),
+    ]
+
+#return codes of each library family for the faults raised by the model
+_CODES = {
+    'ANC': {'error': ANC.ANC_Error, 'timeout': ANC.ANC_Timeout, 'handle': ANC.ANC_NotConnected,
+            'locked': ANC.ANC_DeviceLocked, 'device': ANC.ANC_NoDevice, 'axis': ANC.ANC_NoAxis,
+            'range': ANC.ANC_OutOfRange, 'unavailable': ANC.ANC_NotAvailable},
+    'NCB': {'error': NCB.NCB_Error, 'timeout': NCB.NCB_Timeout, 'handle': NCB.NCB_NotConnected,
+            'locked': NCB.NCB_DeviceLocked, 'device': NCB.NCB_InvalidParam, 'axis': NCB.NCB_InvalidParam,
+            'range': NCB.NCB_NotSpecifiedParam, 'unavailable': NCB.NCB_FileNotFound},
+    }
+
+IDLE, CONTINUOUS, AUTO, BURST = range(4)
+
+
+class _Fault(Exception):
+    def __init__(self, kind):
+        self.kind = kind
+
+
+def _value(arg):
+    #plain value of a Python number, ctypes instance or byref() of one
+    arg = getattr(arg, '_obj', arg)
+    return getattr(arg, 'value', arg)
+
+
+def _out(ref, value):
+    #writes an output parameter passed as byref(), a pointer, a ctypes instance or a string buffer
+    if ref is None:
+        return
+    obj = getattr(ref, '_obj', ref)
+    if isinstance(obj, ctypes._Pointer):
+        obj = obj.contents
+    obj.value = value
+
+
+class SimAxis:
+    '''
+    Model of one stick-slip positioner and its sensor.
+
+    Parameters
+        position	Initial position [m] or [°]
+        travel	(lower, upper) limits of travel
+        sensor	If a position sensor is connected; without one the reported position is 0 and automatic moves do nothing
+        stepPerVolt	Step size per volt of amplitude above threshold, at low frequency
+        threshold	Amplitude [V] below which the positioner does not move
+        corner	Frequency [Hz] at which the step size has fallen to half
+        asymmetry	Fraction by which backward steps are shorter than forward steps
+        capacitance	Piezo capacitance [F] returned by capacitance measurements
+        capDelay	Duration [s] of a capacitance measurement
+        noise	Standard deviation of the sensor noise
+        actuator	Initially selected actuator preset
+    '''
+
+    def __init__(self, position=5e-3, travel=(0.0, 10e-3), sensor=True, stepPerVolt=1.5e-9, threshold=5.0,
+                 corner=2000.0, asymmetry=0.1, capacitance=1e-6, capDelay=2.0, noise=0.0, actuator=3, seed=None):
+        self.position = position
+        self.travel = travel
+        self.sensor = sensor
+        self.stepPerVolt = stepPerVolt
+        self.threshold = threshold
+        self.corner = corner
+        self.asymmetry = asymmetry
+        self.capacitance = capacitance
+        self.capDelay = capDelay
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.clock = SystemClock()
+        self.actuator = actuator
+        self.amplitude = 30.0
+        self.frequency = 1000.0
+        self.dcVoltage = 0.0
+        self.enabled = True
+        self.autoDisable = False
+        self.mode = IDLE
+        self.backward = False
+        self.target = position
+        self.targetRange = 1e-7
+        self.burstEnd = position
+        self.eotFwd = False
+        self.eotBwd = False
+        self.stepCount = 1
+        self.origin = 0.0
+        self.updated = None
+        self.settings = {}
+        self.watchers = [] #SimTriggers following the position of this axis
+
+
+    def step(self, backward=False):
+        '''
+        Size of a single step at the current amplitude and frequency.
+        '''
+        size = self.stepPerVolt*max(0.0, self.amplitude - self.threshold)/(1 + (self.frequency/self.corner)**2)
+        return size*(1 - self.asymmetry) if backward else size
+
+
+    def velocity(self, backward=False):
+        return self.step(backward)*self.frequency
+
+
+    @property
+    def moving(self):
+        self.advance()
+        if not self.enabled:
+            return False
+        if self.mode == AUTO:
+            return self.sensor and not self.onTarget and not self._blocked(self.target < self.position)
+        return self.mode in (CONTINUOUS, BURST)
+
+
+    @property
+    def onTarget(self):
+        return self.mode == AUTO and self.sensor and abs(self.target - self.position) <= self.targetRange
+
+
+    def read(self):
+        '''
+        Position as reported by the sensor.
+        '''
+        self.advance()
+        if not self.sensor:
+            return 0.0
+        if self.noise:
+            return self.position + self.random.gauss(0.0, self.noise)
+        return self.position
+
+
+    def advance(self, now=None):
+        '''
+        Integrates the motion up to now (default: the current time of the clock).
+        '''
+        if now is None:
+            now = self.clock.time()
+        if self.updated is None:
+            self.updated = now
+        dt = now - self.updated
+        self.updated = now
+        if dt <= 0 or not self.enabled or self.mode == IDLE:
+            return
+        start = self.position
+        if self.mode == CONTINUOUS:
+            self._travel(self.backward, self.velocity(self.backward)*dt)
+        elif self.mode == BURST:
+            backward = self.burstEnd < self.position
+            distance = self.velocity(backward)*dt
+            if distance >= abs(self.burstEnd - self.position):
+                distance = abs(self.burstEnd - self.position)
+                self.mode = IDLE
+            self._travel(backward, distance)
+        elif self.mode == AUTO and self.sensor and not self.onTarget:
+            backward = self.target < self.position
+            # the controller stops once inside the target range; model it stopping halfway in
+            remaining = abs(self.target - self.position) - self.targetRange/2
+            self._travel(backward, min(remaining, self.velocity(backward)*dt))
+        if self.watchers and self.position != start:
+            # the motion ran at constant velocity from the start of the interval
+            then = now - dt
+            self._notify(start, then, then + abs(self.position - start)/self.velocity(self.position < start))
+
+
+    def _notify(self, start, then, now):
+        for trigger in self.watchers:
+            trigger.update(start, self.position, then, now)
+
+
+    def _blocked(self, backward):
+        return self.eotBwd if backward else self.eotFwd
+
+
+    def _travel(self, backward, distance):
+        if backward:
+            self.eotFwd = False
+            position = self.position - distance
+            if position <= self.travel[0]:
+                position = self.travel[0]
+                self._endOfTravel(True)
+        else:
+            self.eotBwd = False
+            position = self.position + distance
+            if position >= self.travel[1]:
+                position = self.travel[1]
+                self._endOfTravel(False)
+        self.position = position
+
+
+    def _endOfTravel(self, backward):
+        if backward:
+            self.eotBwd = True
+        else:
+            self.eotFwd = True
+        if self.mode != AUTO:
+            self.mode = IDLE
+        if self.autoDisable:
+            self.enabled = False
+
+
+    def singleStep(self, backward):
+        self.advance()
+        self.mode = IDLE
+        if self.enabled and not self._blocked(backward):
+            start = self.position
+            self._travel(backward, self.step(backward))
+            if self.watchers:
+                self._notify(start, self.updated, self.updated)
+
+
+    def startBurst(self, backward, steps):
+        self.advance()
+        self.burstEnd = self.position + (-1 if backward else 1)*steps*self.step(backward)
+        self.mode = BURST
+
+
+    def startContinuous(self, backward):
+        self.advance()
+        self.backward = backward
+        self.mode = CONTINUOUS
+
+
+    def startAuto(self, target, relative=False):
+        self.advance()
+        self.target = self.position + target if relative else target
+        self.mode = AUTO
+
+
+    def stop(self):
+        self.advance()
+        self.mode = IDLE
+
+
+    def reset(self):
+        '''
+        Stops the axis and returns its settings to their power-up defaults; the actuator and the position are kept.
+        '''
+        self.advance()
+        self.mode = IDLE
+        self.amplitude = 30.0
+        self.frequency = 1000.0
+        self.dcVoltage = 0.0
+        self.enabled = True
+        self.autoDisable = False
+        self.targetRange = 1e-7
+        self.stepCount = 1
+        self.settings = {}
+
+
+    def selectActuator(self, actuator):
+        self.advance()
+        self.actuator = actuator
+        self.amplitude = 30.0
+        self.frequency = 1000.0
+
+
+class SimTrigger:
+    '''
+    Model of a position range trigger output.
+
+    The trigger becomes active when the position of its axis enters [lower, upper] (never if lower > upper) and inactive when it leaves [lower - epsilon, upper + epsilon]. The output level is 1 while active with polarity 1 (high active), or while inactive with polarity 0. Each change of level is appended to log as (time, output, level).
+    '''
+
+    def __init__(self, output, log):
+        self.output = output
+        self.log = log
+        self.axis = None
+        self.lower = self.upper = 0.0
+        self.epsilon = 0.0
+        self.polarity = 1
+        self.enabled = True
+        self.active = False
+
+
+    @property
+    def level(self):
+        return int(self.enabled and self.active == bool(self.polarity))
+
+
+    def configure(self, axis=None, **settings):
+        '''
+        Changes the axis or any of lower, upper, epsilon, polarity and enabled. The state follows the current position immediately.
+        '''
+        if self.axis is not None:
+            self.axis.advance() #crossings up to now happened with the old settings
+        if axis is not None and axis is not self.axis:
+            if self.axis is not None:
+                self.axis.watchers.remove(self)
+            axis.advance()
+            axis.watchers.append(self)
+            self.axis = axis
+        level = self.level
+        for name, value in settings.items():
+            setattr(self, name, value)
+        if self.axis is not None:
+            self.active = self.lower <= self.axis.position <= self.upper
+            if self.level != level:
+                self.log.append((self.axis.clock.time(), self.output, self.level))
+
+
+    def update(self, start, end, then, now):
+        '''
+        Follows a motion from start (at time then) to end (at time now) at constant velocity, logging the crossings.
+        '''
+        lower, upper, epsilon = self.lower, self.upper, self.epsilon
+        if lower > upper:
+            return #an empty window never triggers
+        position = start
+        while True:
+            if end > position:
+                if not self.active and position < lower <= end:
+                    crossing = lower
+                elif self.active and position <= upper + epsilon < end:
+                    crossing = upper + epsilon
+                else:
+                    return
+            elif end < position:
+                if not self.active and position > upper >= end:
+                    crossing = upper
+                elif self.active and position >= lower - epsilon > end:
+                    crossing = lower - epsilon
+                else:
+                    return
+            else:
+                return
+            level = self.level
+            self.active = not self.active
+            if self.level != level:
+                self.log.append((then + (now - then)*(crossing - start)/(end - start), self.output, self.level))
+            position = crossing
+
+
+class SimDevice:
+    '''
+    Model of one ANC350 controller.
+
+    Parameters
+        serialNo	Serial number reported by getDeviceInfo
+        hwid	Programmed hardware ID
+        address	'USB' or an IP address in dotted-decimal notation
+        axes	Number of axes, or a list of SimAxis
+        devType	{0: Anc350Res, 1:Anc350Num, 2:Anc350Fps, 3:Anc350None}
+        firmware	Firmware version number
+        features	Feature bitmask returned by getDeviceConfig
+        connectTime	Duration [s] of connecting to the device
+        axis options	Further keyword arguments are passed to each SimAxis
+    '''
+
+    def __init__(self, serialNo='L010000', hwid=0, address='USB', axes=3, devType=0, firmware=0x10000, features=0x0f, connectTime=0.0, **axisOptions):
+        if isinstance(axes, int):
+            axes = [SimAxis(**axisOptions) for i in range(axes)]
+        self.axes = axes
+        self.serialNo = serialNo
+        self.hwid = hwid
+        self.address = address
+        self.devType = devType
+        self.firmware = firmware
+        self.features = features
+        self.connectTime = connectTime
+        self.connected = False
+        self.present = True #False while unplugged
+        self.returns = None #time at which an unplugged device comes back by itself
+        self.flashWrites = 0
+        self.settings = {}
+        self.triggers = {} #SimTrigger by output number (v3/v4: axis, v2: trigger number)
+        self.triggerLog = [] #(time, output, level) of every change of a trigger output
+
+
+    def trigger(self, output):
+        '''
+        Returns the SimTrigger of an output, created on first use.
+        '''
+        if output not in self.triggers:
+            self.triggers[output] = SimTrigger(output, self.triggerLog)
+        return self.triggers[output]
+
+
+    @property
+    def interface(self):
+        return 1 if self.address == 'USB' else 2
+
+
+class SimulatedANC350:
+    '''
+    Stand-in for the ANC350 libraries; pass it to Positioner(library=...) or ANCxxx.load().
+
+    Parameters
+        devices	Number of devices, or a list of SimDevice
+        clock	Time base, eg. pyanc350.clock.VirtualClock(rate=100); real time by default
+        latency	Duration [s] of every library call, modelling the USB/Ethernet round trip
+        device options	Further keyword arguments are passed to each SimDevice (and on to SimAxis)
+    '''
+
+    def __init__(self, devices=1, clock=None, latency=0.0, **deviceOptions):
+        if isinstance(devices, int):
+            devices = [SimDevice(serialNo='L{:06d}'.format(10000 + i), hwid=i, **deviceOptions) for i in range(devices)]
+        self.devices = devices
+        self.clock = clock if clock is not None else SystemClock()
+        for device in devices:
+            for axis in device.axes:
+                axis.clock = self.clock
+        self.latency = latency
+        self.calls = {}
+        self._faults = {}
+        self._discovered = []
+        self._handles = {}
+        self._nextHandle = 1
+        self._lock = threading.Lock()
+
+
+    def inject(self, name, kind='timeout', count=1):
+        '''
+        Makes the next count calls of an entry point fail.
+
+        Parameters
+            name	Entry point without prefix, eg. 'getPosition' (v4) or 'GetPosition' (v2)
+            kind	'error', 'timeout', 'handle', 'locked', 'device', 'axis', 'range' or 'unavailable'
+            count	Number of calls to fail
+        '''
+        with self._lock:
+            self._faults[name] = [kind, count]
+
+
+    def unplug(self, device=0, downtime=None, reset=True):
+        '''
+        Disconnects a device as if its cable was pulled: its handles become invalid and it is not found by discover until it is plugged in again.
+
+        Parameters
+            device	Index into devices, or a SimDevice
+            downtime	Time [s] after which the device is plugged in again by itself; None waits for replug
+            reset	Reset the settings of all axes, as a power cycle would
+        '''
+        device = self.devices[device] if isinstance(device, int) else device
+        with self._lock:
+            device.present = False
+            device.connected = False
+            device.returns = None if downtime is None else self.clock.time() + downtime
+            self._handles = {handle: other for handle, other in self._handles.items() if other is not device}
+            if reset:
+                for axis in device.axes:
+                    axis.reset()
+
+
+    def replug(self, device=0):
+        '''
+        Plugs in a device disconnected with unplug; it has to be discovered and connected again.
+        '''
+        device = self.devices[device] if isinstance(device, int) else device
+        with self._lock:
+            device.present = True
+            device.returns = None
+
+
+    def _present(self, device):
+        if not device.present and device.returns is not None and self.clock.time() >= device.returns:
+            device.present = True
+            device.returns = None
+        return device.present
+
+
+    def __getattr__(self, symbol):
+        if symbol.startswith('ANC_'):
+            family, name = 'ANC', symbol[4:]
+        elif symbol.startswith('_Positioner'):
+            family, name = 'NCB', symbol[len('_Positioner'):].split('@')[0]
+        else:
+            raise AttributeError(symbol)
+        try:
+            method = getattr(self, '_{}_{}'.format(family.lower(), name))
+        except AttributeError:
+            raise AttributeError(symbol) from None
+        codes = _CODES[family]
+        def entry(*args):
+            if self.latency:
+                self.clock.sleep(self.latency)
+            with self._lock:
+                self.calls[name] = self.calls.get(name, 0) + 1
+                fault = self._faults.get(name)
+                if fault is not None:
+                    fault[1] -= 1
+                    if fault[1] <= 0:
+                        del self._faults[name]
+                    return codes[fault[0]]
+                try:
+                    result = method(*args)
+                except _Fault as f:
+                    return codes[f.kind]
+            return 0 if result is None else result
+        entry.__name__ = symbol
+        return entry
+
+
+    def _wait(self, seconds):
+        #sleeps on the simulation clock without blocking other calls
+        self._lock.release()
+        try:
+            self.clock.sleep(seconds)
+        finally:
+            self._lock.acquire()
+
+
+    def _device(self, handle):
+        device = self._handles.get(_value(handle))
+        if device is None or not self._present(device):
+            raise _Fault('handle')
+        return device
+
+
+    def _axis(self, handle, axisNo):
+        axes = self._device(handle).axes
+        axisNo = _value(axisNo)
+        if not 0 <= axisNo < len(axes):
+            raise _Fault('axis')
+        axis = axes[axisNo]
+        axis.advance()
+        return axis
+
+
+    def _connect(self, device, handle):
+        if not self._present(device):
+            raise _Fault('handle')
+        if device.connected:
+            raise _Fault('locked')
+        device.connected = True
+        if device.connectTime:
+            self._wait(device.connectTime)
+        number = self._nextHandle
+        self._nextHandle += 1
+        self._handles[number] = device
+        _out(handle, number)
+
+
+    def _close(self, handle):
+        device = self._device(handle)
+        device.connected = False
+        del self._handles[_value(handle)]
+
+
+    #
+    # v3/v4 entry points (ANC_*)
+    #
+
+    def _anc_discover(self, ifaces, devCount):
+        if any(device.connected for device in self._discovered):
+            raise _Fault('error')
+        ifaces = _value(ifaces)
+        self._discovered = [device for device in self.devices if device.interface & ifaces and self._present(device)]
+        _out(devCount, len(self._discovered))
+
+    def _anc_getDeviceInfo(self, devNo, devType, id_, serialNo, address, connected):
+        devNo = _value(devNo)
+        if not 0 <= devNo < len(self._discovered):
+            raise _Fault('device')
+        device = self._discovered[devNo]
+        _out(devType, device.devType)
+        _out(id_, device.hwid)
+        _out(serialNo, device.serialNo.encode())
+        _out(address, device.address.encode())
+        _out(connected, int(device.connected))
+
+    def _anc_connect(self, devNo, device):
+        devNo = _value(devNo)
+        if not 0 <= devNo < len(self._discovered):
+            raise _Fault('device')
+        self._connect(self._discovered[devNo], device)
+
+    def _anc_disconnect(self, device):
+        self._close(device)
+
+    def _anc_getDeviceConfig(self, device, features):
+        _out(features, self._device(device).features)
+
+    def _anc_getAxisStatus(self, device, axisNo, connected, enabled, moving, target, eotFwd, eotBwd, error):
+        axis = self._axis(device, axisNo)
+        _out(connected, int(axis.sensor))
+        _out(enabled, int(axis.enabled))
+        _out(moving, int(axis.moving))
+        _out(target, int(axis.onTarget))
+        _out(eotFwd, int(axis.eotFwd))
+        _out(eotBwd, int(axis.eotBwd))
+        _out(error, 0)
+
+    def _anc_setAxisOutput(self, device, axisNo, enable, autoDisable):
+        axis = self._axis(device, axisNo)
+        axis.enabled = bool(_value(enable))
+        axis.autoDisable = bool(_value(autoDisable))
+
+    def _anc_setAmplitude(self, device, axisNo, amplitude):
+        axis = self._axis(device, axisNo)
+        amplitude = _value(amplitude)
+        if not 0 <= amplitude <= 70:
+            raise _Fault('range')
+        axis.amplitude = round(amplitude, 3)
+
+    def _anc_setFrequency(self, device, axisNo, frequency):
+        axis = self._axis(device, axisNo)
+        frequency = _value(frequency)
+        if not 1 <= frequency <= 5000:
+            raise _Fault('range')
+        axis.frequency = float(round(frequency))
+
+    def _anc_setDcVoltage(self, device, axisNo, voltage):
+        axis = self._axis(device, axisNo)
+        voltage = _value(voltage)
+        if not 0 <= voltage <= 70:
+            raise _Fault('range')
+        axis.dcVoltage = round(voltage, 3)
+
+    def _anc_getAmplitude(self, device, axisNo, amplitude):
+        _out(amplitude, self._axis(device, axisNo).amplitude)
+
+    def _anc_getFrequency(self, device, axisNo, frequency):
+        _out(frequency, self._axis(device, axisNo).frequency)
+
+    def _anc_startSingleStep(self, device, axisNo, backward):
+        self._axis(device, axisNo).singleStep(bool(_value(backward)))
+
+    def _anc_startContinousMove(self, device, axisNo, start, backward):
+        axis = self._axis(device, axisNo)
+        if _value(start):
+            axis.startContinuous(bool(_value(backward)))
+        elif axis.mode == CONTINUOUS:
+            axis.stop()
+
+    def _anc_startAutoMove(self, device, axisNo, enable, relative):
+        axis = self._axis(device, axisNo)
+        if _value(enable):
+            axis.startAuto(axis.target, bool(_value(relative)))
+        elif axis.mode == AUTO:
+            axis.stop()
+
+    def _anc_setTargetPosition(self, device, axisNo, target):
+        axis = self._axis(device, axisNo)
+        axis.target = _value(target)
+
+    def _anc_setTargetRange(self, device, axisNo, targetRg):
+        self._axis(device, axisNo).targetRange = _value(targetRg)
+
+    def _anc_getPosition(self, device, axisNo, position):
+        _out(position, self._axis(device, axisNo).read())
+
+    def _anc_getFirmwareVersion(self, device, version):
+        _out(version, self._device(device).firmware)
+
+    def _anc_configureExtTrigger(self, device, axisNo, mode):
+        self._axis(device, axisNo).settings['extTrigger'] = _value(mode)
+
+    def _anc_configureAQuadBIn(self, device, axisNo, enable, resolution):
+        self._axis(device, axisNo).settings['aQuadBIn'] = (_value(enable), _value(resolution))
+
+    def _anc_configureAQuadBOut(self, device, axisNo, enable, resolution, clock):
+        self._axis(device, axisNo).settings['aQuadBOut'] = (_value(enable), _value(resolution), _value(clock))
+
+    def _anc_configureRngTriggerPol(self, device, axisNo, polarity):
+        axis = self._axis(device, axisNo)
+        axis.settings['rngTriggerPol'] = _value(polarity)
+        self._device(device).trigger(_value(axisNo)).configure(axis, polarity=_value(polarity))
+
+    def _anc_configureRngTrigger(self, device, axisNo, lower, upper):
+        axis = self._axis(device, axisNo)
+        axis.settings['rngTrigger'] = (_value(lower), _value(upper))
+        self._device(device).trigger(_value(axisNo)).configure(axis, lower=_value(lower)*1e-9, upper=_value(upper)*1e-9)
+
+    def _anc_configureRngTriggerEps(self, device, axisNo, epsilon):
+        axis = self._axis(device, axisNo)
+        axis.settings['rngTriggerEps'] = _value(epsilon)
+        self._device(device).trigger(_value(axisNo)).configure(axis, epsilon=_value(epsilon)*1e-9)
+
+    def _anc_configureNslTrigger(self, device, enable):
+        self._device(device).settings['nslTrigger'] = _value(enable)
+
+    def _anc_configureNslTriggerAxis(self, device, axisNo):
+        self._axis(device, axisNo)
+        self._device(device).settings['nslTriggerAxis'] = _value(axisNo)
+
+    def _anc_selectActuator(self, device, axisNo, actuator):
+        axis = self._axis(device, axisNo)
+        actuator = _value(actuator)
+        if not 0 <= actuator < len(ACTUATORS):
+            raise _Fault('range')
+        axis.selectActuator(actuator)
+
+    def _anc_getActuatorName(self, device, axisNo, name):
+        _out(name, ACTUATORS[self._axis(device, axisNo).actuator][0].encode())
+
+    def _anc_getActuatorType(self, device, axisNo, type_):
+        _out(type_, ACTUATORS[self._axis(device, axisNo).actuator][1])
+
+    def _anc_measureCapacitance(self, device, axisNo, cap):
+        axis = self._axis(device, axisNo)
+        self._wait(axis.capDelay)
+        _out(cap, axis.capacitance)
+
+    def _anc_saveParams(self, device):
+        self._device(device).flashWrites += 1
+
+
+    #
+    # v2 entry points (_Positioner*@N); units are nm, mV and Hz
+    #
+
+    def _ncb_Check(self, info):
+        info = getattr(info, '_obj', info)
+        if self.devices:
+            info.id = self.devices[0].hwid
+            info.locked = self.devices[0].connected
+        return len(self.devices)
+
+    def _ncb_Connect(self, devNo, handle):
+        devNo = _value(devNo)
+        if not 0 <= devNo < len(self.devices):
+            raise _Fault('device')
+        self._connect(self.devices[devNo], handle)
+
+    def _ncb_Close(self, handle):
+        self._close(handle)
+
+    def _ncb_GetPosition(self, handle, axis, pos):
+        axis = self._axis(handle, axis)
+        _out(pos, int(round((axis.read() - axis.origin)*1e9)) if axis.sensor else 0)
+
+    def _ncb_GetStatus(self, handle, axis, status):
+        axis = self._axis(handle, axis)
+        _out(status, int(axis.moving) | (axis.eotFwd or axis.eotBwd) << 1 | (not axis.sensor) << 3)
+
+    def _ncb_MoveAbsolute(self, handle, axis, position, rotcount):
+        axis = self._axis(handle, axis)
+        axis.startAuto(_value(position)*1e-9 + axis.origin)
+
+    def _ncb_MoveRelative(self, handle, axis, position, rotcount):
+        self._axis(handle, axis).startAuto(_value(position)*1e-9, relative=True)
+
+    def _ncb_SetTargetPos(self, handle, axis, pos, rotcount):
+        axis = self._axis(handle, axis)
+        axis.settings['targetPos'] = _value(pos)*1e-9 + axis.origin
+
+    def _ncb_MoveAbsoluteSync(self, handle, bitmask):
+        bitmask = _value(bitmask)
+        device = self._device(handle)
+        for axisNo, axis in enumerate(device.axes):
+            if bitmask & (1 << axisNo):
+                axis.advance()
+                axis.startAuto(axis.settings.get('targetPos', axis.position))
+
+    def _ncb_UpdateAbsolute(self, handle, axis, position):
+        # only adjusts a running approach, as on the device
+        axis = self._axis(handle, axis)
+        axis.target = _value(position)*1e-9 + axis.origin
+
+    def _ncb_MoveContinuous(self, handle, axis, direction):
+        self._axis(handle, axis).startContinuous(bool(_value(direction)))
+
+    def _ncb_MoveSingleStep(self, handle, axis, direction):
+        axis = self._axis(handle, axis)
+        if axis.stepCount == 1:
+            axis.singleStep(bool(_value(direction)))
+        else:
+            axis.startBurst(bool(_value(direction)), axis.stepCount)
+
+    def _ncb_StepCount(self, handle, axis, stps):
+        stps = _value(stps)
+        if not 1 <= stps <= 65535:
+            raise _Fault('range')
+        self._axis(handle, axis).stepCount = stps
+
+    def _ncb_StopMoving(self, handle, axis):
+        self._axis(handle, axis).stop()
+
+    def _ncb_StopApproach(self, handle, axis):
+        axis = self._axis(handle, axis)
+        if axis.mode == AUTO:
+            axis.stop()
+
+    def _ncb_MoveReference(self, handle, axis):
+        axis = self._axis(handle, axis)
+        axis.startAuto(axis.travel[0])
+
+    def _ncb_ResetPosition(self, handle, axis):
+        axis = self._axis(handle, axis)
+        axis.origin = axis.position
+
+    def _ncb_GetReference(self, handle, axis, pos, validity):
+        axis = self._axis(handle, axis)
+        _out(pos, int(round((axis.travel[0] - axis.origin)*1e9)))
+        _out(validity, True)
+
+    def _ncb_GetReferenceRotCount(self, handle, axis, rotcount):
+        _out(rotcount, self._axis(handle, axis).settings.get('refRotCount', 0))
+
+    def _ncb_GetRotCount(self, handle, axis, rotcount):
+        _out(rotcount, self._axis(handle, axis).settings.get('rotCount', 0))
+
+    def _ncb_Amplitude(self, handle, axis, amp):
+        amp = _value(amp)
+        if not 0 <= amp <= 70000:
+            raise _Fault('range')
+        self._axis(handle, axis).amplitude = amp/1000
+
+    def _ncb_GetAmplitude(self, handle, axis, amp):
+        _out(amp, int(round(self._axis(handle, axis).amplitude*1000)))
+
+    def _ncb_Frequency(self, handle, axis, freq):
+        freq = _value(freq)
+        if not 1 <= freq <= 5000:
+            raise _Fault('range')
+        self._axis(handle, axis).frequency = float(freq)
+
+    def _ncb_GetFrequency(self, handle, axis, freq):
+        _out(freq, int(self._axis(handle, axis).frequency))
+
+    def _ncb_GetSpeed(self, handle, axis, spd):
+        _out(spd, int(round(self._axis(handle, axis).velocity()*1e9)))
+
+    def _ncb_GetStepwidth(self, handle, axis, stepwdth):
+        _out(stepwdth, int(round(self._axis(handle, axis).step()*1e9)))
+
+    def _ncb_CapMeasure(self, handle, axis, cap):
+        axis = self._axis(handle, axis)
+        self._wait(axis.capDelay)
+        _out(cap, int(round(axis.capacitance*1e9)))
+
+    def _ncb_SetOutput(self, handle, axis, state):
+        self._axis(handle, axis).enabled = bool(_value(state))
+
+    def _ncb_DCLevel(self, handle, axis, dclev):
+        self._axis(handle, axis).dcVoltage = _value(dclev)/1000
+
+    def _ncb_GetDcLevel(self, handle, axis, dclev):
+        _out(dclev, int(round(self._axis(handle, axis).dcVoltage*1000)))
+
+    def _ncb_StaticAmplitude(self, handle, amp):
+        self._device(handle).settings['staticAmplitude'] = _value(amp)
+
+    def _ncb_Load(self, handle, axis, filename):
+        self._axis(handle, axis)
+        raise _Fault('unavailable')
+
+    def _ncb_SetHardwareId(self, handle, hwid):
+        self._device(handle).hwid = _value(hwid)
+
+    #the remaining v2 functions only store settings, which the getters read back
+    def _setting(self, handle, axis, key, value):
+        target = self._device(handle) if axis is None else self._axis(handle, axis)
+        target.settings[key] = _value(value)
+
+    def _getting(self, handle, axis, key, out, default):
+        _out(out, self._axis(handle, axis).settings.get(key, default))
+
+    def _ncb_AcInEnable(self, handle, axis, state): self._setting(handle, axis, 'acIn', bool(_value(state)))
+    def _ncb_GetAcInEnable(self, handle, axis, state): self._getting(handle, axis, 'acIn', state, False)
+    def _ncb_DcInEnable(self, handle, axis, state): self._setting(handle, axis, 'dcIn', bool(_value(state)))
+    def _ncb_GetDcInEnable(self, handle, axis, state): self._getting(handle, axis, 'dcIn', state, False)
+    def _ncb_IntEnable(self, handle, axis, state): self._setting(handle, axis, 'int', bool(_value(state)))
+    def _ncb_GetIntEnable(self, handle, axis, state): self._getting(handle, axis, 'int', state, True)
+    def _ncb_BandwidthLimitEnable(self, handle, axis, state): self._setting(handle, axis, 'bandwidthLimit', bool(_value(state)))
+    def _ncb_GetBandwidthLimitEnable(self, handle, axis, state): self._getting(handle, axis, 'bandwidthLimit', state, False)
+    def _ncb_AmplitudeControl(self, handle, axis, mode): self._setting(handle, axis, 'amplitudeControl', mode)
+    def _ncb_ClearStopDetection(self, handle, axis): self._setting(handle, axis, 'stopDetected', 0)
+    def _ncb_SetStopDetectionSticky(self, handle, axis, state): self._setting(handle, axis, 'stopDetectionSticky', state)
+    def _ncb_StopDetection(self, handle, axis, state): self._setting(handle, axis, 'stopDetection', state)
+    def _ncb_SetTargetGround(self, handle, axis, state): self._setting(handle, axis, 'targetGround', state)
+    def _ncb_SingleCircleMode(self, handle, axis, state): self._setting(handle, axis, 'singleCircle', state)
+    def _ncb_ExternalStepBkwInput(self, handle, axis, trigger): self._setting(handle, axis, 'extStepBkw', trigger)
+    def _ncb_ExternalStepFwdInput(self, handle, axis, trigger): self._setting(handle, axis, 'extStepFwd', trigger)
+    def _ncb_ExternalStepInputEdge(self, handle, axis, edge): self._setting(handle, axis, 'extStepEdge', edge)
+    def _ncb_DutyCycleEnable(self, handle, state): self._setting(handle, None, 'dutyCycle', state)
+    def _ncb_DutyCycleOffTime(self, handle, value): self._setting(handle, None, 'dutyCycleOffTime', value)
+    def _ncb_DutyCyclePeriod(self, handle, value): self._setting(handle, None, 'dutyCyclePeriod', value)
+    def _ncb_SensorPowerGroupA(self, handle, state): self._setting(handle, None, 'sensorPowerA', state)
+    def _ncb_SensorPowerGroupB(self, handle, state): self._setting(handle, None, 'sensorPowerB', state)
+    def _ncb_QuadratureAxis(self, handle, quadratureno, axis): self._setting(handle, None, ('quadratureAxis', _value(quadratureno)), axis)
+    def _ncb_QuadratureInputPeriod(self, handle, quadratureno, period): self._setting(handle, None, ('quadratureIn', _value(quadratureno)), period)
+    def _ncb_QuadratureOutputPeriod(self, handle, quadratureno, period): self._setting(handle, None, ('quadratureOut', _value(quadratureno)), period)
+    def _ncb_TriggerModeIn(self, handle, mode): self._setting(handle, None, 'triggerModeIn', mode)
+
+    #v2 trigger levels are relative to the origin set by resetPosition, in nm
+    def _ncbTrigger(self, handle, triggerno, key, value):
+        triggerno = _value(triggerno)
+        if not 0 <= triggerno < 6:
+            raise _Fault('device')
+        self._setting(handle, None, (key, triggerno), value)
+        device = self._device(handle)
+        settings = device.settings
+        axis = device.axes[settings.get(('triggerAxis', triggerno), 0)]
+        lower, upper = settings.get(('trigger', triggerno), (0, 0))
+        device.trigger(triggerno).configure(axis, lower=lower*1e-9 + axis.origin, upper=upper*1e-9 + axis.origin,
+            epsilon=settings.get(('triggerEpsilon', triggerno), 0)*1e-9, polarity=settings.get(('triggerPolarity', triggerno), 1),
+            enabled=settings.get('triggerModeOut') == 1)
+
+    def _ncb_Trigger(self, handle, triggerno, lowlevel, highlevel): self._ncbTrigger(handle, triggerno, 'trigger', (_value(lowlevel), _value(highlevel)))
+    def _ncb_TriggerAxis(self, handle, triggerno, axis):
+        if not 0 <= _value(axis) < len(self._device(handle).axes):
+            raise _Fault('axis')
+        self._ncbTrigger(handle, triggerno, 'triggerAxis', axis)
+    def _ncb_TriggerEpsilon(self, handle, triggerno, epsilon): self._ncbTrigger(handle, triggerno, 'triggerEpsilon', epsilon)
+    def _ncb_TriggerPolarity(self, handle, triggerno, polarity): self._ncbTrigger(handle, triggerno, 'triggerPolarity', polarity)
+    def _ncb_TriggerModeOut(self, handle, mode):
+        self._setting(handle, None, 'triggerModeOut', mode)
+        for trigger in self._device(handle).triggers.values():
+            trigger.configure(enabled=_value(mode) == 1)
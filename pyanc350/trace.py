@@ -0,0 +1,393 @@
+#
+#  trace records the calls into the ANC350 libraries to a binary file and
+#    plays them back offline.
+#
+#  A TraceRecorder installs itself as a wrapper on library backends (see
+#    Backend.addWrapper) and appends one record per call: function, input
+#    arguments, return code, the values written to output parameters, and
+#    the start and duration of the call. Records are framed with the wire
+#    encoding, so a trace cut short by a crash is readable up to its last
+#    complete record:
+#
+#      import pyanc350.v4.ANC350libv4 as ANC
+#      with TraceRecorder('scan.anctrace', ANC.backend):
+#          scan.run()
+#
+#  A trace can be played back in two ways. ReplayLibrary is a stand-in
+#    library that answers a program with the recorded results and call
+#    durations, so the host side of a slow scan can be rerun and profiled
+#    without the hardware. replay() issues the recorded calls to another
+#    library, eg. the simulator, with the recorded timing or fast-forwarded:
+#
+#      pos = Positioner(library=ReplayLibrary('scan.anctrace'))
+#      stats = replay('scan.anctrace', SimulatedANC350(), speed=None)
+#
+#  From the command line:
+#      python -m pyanc350.trace summary scan.anctrace
+#      python -m pyanc350.trace replay scan.anctrace --speed 10
+#
+
+import collections, ctypes, threading
+from pyanc350 import wire
+from pyanc350.clock import SYSTEM_CLOCK, VirtualClock
+
+MAGIC = b'ANCTRACE'
+VERSION = 1
+
+#record kinds
+NAME, CALL = 0, 1
+#argument kinds: a plain Python value, a ctypes instance, byref() of a ctypes instance, a buffer (array or structure)
+PLAIN, VALUE, REF, BUFFER = range(4)
+#aliases of the connect functions, whose output is a device handle
+CONNECT = frozenset(['connect', 'positionerConnect'])
+#aliases of the functions that do not take a device handle as their first argument
+UNBOUND = CONNECT | frozenset(['discover', 'getDeviceInfo', 'positionerCheck'])
+
+#one recorded call; t is the start [s] since the first call, duration in s
+Call = collections.namedtuple('Call', ['t', 'duration', 'library', 'alias', 'symbol', 'args', 'result', 'outs', 'error'])
+#result of replay; mismatches counts calls whose return code differed from the recording
+ReplayStats = collections.namedtuple('ReplayStats', ['calls', 'mismatches', 'elapsed', 'recorded'])
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _capture(arg, pointer=False):
+    #encodable description of an argument before the call; arrays and structures are kept as their bytes.
+    #ctypes passes a plain instance by reference where the prototype declares a pointer, so it is an output too
+    obj = getattr(arg, '_obj', None)
+    if obj is not None and type(arg).__name__ == 'CArgObject':
+        if isinstance(obj, ctypes._SimpleCData):
+            return [REF, type(obj).__name__, _plain(obj.value)]
+        arg = obj
+    if isinstance(arg, (ctypes.Array, ctypes.Structure)):
+        return [BUFFER, ctypes.sizeof(arg), ctypes.string_at(ctypes.addressof(arg), ctypes.sizeof(arg))]
+    if isinstance(arg, ctypes._SimpleCData):
+        return [REF if pointer else VALUE, type(arg).__name__, _plain(arg.value)]
+    return [PLAIN, _plain(arg)]
+
+
+def _plain(value):
+    return value if value is None or isinstance(value, (bool, int, float, bytes, str)) else repr(value)
+
+
+def _after(arg):
+    #value of an output parameter after the call
+    obj = getattr(arg, '_obj', arg)
+    if isinstance(obj, (ctypes.Array, ctypes.Structure)):
+        return ctypes.string_at(ctypes.addressof(obj), ctypes.sizeof(obj))
+    return _plain(obj.value)
+
+
+class TraceRecorder:
+
+    def __init__(self, path, *backends):
+        '''
+        Parameters
+            path	Trace file; calls are appended if it exists
+            backends	Library backends to record (eg. pyanc350.v4.ANC350libv4.backend)
+        '''
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        self._names = {}
+        self._wrappers = {}
+        self._last = None
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC + bytes([VERSION]))
+        for backend in backends:
+            self.attach(backend)
+
+
+    def attach(self, backend):
+        '''
+        Starts recording the calls into the library of backend.
+        '''
+        if backend not in self._wrappers:
+            wrapper = self._wrapper(backend)
+            self._wrappers[backend] = wrapper
+            backend.addWrapper(wrapper)
+        return self
+
+
+    def detach(self, backend=None):
+        '''
+        Stops recording the calls into the library of backend, or of all attached backends if None.
+        '''
+        for attached in ([backend] if backend is not None else list(self._wrappers)):
+            attached.removeWrapper(self._wrappers.pop(attached))
+
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+
+    def close(self):
+        '''
+        Detaches from all backends and closes the file.
+        '''
+        self.detach()
+        with self._lock:
+            self._file.close()
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def _wrapper(self, backend):
+        def wrap(alias, func):
+            key = (backend.name, alias)
+            symbol, argtypes = backend.prototypes[alias]
+            pointers = [isinstance(t, type) and issubclass(t, ctypes._Pointer) for t in argtypes or ()]
+            clock = backend.clock
+            def call(*args):
+                captured = [_capture(arg, i < len(pointers) and pointers[i]) for i, arg in enumerate(args)]
+                start = clock.time()
+                try:
+                    result = func(*args)
+                except BaseException as e:
+                    self._write(key, symbol, start, clock.time() - start, captured, None, [], '{}: {}'.format(type(e).__name__, e))
+                    raise
+                duration = clock.time() - start
+                outs = [[i, _after(arg)] for i, arg in enumerate(args) if captured[i][0] in (REF, BUFFER)]
+                self._write(key, symbol, start, duration, captured, _plain(result), outs, None)
+                return result
+            call.__name__ = getattr(func, '__name__', alias)
+            return call
+        return wrap
+
+
+    def _write(self, key, symbol, start, duration, args, result, outs, error):
+        start, duration = int(start*1e9), int(duration*1e9)
+        with self._lock:
+            if self._file.closed:
+                return
+            id_ = self._names.get(key)
+            if id_ is None:
+                id_ = self._names[key] = len(self._names)
+                self._file.write(wire.frame([NAME, id_, key[0], key[1], symbol]))
+            # starts are stored as the difference to the previous call, which keeps them short
+            delta = start - (self._last if self._last is not None else start)
+            self._last = start
+            self._file.write(wire.frame([CALL, id_, delta, duration, args, result, outs, error]))
+            self.count += 1
+
+
+def readTrace(path):
+    '''
+    Yields the Calls recorded in a trace file, in order.
+    '''
+    with open(path, 'rb') as f:
+        header = f.read(len(MAGIC) + 1)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError('{} is not a trace file'.format(path))
+        if header[len(MAGIC)] != VERSION:
+            raise ValueError('unsupported trace version {}'.format(header[len(MAGIC)]))
+        names = {}
+        t = 0
+        while True:
+            record = wire.readFrame(f)
+            if record is None:
+                return
+            if record[0] == NAME:
+                names[record[1]] = tuple(record[2:5])
+            elif record[0] == CALL:
+                id_, delta, duration, args, result, outs, error = record[1:]
+                t += delta
+                library, alias, symbol = names[id_]
+                yield Call(t*1e-9, duration*1e-9, library, alias, symbol, args, result, outs, error)
+
+
+def summary(path):
+    '''
+    Returns {(library, alias): (calls, errors, total duration [s])} of a trace.
+    '''
+    totals = {}
+    for call in readTrace(path):
+        count, errors, duration = totals.get((call.library, call.alias), (0, 0, 0.0))
+        failed = call.error is not None or (isinstance(call.result, int) and call.result != 0)
+        totals[(call.library, call.alias)] = (count + 1, errors + failed, duration + call.duration)
+    return totals
+
+
+def _key(alias, args):
+    #what identifies a call for ReplayLibrary: the function and its input values (outputs are left out)
+    key = [alias]
+    for arg in args:
+        if arg[0] == PLAIN:
+            key.append(arg[1])
+        elif arg[0] == VALUE:
+            key.append(arg[2])
+        else:
+            key.append(arg[0])
+    return tuple(key)
+
+
+class ReplayLibrary:
+
+    def __init__(self, path, library=None, speed=None, strict=True):
+        '''
+        Stand-in library answering with the results of a trace; pass it to Positioner(library=...) or ANCxxx.load().
+
+        Calls are matched by function and input arguments, and each match is answered with the next recorded call of that kind: its return code, its output values, and its duration, spent on clock. When the recorded calls of a kind are used up (eg. a polling loop polls once more than when it was recorded), the last one is repeated.
+
+        Parameters
+            path	Trace file
+            library	Name of the library to answer for, eg. 'anc350v4'. Default: that of the first call in the trace
+            speed	None to fast-forward (clock is a stepped VirtualClock), otherwise the rate of clock relative to real time (1: as recorded)
+            strict	Raise ReplayError for a call that was never recorded, instead of returning 0
+        '''
+        self.clock = VirtualClock(rate=speed)
+        self.strict = strict
+        self.calls = collections.defaultdict(collections.deque)
+        self.symbols = {}
+        self.outputs = {} #alias -> positions of the arguments recorded as outputs
+        for call in readTrace(path):
+            if library is None:
+                library = call.library
+            if call.library == library:
+                self.symbols[call.symbol] = call.alias
+                self.outputs[call.alias] = {i for i, arg in enumerate(call.args) if arg[0] == REF}
+                self.calls[_key(call.alias, call.args)].append(call)
+        self.library = library
+        self.served = 0
+        self.repeated = 0
+        self.missing = 0
+
+
+    def __getattr__(self, symbol):
+        try:
+            alias = self.symbols[symbol]
+        except KeyError:
+            if self.strict:
+                raise AttributeError(symbol) from None
+            alias = symbol
+        def entry(*args):
+            return self._answer(alias, args)
+        entry.__name__ = symbol
+        return entry
+
+
+    def _answer(self, alias, args):
+        outputs = self.outputs.get(alias, ())
+        queue = self.calls.get(_key(alias, [_capture(arg, i in outputs) for i, arg in enumerate(args)]))
+        if not queue:
+            self.missing += 1
+            if self.strict:
+                raise ReplayError('{}{} was not recorded'.format(alias, tuple(_value(arg) for arg in args)))
+            return 0
+        if len(queue) > 1:
+            call = queue.popleft()
+        else:
+            call = queue[0]
+            self.repeated += 1
+        self.served += 1
+        self.clock.sleep(call.duration)
+        for i, value in call.outs:
+            _write(args[i], value)
+        if call.error is not None:
+            raise ReplayError('recorded call failed: {}'.format(call.error))
+        return call.result
+
+
+def _value(arg):
+    arg = getattr(arg, '_obj', arg)
+    return getattr(arg, 'value', arg)
+
+
+def _write(arg, value):
+    #writes a recorded output value into an output parameter
+    obj = getattr(arg, '_obj', arg)
+    if isinstance(obj, (ctypes.Array, ctypes.Structure)):
+        ctypes.memmove(ctypes.addressof(obj), value, min(len(value), ctypes.sizeof(obj)))
+    else:
+        obj.value = value
+
+
+def _rebuild(arg, handles):
+    #argument for a live library from its recorded description
+    kind = arg[0]
+    if kind == PLAIN:
+        return handles.get(arg[1], arg[1]) if isinstance(arg[1], int) else arg[1]
+    if kind == VALUE:
+        return getattr(ctypes, arg[1])(handles.get(arg[2], arg[2]))
+    if kind == REF:
+        return ctypes.byref(getattr(ctypes, arg[1])(arg[2]))
+    return ctypes.create_string_buffer(arg[1])
+
+
+def replay(path, library, speed=1.0, name=None):
+    '''
+    Issues the calls of a trace to another library, eg. a SimulatedANC350, in their recorded order. Device handles returned by connect are mapped to those of the new library.
+
+    Parameters
+        path	Trace file
+        library	Library to call: a stand-in object or a ctypes library with the same entry points
+        speed	Playback rate relative to the recorded timing (1: as recorded, 10: ten times faster), or None to issue the calls back to back
+        name	Name of the library to replay, eg. 'anc350v4'. Default: that of the first call in the trace
+    Returns
+        stats	ReplayStats(calls, mismatches, elapsed, recorded) with the elapsed and recorded durations in s; calls that raise count as mismatches
+    '''
+    clock = getattr(library, 'clock', SYSTEM_CLOCK)
+    handles = {}
+    calls = mismatches = 0
+    recorded = 0.0
+    start = None
+    for call in readTrace(path):
+        if name is None:
+            name = call.library
+        if call.library != name:
+            continue
+        if start is None:
+            start, first = clock.time(), call.t
+        if speed is not None:
+            clock.sleep(start + (call.t - first)/speed - clock.time())
+        # the handle is the first argument of all functions working on a device
+        args = [_rebuild(arg, handles if i == 0 and call.alias not in UNBOUND else {}) for i, arg in enumerate(call.args)]
+        try:
+            result = getattr(library, call.symbol)(*args)
+        except Exception:
+            result = None
+        calls += 1
+        recorded = call.t + call.duration - first
+        if call.error is None and result != call.result:
+            mismatches += 1
+        if call.alias in CONNECT:
+            for i, value in call.outs:
+                if call.args[i][0] == REF:
+                    handles[value] = _value(args[i])
+    elapsed = clock.time() - start if start is not None else 0.0
+    return ReplayStats(calls, mismatches, elapsed, recorded)
+
+
+def main(argv=None):
+    import argparse #only needed on the command line
+    parser = argparse.ArgumentParser(prog='python -m pyanc350.trace', description='Summarizes or replays a trace of ANC350 library calls.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    summaryParser = commands.add_parser('summary', help='calls, errors and time per function')
+    summaryParser.add_argument('path')
+    replayParser = commands.add_parser('replay', help='replay against the simulated controller')
+    replayParser.add_argument('path')
+    replayParser.add_argument('--speed', type=float, default=None, help='playback rate, eg. 1 for the recorded timing; default: as fast as possible')
+    replayParser.add_argument('--library', default=None, help='library to replay, eg. anc350v4; default: the first in the trace')
+    replayParser.add_argument('--devices', type=int, default=1, help='number of simulated devices')
+    args = parser.parse_args(argv)
+    if args.command == 'summary':
+        print('{:<32} {:>8} {:>7} {:>10}'.format('function', 'calls', 'errors', 'time [s]'))
+        for (library, alias), (count, errors, duration) in sorted(summary(args.path).items(), key=lambda item: -item[1][2]):
+            print('{:<32} {:>8} {:>7} {:>10.4f}'.format('{}.{}'.format(library, alias), count, errors, duration))
+    else:
+        from pyanc350.simulator import SimulatedANC350
+        stats = replay(args.path, SimulatedANC350(devices=args.devices), args.speed, args.library)
+        print('{} calls replayed in {:.3f} s (recorded: {:.3f} s), {} return codes differ'.format(stats.calls, stats.elapsed, stats.recorded, stats.mismatches))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#
+#  triggerscan runs line scans in which the controller, not the software,
+#    decides when to acquire.
+#
+#  The acquisition points of each line are given as position windows on
+#    the fast axis. They are compiled into range trigger programming
+#    (configureRngTrigger on v3/v4, trigger/triggerAxis on v2), and each
+#    line is run as one continuous move: the trigger output switches when
+#    the axis enters and leaves each window, and fires a detector wired to
+#    it at the right positions however long the software takes to poll.
+#
+#  v3/v4 have one range window per axis and v2 has six trigger outputs,
+#    so a line with more windows than outputs is programmed on the fly:
+#    as soon as the axis has left a window, its output is reprogrammed
+#    with the next window not yet programmed. The software then only has
+#    to react within the gap between windows, not within the window:
+#
+#      scan = TriggerScan(pos, axis=0, lines=[[(x, x + 50e-9) for x in xs]]*len(ys),
+#                         slow=[{1: y} for y in ys])
+#      for stats in scan.run():
+#          print(stats)
+#
+#  Outputs that are not in use are parked on an empty window (lower > upper).
+#
+
+import collections
+from pyanc350.clock import clockOf
+from pyanc350.motion import AdaptivePoller, checkRunning, continuous
+
+#statistics of one line: late counts windows programmed after the axis reached them (their pulse is shortened or lost)
+LineStats = collections.namedtuple('LineStats', ['line', 'backward', 'windows', 'late', 'elapsed', 'polls'])
+#trigger programming of one line: windows in the order they are passed, assigned to outputs in turn
+LineProgram = collections.namedtuple('LineProgram', ['backward', 'start', 'stop', 'windows', 'outputs'])
+
+
+class TriggerScan:
+
+    def __init__(self, positioner, axis, lines, slow=None, epsilon=0.0, polarity=1, margin=None, outputs=None, serpentine=True, timeout=None):
+        '''
+        Parameters
+            positioner	v2, v3 or v4 Positioner
+            axis	Fast axis, moved continuously along each line
+            lines	List of lines, each a list of (lower, upper) windows on the fast axis in the position units of the library
+            slow	Optional list with one {axis: target} per line, moved to (with moveTo) before the line
+            epsilon	Hysteresis of the trigger, in position units
+            polarity	Level of the trigger output inside a window: high (1) or low (0)
+            margin	Run-up before the first and run-out after the last window of a line. Default: the width of the first window
+            outputs	v2 trigger outputs to use (0 ... 5). Default: all six. v3/v4 use the output of the fast axis.
+            serpentine	Run every other line backward, avoiding flyback
+            timeout	Maximum time [s] for each line and each move
+        '''
+        self.positioner = positioner
+        self.axis = axis
+        self.lines = [sorted(line) for line in lines]
+        if slow is not None and len(slow) != len(self.lines):
+            raise ValueError('slow needs one entry per line')
+        self.slow = slow
+        self.epsilon = epsilon
+        self.polarity = polarity
+        self.margin = margin
+        self.v2 = hasattr(positioner, 'updateAbsolute')
+        if self.v2:
+            self.outputs = list(range(6) if outputs is None else outputs)
+        else:
+            self.outputs = [axis]
+        self.serpentine = serpentine
+        self.timeout = timeout
+        self.stats = []
+
+
+    def compile(self, line):
+        '''
+        Returns the LineProgram of a line (an index into lines).
+        '''
+        windows = self.lines[line]
+        backward = self.serpentine and line % 2 == 1
+        if backward:
+            windows = windows[::-1]
+        margin = self.margin
+        if margin is None:
+            margin = windows[0][1] - windows[0][0]
+        if backward:
+            start, stop = windows[0][1] + margin, windows[-1][0] - self.epsilon - margin
+        else:
+            start, stop = windows[0][0] - margin, windows[-1][1] + self.epsilon + margin
+        outputs = [self.outputs[i % len(self.outputs)] for i in range(len(windows))]
+        return LineProgram(backward, start, stop, windows, outputs)
+
+
+    def run(self):
+        '''
+        Runs all lines and returns a list of LineStats.
+        '''
+        self._setup()
+        self.stats = []
+        try:
+            for line in range(len(self.lines)):
+                if self.slow is not None:
+                    for axis, target in self.slow[line].items():
+                        self.positioner.moveTo(axis, target, None, self.timeout)
+                self.stats.append(self.runLine(line))
+        finally:
+            for output in self.outputs:
+                self._park(output)
+        return self.stats
+
+
+    def runLine(self, line):
+        '''
+        Runs one line: moves to its start, programs the first windows, and moves continuously to its end, reprogramming each output as soon as the axis has left its window. Raises RuntimeError if the axis stops before the end of the line (end of travel, output disabled, sensor error).
+        '''
+        positioner, axis = self.positioner, self.axis
+        clock = clockOf(positioner)
+        program = self.compile(line)
+        windows, outputs = program.windows, program.outputs
+        sign = -1 if program.backward else 1
+        entry = lambda window: window[1] if program.backward else window[0]
+        exit_ = lambda window: window[0] - self.epsilon if program.backward else window[1] + self.epsilon
+        for output in self.outputs:
+            self._park(output)
+        positioner.moveTo(axis, self._position(program.start), None, self.timeout)
+        count = min(len(self.outputs), len(windows))
+        for i in range(count):
+            self._program(outputs[i], *windows[i])
+        late = 0
+        polls = 0
+        poller = AdaptivePoller()
+        start = clock.time()
+        state = {}
+        continuous(positioner, axis, True, program.backward)
+        try:
+            passed = 0 #index of the window whose exit is awaited
+            while True:
+                waiting = exit_(windows[passed]) if passed < len(windows) else program.stop
+                poller.target = waiting
+                position = positioner.getPosition(axis)
+                polls += 1
+                now = clock.time()
+                if sign*(position - waiting) > 0:
+                    if passed == len(windows):
+                        break
+                    if count < len(windows):
+                        if sign*(position - entry(windows[count])) >= 0:
+                            late += 1
+                        self._program(outputs[count], *windows[count])
+                        count += 1
+                    passed += 1
+                    continue
+                if self.timeout is not None and now - start > self.timeout:
+                    raise TimeoutError('line {} did not finish within {} s, last position {}'.format(line, self.timeout, position))
+                checkRunning(positioner, axis, program.backward, state, now)
+                clock.sleep(poller.update(position, now))
+        finally:
+            continuous(positioner, axis, False, program.backward)
+        return LineStats(line, program.backward, len(windows), late, clock.time() - start, polls)
+
+
+    def _position(self, position):
+        return int(round(position)) if self.v2 else position
+
+
+    def _level(self, position):
+        #trigger levels are in nm for both library families
+        return int(round(position)) if self.v2 else int(round(position*1e9))
+
+
+    def _program(self, output, lower, upper):
+        if self.v2:
+            self.positioner.trigger(output, self._level(lower), self._level(upper))
+        else:
+            self.positioner.configureRngTrigger(output, self._level(lower), self._level(upper))
+
+
+    def _park(self, output):
+        self._program(output, 1, 0)
+
+
+    def _setup(self):
+        positioner = self.positioner
+        if self.v2:
+            positioner.triggerModeOut(1)
+            for output in self.outputs:
+                positioner.triggerAxis(output, self.axis)
+                positioner.triggerPolarity(output, self.polarity)
+                positioner.triggerEpsilon(output, self._level(self.epsilon))
+        else:
+            positioner.configureRngTriggerPol(self.axis, self.polarity)
+            positioner.configureRngTriggerEps(self.axis, self._level(self.epsilon))
@@ -36,9 +36,38 @@
 import pyanc350.v2.ANC350lib as ANC350lib
 import ctypes
 import math
+from pyanc350.backend import OutParams
+from pyanc350.cache import ParamCache
+from pyanc350.motion import AdaptivePoller, MoveStats, stopped, waitFor
 
 class Positioner:
-	def __init__(self):
+	#library module, as in the v3/v4 Positioner
+	ANC = ANC350lib
+
+	def __init__(self, library=None, cache=False):
+		'''
+		Connects to the first device. library optionally selects the DLL (a path, a ctypes library or a Python stand-in); by default it is searched for when first needed. with cache=True the settings that cannot be read back (amplitudeControl, dutyCycle*, quadrature*, trigger*) are remembered and writing the value already set is skipped; only use it if nothing else changes the settings of the device
+		'''
+		if library is not None:
+			ANC350lib.load(library)
+		#output parameters of the getters are allocated once per axis
+		self._acInEnable = OutParams(ctypes.c_bool)
+		self._amplitude = OutParams(ANC350lib.Int32)
+		self._bandwidthLimitEnable = OutParams(ctypes.c_bool)
+		self._capMeasure = OutParams(ANC350lib.Int32)
+		self._dcInEnable = OutParams(ctypes.c_bool)
+		self._dcLevel = OutParams(ANC350lib.Int32)
+		self._frequency = OutParams(ANC350lib.Int32)
+		self._intEnable = OutParams(ctypes.c_bool)
+		self._position = OutParams(ANC350lib.Int32)
+		self._reference = OutParams(ANC350lib.Int32, ctypes.c_bool)
+		self._referenceRotCount = OutParams(ANC350lib.Int32)
+		self._rotCount = OutParams(ANC350lib.Int32)
+		self._speed = OutParams(ANC350lib.Int32)
+		self._status = OutParams(ANC350lib.Int32)
+		self._stepwidth = OutParams(ANC350lib.Int32)
+		self._targets = {}
+		self.cache = ParamCache(cache)
 		self.check()
 		self.connect()
 
@@ -58,7 +87,10 @@ class Positioner:
 		'''
 		selects the type of amplitude control. The amplitude is controlled by the positioner to hold the value constant determined by the selected type of amplitude control. mode takes values 0: speed, 1: amplitude, 2: step size
 		'''
+		if self.cache.unchanged('amplitudeControl', axis, mode):
+			return
 		ANC350lib.positionerAmplitudeControl(self.handle,axis,mode)
+		self.cache.store('amplitudeControl', axis, mode)
 
 	def bandwidthLimitEnable(self, axis, state):
 		'''
@@ -70,9 +102,9 @@ class Positioner:
 		'''
 		determines the capacitance of the piezo addressed by axis
 		'''
-		self.status = ANC350lib.Int32(0)
-		ANC350lib.positionerCapMeasure(self.handle,axis,ctypes.byref(self.status))
-		return self.status.value
+		status, ref = self._capMeasure[axis]
+		ANC350lib.positionerCapMeasure(self.handle,axis,ref)
+		return status.value
 
 	def check(self):
 		'''
@@ -101,6 +133,7 @@ class Positioner:
 		Establishes connection to first device found
 		'''
 		self.handle = ANC350lib.Int32(0)
+		self.cache.invalidate()
 		try:
 			ANC350lib.positionerConnect(0,ctypes.byref(self.handle)) #0 means "first device"
 			print('connected to first positioner')
@@ -124,19 +157,28 @@ class Positioner:
 		'''
 		controls duty cycle mode
 		'''
+		if self.cache.unchanged('dutyCycleEnable', None, bool(state)):
+			return
 		ANC350lib.positionerDutyCycleEnable(self.handle,ctypes.c_bool(state))
+		self.cache.store('dutyCycleEnable', None, bool(state))
 
 	def dutyCycleOffTime(self, value):
 		'''
 		sets duty cycle off time
 		'''
+		if self.cache.unchanged('dutyCycleOffTime', None, value):
+			return
 		ANC350lib.positionerDutyCycleOffTime(self.handle,value)
+		self.cache.store('dutyCycleOffTime', None, value)
 
 	def dutyCyclePeriod(self, value):
 		'''
 		sets duty cycle period
 		'''
+		if self.cache.unchanged('dutyCyclePeriod', None, value):
+			return
 		ANC350lib.positionerDutyCyclePeriod(self.handle,value)
+		self.cache.store('dutyCyclePeriod', None, value)
 
 	def externalStepBkwInput(self, axis, input_trigger):
 		'''
@@ -166,114 +208,113 @@ class Positioner:
 		'''
 		determines status of ac input of addressed axis. only applicable for dither axes
 		'''
-		self.status = ctypes.c_bool(None)
-		ANC350lib.positionerGetAcInEnable(self.handle,axis,ctypes.byref(self.status))
-		return self.status.value
+		status, ref = self._acInEnable[axis]
+		ANC350lib.positionerGetAcInEnable(self.handle,axis,ref)
+		return status.value
 
 	def getAmplitude(self, axis):
 		'''
 		determines the actual amplitude. In case of standstill of the actor this is the amplitude setpoint. In case of movement the amplitude set by amplitude control is determined.
 		'''
-		self.status = ANC350lib.Int32(0)
-		ANC350lib.positionerGetAmplitude(self.handle,axis,ctypes.byref(self.status))
-		return self.status.value
+		status, ref = self._amplitude[axis]
+		ANC350lib.positionerGetAmplitude(self.handle,axis,ref)
+		return status.value
 
 	def getBandwidthLimitEnable(self, axis):
 		'''
 		determines status of bandwidth limiter of addressed axis. only applicable for scanner axes
 		'''
-		self.status = ctypes.c_bool(None)
-		ANC350lib.positionerGetBandwidthLimitEnable(self.handle,axis,ctypes.byref(self.status))
-		return self.status.value
+		status, ref = self._bandwidthLimitEnable[axis]
+		ANC350lib.positionerGetBandwidthLimitEnable(self.handle,axis,ref)
+		return status.value
 
 	def getDcInEnable(self, axis):
 		'''
 		determines status of dc input of addressed axis. only applicable for scanner/dither axes
 		'''
-		self.status = ctypes.c_bool(None)
-		ANC350lib.positionerGetDcInEnable(self.handle,axis,ctypes.byref(self.status))
-		return self.status.value
+		status, ref = self._dcInEnable[axis]
+		ANC350lib.positionerGetDcInEnable(self.handle,axis,ref)
+		return status.value
 
 	def getDcLevel(self, axis):
 		'''
 		determines the status actual DC level in mV
 		'''
-		self.dclev = ANC350lib.Int32(0)
-		ANC350lib.positionerGetDcLevel(self.handle,axis,ctypes.byref(self.dclev))
-		return self.dclev.value
+		dclev, ref = self._dcLevel[axis]
+		ANC350lib.positionerGetDcLevel(self.handle,axis,ref)
+		return dclev.value
 
 	def getFrequency(self, axis):
 		'''
 		determines the frequency in Hz
 		'''
-		self.freq = ANC350lib.Int32(0)
-		ANC350lib.positionerGetFrequency(self.handle,axis,ctypes.byref(self.freq))
-		return self.freq.value
+		freq, ref = self._frequency[axis]
+		ANC350lib.positionerGetFrequency(self.handle,axis,ref)
+		return freq.value
 
 	def getIntEnable(self, axis):
 		'''
 		determines status of internal signal generation of addressed axis. only applicable for scanner/dither axes
 		'''
-		self.status = ctypes.c_bool(None)
-		ANC350lib.positionerGetIntEnable(self.handle,axis,ctypes.byref(self.status))
-		return self.status.value
+		status, ref = self._intEnable[axis]
+		ANC350lib.positionerGetIntEnable(self.handle,axis,ref)
+		return status.value
 
 	def getPosition(self, axis):
 		'''
 		determines actual position of addressed axis
 		'''
-		self.pos = ANC350lib.Int32(0)
-		ANC350lib.positionerGetPosition(self.handle,axis,ctypes.byref(self.pos))
-		return self.pos.value
+		pos, ref = self._position[axis]
+		ANC350lib.positionerGetPosition(self.handle,axis,ref)
+		return pos.value
 
 	def getReference(self, axis):
 		'''
 		determines distance of reference mark to origin
 		'''
-		self.pos = ANC350lib.Int32(0)
-		self.validity = ctypes.c_bool(None)
-		ANC350lib.positionerGetReference(self.handle,axis,ctypes.byref(self.pos),ctypes.byref(self.validity))
-		return self.pos.value, self.validity.value
+		(pos, validity), refs = self._reference[axis]
+		ANC350lib.positionerGetReference(self.handle,axis,*refs)
+		return pos.value, validity.value
 
 	def getReferenceRotCount(self, axis):
 		'''
 		determines actual position of addressed axis
 		'''
-		self.rotcount = ANC350lib.Int32(0)
-		ANC350lib.positionerGetReferenceRotCount(self.handle,axis,ctypes.byref(self.rotcount))
-		return self.rotcount.value
+		rotcount, ref = self._referenceRotCount[axis]
+		ANC350lib.positionerGetReferenceRotCount(self.handle,axis,ref)
+		return rotcount.value
 
 	def getRotCount(self, axis):
 		'''
 		determines actual number of rotations in case of rotary actuator
 		'''
-		self.rotcount = ANC350lib.Int32(0)
-		ANC350lib.positionerGetRotCount(self.handle,axis,ctypes.byref(self.rotcount))
-		return self.rotcount.value
+		rotcount, ref = self._rotCount[axis]
+		ANC350lib.positionerGetRotCount(self.handle,axis,ref)
+		return rotcount.value
 
 	def getSpeed(self, axis):
 		'''
 		determines the actual speed. In case of standstill of this actor this is the calculated speed resulting	from amplitude setpoint, frequency, and motor parameters. In case of movement this is measured speed.
 		'''
-		self.spd = ANC350lib.Int32(0)
-		ANC350lib.positionerGetSpeed(self.handle,axis,ctypes.byref(self.spd))
-		return self.spd.value
+		spd, ref = self._speed[axis]
+		ANC350lib.positionerGetSpeed(self.handle,axis,ref)
+		return spd.value
 
 	def getStatus(self, axis):
 		'''
 		determines the status of the selected axis. result: bit0 (moving), bit1 (stop detected), bit2 (sensor error), bit3 (sensor disconnected)
 		'''
-		self.status = ANC350lib.Int32(0)
-		ANC350lib.positionerGetStatus(self.handle,axis,ctypes.byref(self.status))
-		return self.status.value
+		status, ref = self._status[axis]
+		ANC350lib.positionerGetStatus(self.handle,axis,ref)
+		return status.value
 
 	def getStepwidth(self, axis):
 		'''
 		determines the step width. In case of standstill of the motor this is the calculated step width	resulting from amplitude setpoint, frequency, and motor parameters. In case of movement this is measured step width
 		'''
-		self.stepwdth = ANC350lib.Int32(0)
-		ANC350lib.positionerGetStepwidth(self.handle,axis,ctypes.byref(self.stepwdth))
-		return self.stepwdth.value
+		stepwdth, ref = self._stepwidth[axis]
+		ANC350lib.positionerGetStepwidth(self.handle,axis,ref)
+		return stepwdth.value
 
 	def intEnable(self, axis, state):
 		'''
@@ -292,6 +333,18 @@ class Positioner:
 		starts approach to absolute target position. previous movement will be stopped. rotcount optional argument position units are in 'unit of actor multiplied by 1000' (generally nanometres)
 		'''
 		ANC350lib.positionerMoveAbsolute(self.handle,axis,position,rotcount)
+		self._targets[axis] = position
+
+	def moveTo(self, axis, position, targetRange=None, timeout=None):
+		'''
+		starts approach to absolute target position (see .moveAbsolute()) and waits for the axis to stop (see .waitForTarget()). targetRange (units of actor * 1000) optionally sets how close the axis must end up to count as arrived. timeout in s, TimeoutError is raised when exceeded. returns MoveStats(axis, target, position, arrived, elapsed, polls)
+		'''
+		self.moveAbsolute(axis, position)
+		try:
+			return self.waitForTarget(axis, position, targetRange, timeout)
+		except BaseException:
+			self.stopApproach(axis)
+			raise
 
 	def moveAbsoluteSync(self, bitmask_of_axes):
 		'''
@@ -316,6 +369,7 @@ class Positioner:
 		starts approach to relative target position. previous movement will be stopped. rotcount optional argument. position units are in 'unit of actor multiplied by 1000' (generally nanometres)
 		'''
 		ANC350lib.positionerMoveRelative(self.handle,axis,position,rotcount)
+		self._targets.pop(axis, None)
 
 	def moveSingleStep(self, axis, direction):
 		'''
@@ -327,19 +381,28 @@ class Positioner:
 		'''
 		selects the axis for use with this trigger in/out pair. quadratureno: number of addressed quadrature unit (0-2)
 		'''
+		if self.cache.unchanged('quadratureAxis', quadratureno, axis):
+			return
 		ANC350lib.positionerQuadratureAxis(self.handle,quadratureno,axis)
+		self.cache.store('quadratureAxis', quadratureno, axis)
 
 	def quadratureInputPeriod(self, quadratureno, period):
 		'''
 		selects the stepsize the controller executes when detecting a step on its input AB-signal. quadratureno: number of addressed quadrature unit (0-2). period: stepsize in unit of actor * 1000
 		'''
+		if self.cache.unchanged('quadratureInputPeriod', quadratureno, period):
+			return
 		ANC350lib.positionerQuadratureInputPeriod(self.handle,quadratureno,period)
+		self.cache.store('quadratureInputPeriod', quadratureno, period)
 
 	def quadratureOutputPeriod(self, quadratureno, period):
 		'''
 		selects the position difference which causes a step on the output AB-signal. quadratureno: number of addressed quadrature unit (0-2). period: period in unit of actor * 1000
 		'''
+		if self.cache.unchanged('quadratureOutputPeriod', quadratureno, period):
+			return
 		ANC350lib.positionerQuadratureOutputPeriod(self.handle,quadratureno,period)
+		self.cache.store('quadratureOutputPeriod', quadratureno, period)
 
 	def resetPosition(self, axis):
 		'''
@@ -388,6 +451,7 @@ class Positioner:
 		sets target position for use with .moveAbsoluteSync()
 		'''
 		ANC350lib.positionerSetTargetPos(self.handle,axis,pos,rotcount)
+		self._targets[axis] = pos
 
 	def singleCircleMode(self, axis, state):
 		'''
@@ -407,6 +471,25 @@ class Positioner:
 		'''
 		ANC350lib.positionerStepCount(self.handle,axis,stps)
 
+	def stepN(self, axis, n, direction, check=False):
+		'''
+		moves n steps in one go using the hardware step count (see .stepCount()), in bursts of at most 65535 steps, and waits until they are done. the step count is left at 1. direction can be 0 (forward) or 1 (backward). returns the position after the steps if check is set, otherwise None
+		'''
+		count = None #step count written last
+		while n > 0:
+			burst = min(n, 65535)
+			if burst != count:
+				self.stepCount(axis, burst)
+				count = burst
+			self.moveSingleStep(axis, direction)
+			if burst > 1:
+				state = {}
+				waitFor(ANC350lib.backend.clock, lambda: self._pollTarget(axis, None, None, state), AdaptivePoller(), None)
+			n -= burst
+		if count not in (None, 1):
+			self.stepCount(axis, 1)
+		return self.getPosition(axis) if check else None
+
 	def stopApproach(self, axis):
 		'''
 		stops approaching target/relative/reference position. DC level of affected axis after stopping depends on setting by .setTargetGround()
@@ -429,37 +512,55 @@ class Positioner:
 		'''
 		sets the trigger thresholds for the external trigger. triggerno is 0-5, lowlevel/highlevel in units of actor * 1000
 		'''
+		if self.cache.unchanged('trigger', triggerno, (lowlevel, highlevel)):
+			return
 		ANC350lib.positionerTrigger(self.handle,triggerno,lowlevel,highlevel)
+		self.cache.store('trigger', triggerno, (lowlevel, highlevel))
 
 	def triggerAxis(self, triggerno, axis):
 		'''
 		selects the corresponding axis for the addressed trigger. triggerno is 0-5
 		'''
+		if self.cache.unchanged('triggerAxis', triggerno, axis):
+			return
 		ANC350lib.positionerTriggerAxis(self.handle,triggerno,axis)
+		self.cache.store('triggerAxis', triggerno, axis)
 
 	def triggerEpsilon(self, triggerno, epsilon):
 		'''
 		sets the hysteresis of the external trigger. epsilon in units of actor * 1000
 		'''
+		if self.cache.unchanged('triggerEpsilon', triggerno, epsilon):
+			return
 		ANC350lib.positionerTriggerEpsilon(self.handle,triggerno,epsilon)
+		self.cache.store('triggerEpsilon', triggerno, epsilon)
 
 	def triggerModeIn(self, mode):
 		'''
 		selects the mode of the input trigger signals. state: 0 disabled - inputs trigger nothing, 1 quadrature - three pairs of trigger in signals are used to accept AB-signals for relative positioning, 2 coarse - trigger in signals are used to generate coarse steps
 		'''
+		if self.cache.unchanged('triggerModeIn', None, mode):
+			return
 		ANC350lib.positionerTriggerModeIn(self.handle,mode)
+		self.cache.store('triggerModeIn', None, mode)
 
 	def triggerModeOut(self, mode):
 		'''
 		selects the mode of the output trigger signals. state: 0 disabled - inputs trigger nothing, 1 position - the trigger outputs reacts to the defined position ranges with the selected polarity, 2 quadrature - three pairs of trigger out signals are used to signal relative movement as AB-signals, 3 IcHaus - the trigger out signals are used to output the internal position signal of num-sensors
 		'''
+		if self.cache.unchanged('triggerModeOut', None, mode):
+			return
 		ANC350lib.positionerTriggerModeOut(self.handle,mode)
+		self.cache.store('triggerModeOut', None, mode)
 
 	def triggerPolarity(self, triggerno, polarity):
 		'''
 		sets the polarity of the external trigger, triggerno: 0-5, polarity: 0 low active, 1 high active
 		'''
+		if self.cache.unchanged('triggerPolarity', triggerno, polarity):
+			return
 		ANC350lib.positionerTriggerPolarity(self.handle,triggerno,polarity)
+		self.cache.store('triggerPolarity', triggerno, polarity)
 
 	def updateAbsolute(self, axis, position):
 		'''
@@ -467,6 +568,27 @@ class Positioner:
 		'''
 		ANC350lib.positionerUpdateAbsolute(self.handle,axis,position)
 
+	def waitForTarget(self, axis, target=None, targetRange=None, timeout=None):
+		'''
+		waits until an approach has finished, ie. the moving bit of .getStatus() is cleared. status and position are polled adaptively: rarely while the axis is far from target, more often as it approaches, based on the velocity estimated from successive positions. target defaults to the last position given to .moveAbsolute() or .setTargetPos(). the move counts as arrived if no stop was detected, the sensor is fine and, if targetRange is given, the axis is within it. timeout in s, TimeoutError is raised when exceeded. returns MoveStats(axis, target, position, arrived, elapsed, polls)
+		'''
+		if target is None:
+			target = self._targets.get(axis)
+		state = {}
+		poll = lambda: self._pollTarget(axis, target, targetRange, state)
+		arrived, position, elapsed, polls = waitFor(ANC350lib.backend.clock, poll, AdaptivePoller(target), timeout)
+		return MoveStats(axis, target, position, arrived, elapsed, polls)
+
+	def _pollTarget(self, axis, target, targetRange, state):
+		#one status read of waitForTarget: (finished, arrived, position); state is kept over the polls of one wait. until motion has been seen the axis must be idle for a moment (see motion.stopped), as the moving bit is set shortly after the approach starts
+		status = self.getStatus(axis)
+		position = self.getPosition(axis)
+		moved = state.get('moved', False)
+		if not stopped(state, status & 1, ANC350lib.backend.clock.time()) and not (moved and not status & 1):
+			return False, False, position
+		arrived = not status & 0b1110 and (targetRange is None or target is None or abs(position - target) <= targetRange)
+		return True, arrived, position
+
 def bitmask(input_array):
 	'''
 	takes an array or string and converts to integer bitmask; reads from left to right e.g. 0100 = 2 not 4
@@ -19,6 +19,8 @@
 
 
 import ctypes, os, time
+from pyanc350 import errors
+from pyanc350.backend import Backend
 
 #
 # List of error types
@@ -35,105 +37,93 @@ ANC_NoAxis = 10 # Invalid axis number in function call
 ANC_OutOfRange = 11 # Parameter in call is out of range
 ANC_NotAvailable = 12 # Function not available for device type
 
-#checks the errors returned from the dll
+#checks the errors returned from the dll, raising the exception of pyanc350.errors for each code
 def checkError(code,func,args):
     if code == ANC_Ok:
         return
     elif code == ANC_Error:             
-        raise Exception("Error: unspecific in"+str(func.__name__)+"with parameters:"+str(args))
+        raise errors.UnspecificError("Error: unspecific in"+str(func.__name__)+"with parameters:"+str(args), code, func.__name__, args)
     elif code == ANC_Timeout:           
-        raise Exception("Error: comm. timeout in"+str(func.__name__)+"with parameters:"+str(args))
+        raise errors.CommTimeout("Error: comm. timeout in"+str(func.__name__)+"with parameters:"+str(args), code, func.__name__, args)
     elif code == ANC_NotConnected:      
-        raise Exception("Error: not connected") 
+        raise errors.NotConnected("Error: not connected", code, func.__name__, args) 
     elif code == ANC_DriverError:       
-        raise Exception("Error: driver error") 
+        raise errors.DriverError("Error: driver error", code, func.__name__, args) 
     elif code == ANC_DeviceLocked:      
-        raise Exception("Error: device locked")
+        raise errors.DeviceLocked("Error: device locked", code, func.__name__, args)
+    elif code == ANC_Unknown:
+        raise errors.UnknownError("Error: unknown in"+str(func.__name__)+"with parameters:"+str(args), code, func.__name__, args)
     elif code == ANC_NoDevice:
-        raise Exception("Error: invalid device number")
+        raise errors.NoDevice("Error: invalid device number", code, func.__name__, args)
     elif code == ANC_NoAxis:
-        raise Exception("Error: invalid axis number")
+        raise errors.NoAxis("Error: invalid axis number", code, func.__name__, args)
     elif code == ANC_OutOfRange:
-        raise Exception("Error: parameter out of range")
+        raise errors.OutOfRange("Error: parameter out of range", code, func.__name__, args)
     elif code == ANC_NotAvailable:
-        raise Exception("Error: function not available")
+        raise errors.NotAvailable("Error: function not available", code, func.__name__, args)
     else:                    
-        raise Exception("Error: unknown in"+str(func.__name__)+"with parameters:"+str(args))
+        raise errors.ANC350Error("Error: unknown in"+str(func.__name__)+"with parameters:"+str(args), code, func.__name__, args)
     return code
 
-# import dll - have to change directories so it finds libusb0.dll
-'''
-directory_of_this_module_and_dlls = os.path.dirname(os.path.realpath(__file__))
-current_directory = os.getcwd()
-os.chdir(directory_of_this_module_and_dlls)
-anc350v4 = ctypes.windll.LoadLibrary(directory_of_this_module_and_dlls+'\\anc350v4.dll')
-os.chdir(current_directory)
-'''
-anc350v4 = ctypes.windll.anc350v4
+#types used in the C header
+Int32 = ctypes.c_int
+Bln32 = ctypes.c_int
+Handle = ctypes.c_void_p
+Int32p = ctypes.POINTER(Int32)
+Doublep = ctypes.POINTER(ctypes.c_double)
+String = ctypes.c_char_p #pass string buffers directly, not byref()
 
-#aliases for the strangely-named functions from the dll
-discover = getattr(anc350v4,"ANC_discover")
-getDeviceInfo = getattr(anc350v4,"ANC_getDeviceInfo")
-connect = getattr(anc350v4,"ANC_connect")
-disconnect = getattr(anc350v4,"ANC_disconnect")
-getDeviceConfig = getattr(anc350v4,"ANC_getDeviceConfig")
-getAxisStatus = getattr(anc350v4,"ANC_getAxisStatus")
-setAxisOutput = getattr(anc350v4,"ANC_setAxisOutput")
-setAmplitude = getattr(anc350v4,"ANC_setAmplitude")
-setFrequency = getattr(anc350v4,"ANC_setFrequency")
-setDcVoltage = getattr(anc350v4,"ANC_setDcVoltage")
-getAmplitude = getattr(anc350v4,"ANC_getAmplitude")
-getFrequency = getattr(anc350v4,"ANC_getFrequency")
-startSingleStep = getattr(anc350v4,"ANC_startSingleStep")
-startContinousMove = getattr(anc350v4,"ANC_startContinousMove")
-startAutoMove = getattr(anc350v4,"ANC_startAutoMove")
-setTargetPosition = getattr(anc350v4,"ANC_setTargetPosition")
-setTargetRange = getattr(anc350v4,"ANC_setTargetRange")
-getPosition = getattr(anc350v4,"ANC_getPosition")
-getFirmwareVersion = getattr(anc350v4,"ANC_getFirmwareVersion")
-configureExtTrigger = getattr(anc350v4,"ANC_configureExtTrigger")
-configureAQuadBIn = getattr(anc350v4,"ANC_configureAQuadBIn")
-configureAQuadBOut = getattr(anc350v4,"ANC_configureAQuadBOut")
-configureRngTriggerPol = getattr(anc350v4,"ANC_configureRngTriggerPol")
-configureRngTrigger = getattr(anc350v4,"ANC_configureRngTrigger")
-configureRngTriggerEps = getattr(anc350v4,"ANC_configureRngTriggerEps")
-configureNslTrigger = getattr(anc350v4,"ANC_configureNslTrigger")
-configureNslTriggerAxis = getattr(anc350v4,"ANC_configureNslTriggerAxis")
-selectActuator = getattr(anc350v4,"ANC_selectActuator")
-getActuatorName = getattr(anc350v4,"ANC_getActuatorName")
-getActuatorType = getattr(anc350v4,"ANC_getActuatorType")
-measureCapacitance = getattr(anc350v4,"ANC_measureCapacitance")
-saveParams = getattr(anc350v4,"ANC_saveParams")
+#aliases for the strangely-named functions from the dll, with their argtypes: (alias, symbol, argtypes)
+#all functions return an Int32 error code. Declaring the argtypes lets ctypes
+#convert plain Python ints and floats without wrapping them in ctypes objects.
+prototypes = [
+    ("discover", "ANC_discover", [Int32, Int32p]),
+    ("getDeviceInfo", "ANC_getDeviceInfo", [Int32, Int32p, Int32p, String, String, Int32p]),
+    ("connect", "ANC_connect", [Int32, ctypes.POINTER(Handle)]),
+    ("disconnect", "ANC_disconnect", [Handle]),
+    ("getDeviceConfig", "ANC_getDeviceConfig", [Handle, Int32p]),
+    ("getAxisStatus", "ANC_getAxisStatus", [Handle, Int32, Int32p, Int32p, Int32p, Int32p, Int32p, Int32p, Int32p]),
+    ("setAxisOutput", "ANC_setAxisOutput", [Handle, Int32, Bln32, Bln32]),
+    ("setAmplitude", "ANC_setAmplitude", [Handle, Int32, ctypes.c_double]),
+    ("setFrequency", "ANC_setFrequency", [Handle, Int32, ctypes.c_double]),
+    ("setDcVoltage", "ANC_setDcVoltage", [Handle, Int32, ctypes.c_double]),
+    ("getAmplitude", "ANC_getAmplitude", [Handle, Int32, Doublep]),
+    ("getFrequency", "ANC_getFrequency", [Handle, Int32, Doublep]),
+    ("startSingleStep", "ANC_startSingleStep", [Handle, Int32, Bln32]),
+    ("startContinousMove", "ANC_startContinousMove", [Handle, Int32, Bln32, Bln32]),
+    ("startAutoMove", "ANC_startAutoMove", [Handle, Int32, Bln32, Bln32]),
+    ("setTargetPosition", "ANC_setTargetPosition", [Handle, Int32, ctypes.c_double]),
+    ("setTargetRange", "ANC_setTargetRange", [Handle, Int32, ctypes.c_double]),
+    ("getPosition", "ANC_getPosition", [Handle, Int32, Doublep]),
+    ("getFirmwareVersion", "ANC_getFirmwareVersion", [Handle, Int32p]),
+    ("configureExtTrigger", "ANC_configureExtTrigger", [Handle, Int32, Int32]),
+    ("configureAQuadBIn", "ANC_configureAQuadBIn", [Handle, Int32, Bln32, ctypes.c_double]),
+    ("configureAQuadBOut", "ANC_configureAQuadBOut", [Handle, Int32, Bln32, ctypes.c_double, ctypes.c_double]),
+    ("configureRngTriggerPol", "ANC_configureRngTriggerPol", [Handle, Int32, Bln32]),
+    ("configureRngTrigger", "ANC_configureRngTrigger", [Handle, Int32, Int32, Int32]),
+    ("configureRngTriggerEps", "ANC_configureRngTriggerEps", [Handle, Int32, Int32]),
+    ("configureNslTrigger", "ANC_configureNslTrigger", [Handle, Bln32]),
+    ("configureNslTriggerAxis", "ANC_configureNslTriggerAxis", [Handle, Int32]),
+    ("selectActuator", "ANC_selectActuator", [Handle, Int32, Int32]),
+    ("getActuatorName", "ANC_getActuatorName", [Handle, Int32, String]),
+    ("getActuatorType", "ANC_getActuatorType", [Handle, Int32, Int32p]),
+    ("measureCapacitance", "ANC_measureCapacitance", [Handle, Int32, Doublep]),
+    ("saveParams", "ANC_saveParams", [Handle]),
+    ]
 
-#set error checking & handling
-discover.errcheck = checkError
-connect.errcheck = checkError
-disconnect.errcheck = checkError
-getDeviceConfig.errcheck = checkError
-getAxisStatus.errcheck = checkError
-setAxisOutput.errcheck = checkError
-setAmplitude.errcheck = checkError
-setFrequency.errcheck = checkError
-setDcVoltage.errcheck = checkError
-getAmplitude.errcheck = checkError
-getFrequency.errcheck = checkError
-startSingleStep.errcheck = checkError
-startContinousMove.errcheck = checkError
-startAutoMove.errcheck = checkError
-setTargetPosition.errcheck = checkError
-setTargetRange.errcheck = checkError
-getPosition.errcheck = checkError
-getFirmwareVersion.errcheck = checkError
-configureExtTrigger.errcheck = checkError
-configureAQuadBIn.errcheck = checkError
-configureAQuadBOut.errcheck = checkError
-configureRngTriggerPol.errcheck = checkError
-configureRngTrigger.errcheck = checkError
-configureRngTriggerEps.errcheck = checkError
-configureNslTrigger.errcheck = checkError
-configureNslTriggerAxis.errcheck = checkError
-selectActuator.errcheck = checkError
-getActuatorName.errcheck = checkError
-getActuatorType.errcheck = checkError
-measureCapacitance.errcheck = checkError
-saveParams.errcheck = checkError
+#functions that can safely be repeated after a failure (see pyanc350.errors.RetryPolicy): getters and absolute setters
+idempotent = ["getDeviceInfo", "getDeviceConfig", "getAxisStatus", "setAxisOutput", "setAmplitude", "setFrequency",
+    "setDcVoltage", "getAmplitude", "getFrequency", "setTargetPosition", "setTargetRange", "getPosition",
+    "getFirmwareVersion", "configureExtTrigger", "configureAQuadBIn", "configureAQuadBOut", "configureRngTriggerPol",
+    "configureRngTrigger", "configureRngTriggerEps", "configureNslTrigger", "configureNslTriggerAxis",
+    "getActuatorName", "getActuatorType"]
+
+#the dll is only loaded when the first function is used (see pyanc350.backend);
+#call load() first to use a specific path, ctypes library or Python stand-in
+backend = Backend("anc350v4", globals(), prototypes, checkError, idempotent=idempotent)
+load = backend.load
+
+def __getattr__(name):
+    if name == backend.name:
+        return backend.library if backend.library is not None else backend.load()
+    return backend.bind(name)
@@ -5,14 +5,14 @@
 #  It implements ANC350v4lib, which in turn depends on anc350v4.dll and libusb0.dll, which are provided by attocube in the
 #     ANC350_Library folder on the driver disc. Place all
 #     of these in the same folder as this module (and that of ANC350lib).
-#     This should also work with anc350v3.dll, although this has not been thoroughly checked.
+#     PyANC350v3 uses the same Positioner with anc350v3.dll.
 #
 #  Unlike ANC350v4lib which is effectively a re-imagining of the
 #    C++ header, PyANC350v4 is intended to behave as one might expect
 #    Python to. This means: returning values; behaving as an object.
 #
-#  At present this only addresses the first ANC350 connected to the
-#    machine.
+#  A Positioner addresses one ANC350, by default the first connected to
+#    the machine; DeviceManager discovers and connects all of them.
 #
 #  Usage:
 #  1. instantiate Positioner() class to begin, eg. pos = Positioner().
@@ -33,13 +33,44 @@
 #              http://nowack.lassp.cornell.edu/
 
 import pyanc350.v4.ANC350libv4 as ANC
-import ctypes, math
+import collections, ctypes, math
+from pyanc350.backend import OutParams
+from pyanc350.cache import ParamCache
+from pyanc350.motion import AdaptivePoller, MoveStats, stopped, waitFor, waitForMany
 
 class Positioner:
-    
-    def __init__(self):
-        self.discover()
-        self.device = self.connect()
+
+    #library module used by all methods; the v3 Positioner replaces it with ANC350libv3
+    ANC = ANC
+
+    #names of the actuator presets, by number (see selectActuator)
+    ACTUATORS = ('ANPg101res', 'ANGt101res', 'ANPx51res', 'ANPx101res', 'ANPx121res', 'ANPx122res',
+                 'ANPz51res', 'ANPz101res', 'ANR50res', 'ANR51res', 'ANR101res', 'Test')
+
+    #parameters invalidated by selectActuator
+    ACTUATOR_PARAMS = ('actuatorName', 'actuatorType', 'amplitude', 'frequency')
+
+    def __init__(self, library=None, devNo=0, connect=True, cache=False):
+        '''
+        Discovers the devices and connects device devNo (the first by default). library optionally selects the DLL (a path, a ctypes library or a Python stand-in); by default it is searched for when first needed. With connect=False nothing is discovered or connected; DeviceManager uses this to connect devices itself.
+
+        With cache=True the parameters written and the static data read are remembered (see refresh): setFrequency, setAmplitude, setTargetRange, selectActuator and the configure methods (A-Quad-B and trigger settings) skip values that are already set, and getActuatorName, getActuatorType, getDeviceConfig and getFirmwareVersion only call the library once. Only use it if nothing else changes the settings of the device.
+        '''
+        if library is not None:
+            self.ANC.load(library)
+        #output parameters of frequently used getters are allocated once per axis
+        self._actuatorType = OutParams(ctypes.c_int)
+        self._amplitude = OutParams(ctypes.c_double)
+        self._axisStatus = OutParams(*[ctypes.c_int]*7)
+        self._frequency = OutParams(ctypes.c_double)
+        self._position = OutParams(ctypes.c_double)
+        self._targets = {}
+        self.cache = ParamCache(cache)
+        self.devNo = devNo
+        self.device = None
+        if connect:
+            self.discover()
+            self.device = self.connect(devNo)
         
         
     def configureAQuadBIn(self, axisNo, enable, resolution):
@@ -52,7 +83,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.configureAQuadBIn(self.device, axisNo, enable, ctypes.c_double(resolution))
+        if self.cache.unchanged('aQuadBIn', axisNo, (enable, resolution)):
+            return
+        self.ANC.configureAQuadBIn(self.device, axisNo, enable, resolution)
+        self.cache.store('aQuadBIn', axisNo, (enable, resolution))
         
         
     def configureAQuadBOut(self, axisNo, enable, resolution, clock):
@@ -67,7 +101,10 @@ class Positioner:
         Returns/
             None
         '''
-        ANC.configureAQuadBOut(self.device, axisNo, enable, ctypes.c_double(resolution), ctypes.c_double(clock))
+        if self.cache.unchanged('aQuadBOut', axisNo, (enable, resolution, clock)):
+            return
+        self.ANC.configureAQuadBOut(self.device, axisNo, enable, resolution, clock)
+        self.cache.store('aQuadBOut', axisNo, (enable, resolution, clock))
        
     
     def configureExtTrigger(self, axisNo, mode):
@@ -80,7 +117,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.configureExtTrigger(self.device, axisNo, mode)
+        if self.cache.unchanged('extTrigger', axisNo, mode):
+            return
+        self.ANC.configureExtTrigger(self.device, axisNo, mode)
+        self.cache.store('extTrigger', axisNo, mode)
      
     
     def configureNslTrigger(self, enable):
@@ -92,7 +132,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.configureNslTrigger(self.device, enable)
+        if self.cache.unchanged('nslTrigger', None, enable):
+            return
+        self.ANC.configureNslTrigger(self.device, enable)
+        self.cache.store('nslTrigger', None, enable)
     
     
     def configureNslTriggerAxis(self, axisNo):
@@ -104,7 +147,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.configureNslTriggerAxis(self.device, axisNo)
+        if self.cache.unchanged('nslTriggerAxis', None, axisNo):
+            return
+        self.ANC.configureNslTriggerAxis(self.device, axisNo)
+        self.cache.store('nslTriggerAxis', None, axisNo)
       
     
     def configureRngTrigger(self, axisNo, lower, upper):
@@ -118,7 +164,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.configureRngTrigger(self.device, axisNo, lower, upper)
+        if self.cache.unchanged('rngTrigger', axisNo, (lower, upper)):
+            return
+        self.ANC.configureRngTrigger(self.device, axisNo, lower, upper)
+        self.cache.store('rngTrigger', axisNo, (lower, upper))
        
     
     def configureRngTriggerEps(self, axisNo, epsilon):
@@ -131,7 +180,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.configureRngTriggerEps(self.device, axisNo, epsilon)
+        if self.cache.unchanged('rngTriggerEps', axisNo, epsilon):
+            return
+        self.ANC.configureRngTriggerEps(self.device, axisNo, epsilon)
+        self.cache.store('rngTriggerEps', axisNo, epsilon)
         
         
     def configureRngTriggerPol(self, axisNo, polarity):
@@ -144,7 +196,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.configureRngTriggerPol(self.device, axisNo, polarity)
+        if self.cache.unchanged('rngTriggerPol', axisNo, polarity):
+            return
+        self.ANC.configureRngTriggerPol(self.device, axisNo, polarity)
+        self.cache.store('rngTriggerPol', axisNo, polarity)
        
     
     def connect(self, devNo=0):
@@ -157,7 +212,9 @@ class Positioner:
             device	Handle to the opened device, NULL on error
         '''
         device = ctypes.c_void_p()
-        ANC.connect(devNo, ctypes.byref(device))
+        self.ANC.connect(devNo, ctypes.byref(device))
+        self.ANC.backend.connections.add(device.value)
+        self.cache.invalidate()
         return device
         
         
@@ -170,7 +227,8 @@ class Positioner:
         Returns
             None
         '''
-        ANC.disconnect(self.device)
+        self.ANC.disconnect(self.device)
+        self.ANC.backend.connections.discard(self.device.value)
        
     
     def discover(self, ifaces=3):
@@ -184,8 +242,10 @@ class Positioner:
         Returns
             devCount	number of devices found
         '''
+        if self.ANC.backend.connections:
+            raise RuntimeError('discover must not be called while devices are connected ({} connected)'.format(len(self.ANC.backend.connections)))
         devCount = ctypes.c_int()
-        ANC.discover(ifaces, ctypes.byref(devCount))
+        self.ANC.discover(ifaces, ctypes.byref(devCount))
         return devCount.value
     
     
@@ -198,9 +258,14 @@ class Positioner:
         Returns
             name	Name of the actuator
         '''
+        hit, value = self.cache.lookup('actuatorName', axisNo)
+        if hit:
+            return value
         name = ctypes.create_string_buffer(20)
-        ANC.getActuatorName(self.device, axisNo, ctypes.byref(name))
-        return name.value.decode('utf-8')
+        self.ANC.getActuatorName(self.device, axisNo, name)
+        value = name.value.decode('utf-8')
+        self.cache.store('actuatorName', axisNo, value)
+        return value
         
         
     def getActuatorType(self, axisNo):
@@ -212,8 +277,12 @@ class Positioner:
         Returns
             type_	Type of the actuator {0: linear, 1: goniometer, 2: rotator}
         '''
-        type_ = ctypes.c_int()
-        ANC.getActuatorType(self.device, axisNo, ctypes.byref(type_))
+        hit, value = self.cache.lookup('actuatorType', axisNo)
+        if hit:
+            return value
+        type_, ref = self._actuatorType[axisNo]
+        self.ANC.getActuatorType(self.device, axisNo, ref)
+        self.cache.store('actuatorType', axisNo, type_.value)
         return type_.value
        
         
@@ -226,8 +295,8 @@ class Positioner:
         Returns
             amplitude	Amplitude V
         '''
-        amplitude = ctypes.c_double()
-        ANC.getAmplitude(self.device, axisNo, ctypes.byref(amplitude))
+        amplitude, ref = self._amplitude[axisNo]
+        self.ANC.getAmplitude(self.device, axisNo, ref)
         return amplitude.value
     
     
@@ -246,15 +315,8 @@ class Positioner:
             eotBwd	Output: If end of travel detected in backward direction.
             error	Output: If the axis' sensor is in error state.
         '''
-        connected = ctypes.c_int()
-        enabled = ctypes.c_int()
-        moving = ctypes.c_int()
-        target = ctypes.c_int()
-        eotFwd = ctypes.c_int()
-        eotBwd = ctypes.c_int()
-        error = ctypes.c_int()
-
-        ANC.getAxisStatus(self.device, axisNo, ctypes.byref(connected), ctypes.byref(enabled), ctypes.byref(moving), ctypes.byref(target), ctypes.byref(eotFwd), ctypes.byref(eotBwd), ctypes.byref(error))
+        (connected, enabled, moving, target, eotFwd, eotBwd, error), refs = self._axisStatus[axisNo]
+        self.ANC.getAxisStatus(self.device, axisNo, *refs)
         return connected.value, enabled.value, moving.value, target.value, eotFwd.value, eotBwd.value, error.value
     
     
@@ -270,15 +332,20 @@ class Positioner:
             featureDuty	"Duty": Duty cycle enabled (1) or disabled (0)
             featureApp	"App": Control by IOS app enabled (1) or disabled (0)
         '''
+        hit, value = self.cache.lookup('deviceConfig')
+        if hit:
+            return value
         features = ctypes.c_int()
-        ANC.getDeviceConfig(self.device, features)
+        self.ANC.getDeviceConfig(self.device, features)
         
         featureSync = 0x01&features.value
         featureLockin = (0x02&features.value)/2
         featureDuty = (0x04&features.value)/4
         featureApp = (0x08&features.value)/8
         
-        return featureSync, featureLockin, featureDuty, featureApp
+        value = featureSync, featureLockin, featureDuty, featureApp
+        self.cache.store('deviceConfig', None, value)
+        return value
 
     
     def getDeviceInfo(self, devNo=0):
@@ -300,7 +367,7 @@ class Positioner:
         address = ctypes.create_string_buffer(16) 
         connected = ctypes.c_int()
 
-        ANC.getDeviceInfo(devNo, ctypes.byref(devType), ctypes.byref(id_), ctypes.byref(serialNo), ctypes.byref(address), ctypes.byref(connected))
+        self.ANC.getDeviceInfo(devNo, ctypes.byref(devType), ctypes.byref(id_), serialNo, address, ctypes.byref(connected))
         return devType.value, id_.value, serialNo.value.decode('utf-8'), address.value.decode('utf-8'), connected.value
     
     
@@ -313,8 +380,12 @@ class Positioner:
         Returns
             version	Output: Version number
         '''
+        hit, value = self.cache.lookup('firmwareVersion')
+        if hit:
+            return value
         version = ctypes.c_int()
-        ANC.getFirmwareVersion(self.device, ctypes.byref(version))
+        self.ANC.getFirmwareVersion(self.device, ctypes.byref(version))
+        self.cache.store('firmwareVersion', None, version.value)
         return version.value
     
     
@@ -327,8 +398,8 @@ class Positioner:
         Returns
             frequency	Output: Frequency in Hz
         '''
-        frequency = ctypes.c_double()
-        ANC.getFrequency(self.device, axisNo, ctypes.byref(frequency))
+        frequency, ref = self._frequency[axisNo]
+        self.ANC.getFrequency(self.device, axisNo, ref)
         return frequency.value
     
     
@@ -341,8 +412,8 @@ class Positioner:
         Returns
             position	Output: Current position [m] or [°]
         '''
-        position = ctypes.c_double()
-        ANC.getPosition(self.device, axisNo, ctypes.byref(position))
+        position, ref = self._position[axisNo]
+        self.ANC.getPosition(self.device, axisNo, ref)
         return position.value
     
     
@@ -356,10 +427,109 @@ class Positioner:
             cap	Output: Capacitance [F]
         '''
         cap = ctypes.c_double()
-        ANC.measureCapacitance(self.device, axisNo, ctypes.byref(cap))
+        self.ANC.measureCapacitance(self.device, axisNo, ctypes.byref(cap))
         return cap.value
+
+
+    def moveTo(self, axisNo, target, targetRange=None, timeout=None, hold=False):
+        '''
+        Moves an axis to a target position by automatic motion and waits until it has arrived (see waitForTarget).
+
+        Parameters
+            axisNo	Axis number (0 ... 2)
+            target	Target position [m] or [°]
+            targetRange	Target range [m] or [°]; None keeps the current setting
+            timeout	Maximum time to wait [s], None to wait indefinitely. TimeoutError is raised when it is exceeded.
+            hold	Keep automatic motion enabled after arrival so the position is held. Default: False
+        Returns
+            stats	MoveStats(axis, target, position, arrived, elapsed, polls)
+        '''
+        if targetRange is not None:
+            self.setTargetRange(axisNo, targetRange)
+        self.setTargetPosition(axisNo, target)
+        self.startAutoMove(axisNo, 1, 0)
+        try:
+            stats = self.waitForTarget(axisNo, target, timeout)
+        except BaseException:
+            self.startAutoMove(axisNo, 0, 0)
+            raise
+        if not hold:
+            self.startAutoMove(axisNo, 0, 0)
+        return stats
    
 
+    def moveMany(self, targets, targetRange=None, timeout=None, synchronize=False, speeds=None, hold=False, probe=0.05):
+        '''
+        Moves several axes to their targets together: all targets are set and automatic motion is enabled back to back, then one loop polls all axes until each has arrived (see waitForTarget), so the move takes about as long as the slowest axis.
+
+        Parameters
+            targets	{axisNo: target} with targets in [m] or [°]
+            targetRange	Target range [m] or [°] for all axes, or {axisNo: targetRange}; None keeps the current settings
+            timeout	Maximum time to wait for all axes [s], None to wait indefinitely. TimeoutError is raised when it is exceeded.
+            synchronize	Lower the frequency of the faster axes so that all arrive at about the same time; the frequencies are restored afterwards
+            speeds	{axisNo: speed [m/s] or [°/s]} at the current frequencies, used by synchronize to set the frequencies before the start. Default: measured after the start, see probe
+            hold	Keep automatic motion enabled after arrival so the positions are held. Default: False
+            probe	Without speeds, synchronize measures the velocity of each axis twice over probe [s] after the start and lowers the frequencies of the faster axes after each measurement (the velocity is not quite proportional to the frequency)
+        Returns
+            stats	{axisNo: MoveStats(axis, target, position, arrived, elapsed, polls)}
+        '''
+        if targetRange is not None:
+            ranges = targetRange if isinstance(targetRange, dict) else dict.fromkeys(targets, targetRange)
+            for axisNo, axisRange in ranges.items():
+                self.setTargetRange(axisNo, axisRange)
+        restore = {}
+        synchronize = synchronize and len(targets) > 1
+        if synchronize:
+            frequencies = {axisNo: self.getFrequency(axisNo) for axisNo in targets}
+        if synchronize and speeds is not None:
+            times = {axisNo: abs(target - self.getPosition(axisNo))/speeds[axisNo] for axisNo, target in targets.items()}
+            slowest = max(times.values())
+            if slowest > 0:
+                for axisNo, time in times.items():
+                    frequency = max(1, int(frequencies[axisNo]*time/slowest))
+                    if frequency < frequencies[axisNo]:
+                        restore[axisNo] = frequencies[axisNo]
+                        self.setFrequency(axisNo, frequency)
+        try:
+            for axisNo, target in targets.items():
+                self.setTargetPosition(axisNo, target)
+            for axisNo in targets:
+                self.startAutoMove(axisNo, 1, 0)
+            try:
+                if synchronize and speeds is None:
+                    _synchronize(self, targets, frequencies, restore, probe)
+                polls = {axisNo: ((lambda axisNo=axisNo, target=target, state={}: self._pollTarget(axisNo, target, state)), AdaptivePoller(target))
+                         for axisNo, target in targets.items()}
+                results = waitForMany(self.ANC.backend.clock, polls, timeout)
+            except BaseException:
+                for axisNo in targets:
+                    self.startAutoMove(axisNo, 0, 0)
+                raise
+            if not hold:
+                for axisNo in targets:
+                    self.startAutoMove(axisNo, 0, 0)
+        finally:
+            for axisNo, frequency in restore.items():
+                self.setFrequency(axisNo, frequency)
+        stats = {}
+        for axisNo in targets:
+            arrived, position, elapsed, polls = results[axisNo]
+            stats[axisNo] = MoveStats(axisNo, targets[axisNo], position, arrived, elapsed, polls)
+        return stats
+
+
+    def refresh(self, axisNo=None):
+        '''
+        Forgets the cached parameters (see cache in __init__), eg. after they were changed by another program or at the device.
+
+        Parameters
+            axisNo	Axis number (0 ... 2), or None for all axes and the device data
+        Returns
+            None
+        '''
+        self.cache.invalidate(axisNo)
+        
+        
     def saveParams(self):
         '''
         Saves parameters to persistent flash memory in the device. They will be present as defaults after the next power-on. The following parameters are affected: Amplitude, frequency, actuator selections as well as Trigger and quadrature settings.
@@ -369,7 +539,7 @@ class Positioner:
         Returns
             None
         '''
-        ANC.saveParams(self.device)
+        self.ANC.saveParams(self.device)
     
     
     def selectActuator(self, axisNo, actuator):
@@ -394,7 +564,11 @@ class Positioner:
         Returns
             None
         '''
-        ANC.selectActuator(self.device, axisNo, actuator)
+        if self.cache.unchanged('actuator', axisNo, actuator):
+            return
+        self.ANC.selectActuator(self.device, axisNo, actuator)
+        self.cache.invalidate(axisNo, self.ACTUATOR_PARAMS)
+        self.cache.store('actuator', axisNo, actuator)
     
     
     def setAmplitude(self, axisNo, amplitude):
@@ -407,7 +581,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.setAmplitude(self.device, axisNo, ctypes.c_double(amplitude))
+        if self.cache.unchanged('amplitude', axisNo, amplitude):
+            return
+        self.ANC.setAmplitude(self.device, axisNo, amplitude)
+        self.cache.store('amplitude', axisNo, amplitude)
    
 
     def setAxisOutput(self, axisNo, enable, autoDisable):
@@ -421,7 +598,7 @@ class Positioner:
         Returns
             None
         '''
-        ANC.setAxisOutput(self.device, axisNo, enable, autoDisable)
+        self.ANC.setAxisOutput(self.device, axisNo, enable, autoDisable)
    
 
     def setDcVoltage(self, axisNo, voltage):
@@ -434,7 +611,7 @@ class Positioner:
         Returns
             None        
         '''
-        ANC.setDcVoltage(self.device, axisNo, ctypes.c_double(voltage))
+        self.ANC.setDcVoltage(self.device, axisNo, voltage)
  
 
     def setFrequency(self, axisNo, frequency):
@@ -447,7 +624,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.setFrequency(self.device, axisNo, ctypes.c_double(frequency))
+        if self.cache.unchanged('frequency', axisNo, frequency):
+            return
+        self.ANC.setFrequency(self.device, axisNo, frequency)
+        self.cache.store('frequency', axisNo, frequency)
         
    
     def setTargetPosition(self, axisNo, target):
@@ -460,7 +640,8 @@ class Positioner:
         Returns
             None
         '''
-        ANC.setTargetPosition(self.device, axisNo, ctypes.c_double(target))
+        self.ANC.setTargetPosition(self.device, axisNo, target)
+        self._targets[axisNo] = target
         
         
     def setTargetRange(self, axisNo, targetRg):
@@ -473,7 +654,10 @@ class Positioner:
         Returns
             None
         '''
-        ANC.setTargetRange(self.device, axisNo, ctypes.c_double(targetRg))
+        if self.cache.unchanged('targetRange', axisNo, targetRg):
+            return
+        self.ANC.setTargetRange(self.device, axisNo, targetRg)
+        self.cache.store('targetRange', axisNo, targetRg)
         
         
     def startAutoMove(self, axisNo, enable, relative):
@@ -487,7 +671,7 @@ class Positioner:
         Returns
             None
         '''
-        ANC.startAutoMove(self.device, axisNo, enable, relative)
+        self.ANC.startAutoMove(self.device, axisNo, enable, relative)
         
    
     def startContinuousMove(self, axisNo, start, backward):
@@ -501,7 +685,7 @@ class Positioner:
         Returns
             None
         '''
-        ANC.startContinousMove(self.device, axisNo, start, backward)
+        self.ANC.startContinousMove(self.device, axisNo, start, backward)
         
     def startSingleStep(self, axisNo, backward):
         '''
@@ -513,4 +697,210 @@ class Positioner:
         Returns
             None
         '''
-        ANC.startSingleStep(self.device, axisNo, backward)
+        self.ANC.startSingleStep(self.device, axisNo, backward)
+
+
+    def stepN(self, axisNo, n, backward, check=False):
+        '''
+        Moves n steps in one go: a single step for n = 1, otherwise a continuous move timed to n periods of the current frequency. Returns when the steps are done.
+
+        Parameters
+            axisNo	Axis number (0 ... 2)
+            n	Number of steps
+            backward	If the step direction is forward (0) or backward (1)
+            check	Read the position afterwards
+        Returns
+            position	Position [m] or [°] after the steps if check is set, otherwise None
+        '''
+        if n == 1:
+            self.startSingleStep(axisNo, backward)
+        elif n > 1:
+            clock = self.ANC.backend.clock
+            duration = n/self.getFrequency(axisNo)
+            self.startContinuousMove(axisNo, 1, backward)
+            try:
+                clock.sleep(duration)
+            finally:
+                self.startContinuousMove(axisNo, 0, backward)
+        return self.getPosition(axisNo) if check else None
+
+
+    def waitForTarget(self, axisNo, target=None, timeout=None):
+        '''
+        Waits until automatic motion has reached the target, as signalled by the target flag of getAxisStatus. The status is polled adaptively: rarely while the axis is far away, more often as it approaches, based on the velocity estimated from successive positions. The wait also ends if the output is disabled, the sensor reports an error, the axis runs into its end of travel or automatic motion was stopped (eg. by startAutoMove(axisNo, 0, 0) from another thread) before the target was reached.
+
+        Parameters
+            axisNo	Axis number (0 ... 2)
+            target	Target position [m] or [°]. Default: the last target set with setTargetPosition
+            timeout	Maximum time to wait [s], None to wait indefinitely. TimeoutError is raised when it is exceeded.
+        Returns
+            stats	MoveStats(axis, target, position, arrived, elapsed, polls)
+        '''
+        if target is None:
+            target = self._targets.get(axisNo)
+        state = {}
+        poll = lambda: self._pollTarget(axisNo, target, state)
+        arrived, position, elapsed, polls = waitFor(self.ANC.backend.clock, poll, AdaptivePoller(target), timeout)
+        return MoveStats(axisNo, target, position, arrived, elapsed, polls)
+
+
+    def _pollTarget(self, axisNo, target, state):
+        #one status read of waitForTarget: (finished, arrived, position); state is kept over the polls of one wait (see motion.stopped)
+        connected, enabled, moving, onTarget, eotFwd, eotBwd, error = self.getAxisStatus(axisNo)
+        position = self.getPosition(axisNo)
+        if onTarget:
+            return True, True, position
+        blocked = (eotFwd or eotBwd) if target is None else (eotFwd and target > position) or (eotBwd and target < position)
+        finished = not enabled or error or blocked or stopped(state, moving, self.ANC.backend.clock.time())
+        return finished, False, position
+
+
+def _synchronize(positioner, targets, frequencies, restore, probe):
+    #lowers the frequencies of the axes of moveMany that would arrive first, from velocities measured during the move; a function rather than a method, so that on a DeviceWorker each call is queued separately
+    clock = positioner.ANC.backend.clock
+    current = dict(frequencies)
+    for i in range(2):
+        before = {axisNo: positioner.getPosition(axisNo) for axisNo in targets}
+        start = clock.time()
+        clock.sleep(probe)
+        after = {axisNo: positioner.getPosition(axisNo) for axisNo in targets}
+        duration = clock.time() - start
+        times = {}
+        for axisNo, target in targets.items():
+            velocity = abs(after[axisNo] - before[axisNo])/duration if duration > 0 else 0
+            if velocity > 0:
+                times[axisNo] = abs(target - after[axisNo])/velocity
+        if len(times) < 2 or max(times.values()) <= 0:
+            return
+        slowest = max(times.values())
+        for axisNo, time in times.items():
+            frequency = min(frequencies[axisNo], max(1, int(current[axisNo]*time/slowest)))
+            if frequency != current[axisNo]:
+                restore[axisNo] = frequencies[axisNo]
+                positioner.setFrequency(axisNo, frequency)
+                current[axisNo] = frequency
+
+
+#description of a discovered device, see Positioner.getDeviceInfo
+DeviceInfo = collections.namedtuple('DeviceInfo', ['devNo', 'devType', 'id', 'serialNo', 'address', 'connected'])
+
+
+class DeviceManager:
+    '''
+    Discovers all ANC350 devices once and connects them concurrently, so bring-up takes as long as the slowest device rather than the sum of all of them.
+
+    Positioners are looked up by serial number or hardware ID: manager['L010000'] or manager[3].
+    '''
+
+    #Positioner class created for each device; the v3 DeviceManager replaces it
+    Positioner = Positioner
+
+    def __init__(self, library=None, ifaces=3, connect=True, strict=True, cache=False):
+        '''
+        Parameters
+            library	Library to load, see Positioner
+            ifaces	Interfaces where devices are to be searched. {None: 0, USB: 1, ethernet: 2, all:3} Default: 3
+            connect	Connect all devices found. Default: True
+            strict	If a device fails to connect, disconnect the others and raise the error. Otherwise failures are recorded in failed. Default: True
+            cache	Enable the parameter cache of the Positioners, see Positioner. Default: False
+        '''
+        if library is not None:
+            self.Positioner.ANC.load(library)
+        self.devices = []
+        self.positioners = {}
+        self.failed = {}
+        self.cache = cache
+        self.discover(ifaces)
+        if connect:
+            self.connect(strict=strict)
+
+
+    def discover(self, ifaces=3):
+        '''
+        Searches for devices and reads their information. Must not be called while any device is connected.
+
+        Parameters
+            ifaces	Interfaces where devices are to be searched. {None: 0, USB: 1, ethernet: 2, all:3} Default: 3
+        Returns
+            devices	List of DeviceInfo(devNo, devType, id, serialNo, address, connected)
+        '''
+        probe = self.Positioner(connect=False)
+        devCount = probe.discover(ifaces)
+        self.devices = [DeviceInfo(devNo, *probe.getDeviceInfo(devNo)) for devNo in range(devCount)]
+        return self.devices
+
+
+    def connect(self, strict=True):
+        '''
+        Connects every discovered device that is not connected yet (by this manager or another application), in parallel.
+
+        Parameters
+            strict	If a device fails to connect, disconnect the others and raise the error. Otherwise failures are recorded in failed. Default: True
+        Returns
+            positioners	Dict of the connected Positioners by serial number
+        '''
+        pending = [info for info in self.devices if not info.connected and info.serialNo not in self.positioners]
+        def open_(info):
+            positioner = self.Positioner(connect=False, devNo=info.devNo, cache=self.cache)
+            positioner.device = positioner.connect(info.devNo)
+            return positioner
+        if pending:
+            from concurrent.futures import ThreadPoolExecutor #kept out of the import path of the package
+            with ThreadPoolExecutor(len(pending), thread_name_prefix='anc350-connect') as executor:
+                futures = [(info, executor.submit(open_, info)) for info in pending]
+            for info, future in futures:
+                error = future.exception()
+                if error is None:
+                    self.positioners[info.serialNo] = future.result()
+                    self.failed.pop(info.serialNo, None)
+                else:
+                    self.failed[info.serialNo] = error
+            if strict and self.failed:
+                self.close()
+                raise next(iter(self.failed.values()))
+        return self.positioners
+
+
+    def close(self):
+        '''
+        Disconnects all devices of this manager, in parallel.
+        '''
+        positioners, self.positioners = list(self.positioners.values()), {}
+        if positioners:
+            from concurrent.futures import ThreadPoolExecutor #kept out of the import path of the package
+            with ThreadPoolExecutor(len(positioners), thread_name_prefix='anc350-disconnect') as executor:
+                for future in [executor.submit(positioner.disconnect) for positioner in positioners]:
+                    future.result()
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def info(self, key):
+        '''
+        Returns the DeviceInfo of the device with the given serial number (str) or hardware ID (int).
+        '''
+        for info in self.devices:
+            if (info.serialNo if isinstance(key, str) else info.id) == key:
+                return info
+        raise KeyError(key)
+
+
+    def __getitem__(self, key):
+        serialNo = self.info(key).serialNo
+        try:
+            return self.positioners[serialNo]
+        except KeyError:
+            raise KeyError('device {} is not connected'.format(key)) from None
+
+
+    def __iter__(self):
+        return iter(self.positioners.values())
+
+
+    def __len__(self):
+        return len(self.positioners)
@@ -0,0 +1,151 @@
+#
+#  wire is a compact binary encoding for the values passed to and
+#    returned from the libraries: None, bools, ints, floats, bytes, str,
+#    lists (tuples are encoded as lists) and dicts.
+#
+#  Each value is a one-byte tag followed by its data. Integers are
+#    zigzag varints, so small numbers (axis numbers, return codes, time
+#    deltas) take one or two bytes; floats are IEEE doubles:
+#
+#      data = encode([1, 'getPosition', 2.5e-3])
+#      value, end = decode(data)
+#
+
+import struct
+
+NONE, FALSE, TRUE, INT, FLOAT, BYTES, STR, LIST, DICT = range(9)
+
+_double = struct.Struct('<d')
+
+
+def encode(value, out=None):
+    '''
+    Appends the encoding of value to the bytearray out (a new one by default) and returns it.
+    '''
+    if out is None:
+        out = bytearray()
+    if value is None:
+        out.append(NONE)
+    elif value is True:
+        out.append(TRUE)
+    elif value is False:
+        out.append(FALSE)
+    elif isinstance(value, int):
+        out.append(INT)
+        _varint(out, (value << 1) ^ -1 if value < 0 else value << 1)
+    elif isinstance(value, float):
+        out.append(FLOAT)
+        out += _double.pack(value)
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(BYTES)
+        _varint(out, len(value))
+        out += value
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        out.append(STR)
+        _varint(out, len(data))
+        out += data
+    elif isinstance(value, (list, tuple)):
+        out.append(LIST)
+        _varint(out, len(value))
+        for item in value:
+            encode(item, out)
+    elif isinstance(value, dict):
+        out.append(DICT)
+        _varint(out, len(value))
+        for key, item in value.items():
+            encode(key, out)
+            encode(item, out)
+    else:
+        raise TypeError('cannot encode {!r}'.format(type(value).__name__))
+    return out
+
+
+def decode(data, offset=0):
+    '''
+    Decodes the value starting at offset. Returns (value, end), end being the offset after it.
+    '''
+    tag = data[offset]
+    offset += 1
+    if tag == NONE:
+        return None, offset
+    if tag == TRUE:
+        return True, offset
+    if tag == FALSE:
+        return False, offset
+    if tag == INT:
+        n, offset = readVarint(data, offset)
+        return (n >> 1) ^ -(n & 1), offset
+    if tag == FLOAT:
+        return _double.unpack_from(data, offset)[0], offset + 8
+    if tag in (BYTES, STR):
+        n, offset = readVarint(data, offset)
+        raw = bytes(data[offset:offset + n])
+        if len(raw) < n:
+            raise ValueError('truncated data')
+        return (raw.decode('utf-8') if tag == STR else raw), offset + n
+    if tag == LIST:
+        n, offset = readVarint(data, offset)
+        items = []
+        for i in range(n):
+            item, offset = decode(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == DICT:
+        n, offset = readVarint(data, offset)
+        items = {}
+        for i in range(n):
+            key, offset = decode(data, offset)
+            items[key], offset = decode(data, offset)
+        return items, offset
+    raise ValueError('unknown tag {} at offset {}'.format(tag, offset - 1))
+
+
+def _varint(out, n):
+    while n > 0x7f:
+        out.append(n & 0x7f | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def readVarint(data, offset=0):
+    '''
+    Reads an unsigned varint. Returns (n, end).
+    '''
+    n = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        n |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return n, offset
+        shift += 7
+
+
+def frame(value):
+    '''
+    Returns the encoding of value prefixed with its length as a varint, for streams of records.
+    '''
+    payload = encode(value)
+    out = bytearray()
+    _varint(out, len(payload))
+    return out + payload
+
+
+def readFrame(file):
+    '''
+    Reads one record written with frame from a binary file. Returns None at the end of the file; a record cut short (eg. by a crash while writing) counts as the end.
+    '''
+    n = shift = 0
+    while True:
+        byte = file.read(1)
+        if not byte:
+            return None
+        n |= (byte[0] & 0x7f) << shift
+        if not byte[0] & 0x80:
+            break
+        shift += 7
+    payload = file.read(n)
+    if len(payload) < n:
+        return None
+    return decode(payload)[0]
@@ -0,0 +1,182 @@
+#
+#  worker serializes access to one ANC350 from any number of threads.
+#
+#  A DeviceWorker owns a Positioner (v2, v3 or v4) and runs every call
+#    on its own thread, taking requests from a priority queue and
+#    returning futures. Stop commands run before queued commands, which
+#    run before queued reads, so a GUI stop button is not stuck behind a
+#    logger's reads:
+#
+#      worker = DeviceWorker(Positioner())
+#      future = worker.submit('getPosition', 0)   # from any thread
+#      worker.setFrequency(0, 200)                # blocking shorthand
+#      worker.moveTo(0, 1e-3)                     # polls through the queue
+#      worker.close()
+#
+#  A stop (stopMoving, stopApproach, startAutoMove/startContinuousMove
+#    with 0, disabling the output) also cancels the motion commands for
+#    the same axis that are still queued, so they cannot restart it.
+#
+
+import heapq, inspect, itertools, threading
+from concurrent.futures import Future
+
+#priorities: lower runs first
+STOP, COMMAND, READ = 0, 1, 2
+_CLOSE = 3
+
+#methods starting a motion, cancelled by a later stop of the same axis
+MOTION = frozenset(['startAutoMove', 'startContinuousMove', 'startSingleStep',
+    'moveAbsolute', 'moveRelative', 'moveContinuous', 'moveSingleStep', 'moveReference', 'updateAbsolute'])
+#methods that run on the calling thread with each of their library calls queued separately, so they do not block the worker
+COMPOSITE = frozenset(['moveTo', 'moveMany', 'waitForTarget', 'stepN'])
+
+
+def _bound(method, args, kwargs):
+    #the arguments of a call in the order of the signature of method, so keyword arguments count as well
+    if not kwargs or method is None:
+        return args
+    try:
+        return tuple(inspect.signature(method).bind(*args, **kwargs).arguments.values())
+    except (TypeError, ValueError):
+        return args
+
+
+def defaultPriority(name, args, kwargs=None, method=None):
+    '''
+    Returns the default priority of a call to the Positioner method name. Keyword arguments are taken into account if the method is given.
+    '''
+    args = _bound(method, args, kwargs)
+    if name in ('stopMoving', 'stopApproach'):
+        return STOP
+    if name in ('startAutoMove', 'startContinuousMove', 'setAxisOutput', 'setOutput') and len(args) > 1 and not args[1]:
+        return STOP
+    if name.startswith(('get', '_poll')) or name in ('capMeasure', 'measureCapacitance'):
+        return READ
+    return COMMAND
+
+
+class DeviceWorker:
+
+    def __init__(self, positioner, name='anc350-worker'):
+        '''
+        Parameters
+            positioner	Connected Positioner; once wrapped it must only be used through the worker
+            name	Name of the worker thread
+        '''
+        self.positioner = positioner
+        self.executed = 0
+        self.cancelled = 0
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+
+    def submit(self, method, *args, priority=None, **kwargs):
+        '''
+        Queues a call and returns a concurrent.futures.Future for its result.
+
+        Parameters
+            method	Name of a Positioner method, or a callable (run with the given args)
+            args	Arguments of the call
+            priority	STOP, COMMAND or READ; by default derived from the method name
+            kwargs	Keyword arguments of the call
+        Returns
+            future	Future of the result
+        '''
+        if isinstance(method, str):
+            name, func = method, getattr(self.positioner, method)
+        else:
+            name, func = getattr(method, '__name__', ''), method
+        bound = _bound(func, args, kwargs)
+        if priority is None:
+            priority = defaultPriority(name, bound)
+        future = Future()
+        if threading.current_thread() is self._thread:
+            # called from a job: queueing would deadlock
+            future.set_running_or_notify_cancel()
+            self._execute(future, func, args, kwargs)
+            return future
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('worker is closed')
+            axis = bound[0] if bound else None
+            if priority == STOP and bound:
+                self._cancelMotion(axis)
+            heapq.heappush(self._queue, (priority, next(self._seq), future, func, args, name, kwargs, axis))
+            self._cond.notify()
+        return future
+
+
+    def call(self, method, *args, priority=None, timeout=None, **kwargs):
+        '''
+        Queues a call and waits for its result; see submit.
+        '''
+        return self.submit(method, *args, priority=priority, **kwargs).result(timeout)
+
+
+    def __getattr__(self, name):
+        attribute = getattr(self.positioner, name)
+        if not callable(attribute):
+            return attribute
+        if name in COMPOSITE:
+            # run the Positioner's implementation with the worker standing in
+            # for the Positioner, so each of its library calls is queued
+            function = getattr(type(self.positioner), name)
+            return lambda *args, **kwargs: function(self, *args, **kwargs)
+        return lambda *args, **kwargs: self.submit(name, *args, **kwargs).result()
+
+
+    def close(self, cancel=False):
+        '''
+        Stops the worker after the queued calls have run, or after cancelling them if cancel is set.
+        '''
+        with self._cond:
+            if not self._closed:
+                self._closed = True
+                if cancel:
+                    for entry in self._queue:
+                        self.cancelled += entry[2].cancel()
+                heapq.heappush(self._queue, (_CLOSE, next(self._seq), None, None, None, None, None, None))
+                self._cond.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def _cancelMotion(self, axis):
+        for entry in self._queue:
+            if entry[5] in MOTION and entry[7] == axis and entry[0] != STOP:
+                self.cancelled += entry[2].cancel()
+
+
+    def _execute(self, future, func, args, kwargs):
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                priority, seq, future, func, args, name, kwargs, axis = heapq.heappop(self._queue)
+            if priority == _CLOSE:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._execute(future, func, args, kwargs)
+            self.executed += 1
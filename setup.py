@@ -12,7 +12,9 @@ setuptools.setup(
 	long_description = long_description,
 	long_description_content_type = "text/markdown",
 	url = "https://github.com/Laukei/attocube-ANC350-Python-library",
-	packages = setuptools.find_packages(),
+	packages = setuptools.find_packages(exclude=["tests"]),
+	extras_require = {
+		"numpy": ["numpy"]},
 	classifiers = [
 		"Programming Language :: Python :: 3",
 		"License :: OSI Approved :: MIT License",
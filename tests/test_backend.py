@@ -0,0 +1,83 @@
+#
+# Lazy loading of the libraries, and injecting the simulated library in their
+#   place
+#
+
+import subprocess, sys
+import pytest
+import pyanc350.v2.ANC350lib
+import pyanc350.v3.ANC350libv3
+import pyanc350.v4
+import pyanc350.v4.ANC350libv4 as ANC
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+
+
+def test_import_loads_nothing():
+    # a fresh interpreter, as the other tests load the simulator
+    code = '''if True:
+        import sys
+        import pyanc350
+        assert 'pyanc350.v4' not in sys.modules
+        import pyanc350.v2, pyanc350.v3, pyanc350.v4
+        assert pyanc350.v2.ANC350lib.backend.library is None
+        assert pyanc350.v3.ANC350libv3.backend.library is None
+        assert pyanc350.v4.ANC350libv4.backend.library is None
+        assert 'ctypes.util' not in sys.modules
+        '''
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        pyanc350.v5
+    with pytest.raises(AttributeError):
+        ANC.noSuchFunction
+
+
+def test_missing_library(tmp_path):
+    with pytest.raises(OSError):
+        ANC.load(tmp_path / 'anc350v4.dll')
+
+
+@pytest.mark.parametrize('lib', [pyanc350.v2.ANC350lib, pyanc350.v3.ANC350libv3, ANC])
+def test_load_stand_in(lib):
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    assert lib.load(sim) is sim
+    assert getattr(lib, lib.backend.name) is sim
+
+
+def test_functions_bound_on_first_use():
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    pos = pyanc350.v4.Positioner(library=sim)
+    assert 'measureCapacitance' not in vars(ANC)
+    pos.getPosition(0)
+    assert 'getPosition' in vars(ANC)
+    # loading another library drops the bound functions
+    other = SimulatedANC350(clock=VirtualClock(rate=None))
+    ANC.load(other)
+    assert 'getPosition' not in vars(ANC)
+    pos = pyanc350.v4.Positioner(library=other)
+    pos.getPosition(0)
+    assert other.calls['getPosition'] == 1
+    assert sim.calls['getPosition'] == 1
+    pos.disconnect()
+
+
+def test_wrapper():
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    pos = pyanc350.v4.Positioner(library=sim)
+    seen = []
+    def wrapper(alias, func):
+        def call(*args):
+            seen.append(alias)
+            return func(*args)
+        return call
+    ANC.backend.addWrapper(wrapper)
+    try:
+        pos.getPosition(0)
+    finally:
+        ANC.backend.removeWrapper(wrapper)
+    pos.getPosition(0)
+    assert seen == ['getPosition']
+    pos.disconnect()
@@ -0,0 +1,85 @@
+#
+# The parameter cache of the Positioners, counted by the calls reaching the
+#   simulated library
+#
+
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+def test_skips_repeated_writes(sim):
+    pos = pyanc350.v4.Positioner(library=sim, cache=True)
+    for i in range(3):
+        pos.setFrequency(0, 300)
+        pos.setAmplitude(0, 30)
+    pos.setFrequency(1, 300)
+    pos.setFrequency(0, 400)
+    assert sim.calls['setFrequency'] == 3
+    assert sim.calls['setAmplitude'] == 1
+    assert pos.cache.stats() == {'saved': 4, 'misses': 4}
+    assert pos.getFrequency(0) == 400
+    pos.disconnect()
+
+
+def test_disabled(sim):
+    pos = pyanc350.v4.Positioner(library=sim)
+    pos.setFrequency(0, 300)
+    pos.setFrequency(0, 300)
+    assert sim.calls['setFrequency'] == 2
+    assert pos.cache.stats() == {'saved': 0, 'misses': 0}
+    pos.disconnect()
+
+
+def test_static_data(sim):
+    pos = pyanc350.v4.Positioner(library=sim, cache=True)
+    assert pos.getFirmwareVersion() == pos.getFirmwareVersion()
+    assert pos.getActuatorName(0) == pos.getActuatorName(0)
+    assert sim.calls['getFirmwareVersion'] == 1
+    assert sim.calls['getActuatorName'] == 1
+    pos.disconnect()
+
+
+def test_select_actuator(sim):
+    pos = pyanc350.v4.Positioner(library=sim, cache=True)
+    pos.setFrequency(0, 300)
+    name = pos.getActuatorName(0)
+    pos.selectActuator(0, 8)
+    pos.selectActuator(0, 8)
+    assert sim.calls['selectActuator'] == 1
+    # the actuator brings its own parameters, so they are read and written again
+    assert pos.getActuatorName(0) != name
+    pos.setFrequency(0, 300)
+    assert sim.calls['getActuatorName'] == 2
+    assert sim.calls['setFrequency'] == 2
+    pos.disconnect()
+
+
+def test_refresh(sim):
+    pos = pyanc350.v4.Positioner(library=sim, cache=True)
+    pos.setFrequency(0, 300)
+    pos.setFrequency(1, 300)
+    # changed at the device
+    sim.devices[0].axes[0].frequency = 500
+    pos.refresh(0)
+    pos.setFrequency(0, 300)
+    pos.setFrequency(1, 300)
+    assert sim.calls['setFrequency'] == 3
+    assert pos.getFrequency(0) == 300
+    pos.disconnect()
+
+
+def test_v2(sim):
+    pos = pyanc350.v2.Positioner(library=sim, cache=True)
+    pos.amplitudeControl(0, 1)
+    pos.amplitudeControl(0, 1)
+    pos.amplitudeControl(0, 2)
+    assert sim.calls['AmplitudeControl'] == 2
+    pos.close()
@@ -0,0 +1,92 @@
+#
+# CoalescingReader in front of a v4 Positioner on the simulated library
+#
+
+import threading
+import pytest
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.coalesce import CoalescingReader
+from pyanc350.errors import CommTimeout
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+@pytest.fixture
+def pos(sim):
+    positioner = pyanc350.v4.Positioner(library=sim)
+    yield positioner
+    positioner.disconnect()
+
+
+def test_max_age(sim, pos):
+    reader = CoalescingReader(pos, maxAge=0.01)
+    calls = sim.calls.get('getPosition', 0)
+    assert reader.getPosition(0) == reader.getPosition(0) == pos.getPosition(0)
+    assert sim.calls['getPosition'] == calls + 2
+    sim.clock.sleep(0.02)
+    reader.getPosition(0)
+    assert sim.calls['getPosition'] == calls + 3
+    assert reader.stats() == {'hits': 1, 'shared': 0, 'misses': 2}
+
+
+def test_arguments_are_kept_apart(sim, pos):
+    reader = CoalescingReader(pos, maxAge=1)
+    reader.getAxisStatus(0)
+    reader.getAxisStatus(1)
+    reader.getAxisStatus(0)
+    assert reader.stats()['misses'] == 2
+
+
+def test_invalidate(sim, pos):
+    reader = CoalescingReader(pos, maxAge=1)
+    reader.getPosition(0)
+    reader.getPosition(1)
+    reader.invalidate(0)
+    reader.getPosition(0)
+    reader.getPosition(1)
+    assert reader.stats() == {'hits': 1, 'shared': 0, 'misses': 3}
+
+
+def test_other_methods_pass_through(sim, pos):
+    reader = CoalescingReader(pos, maxAge=1)
+    reader.setFrequency(0, 300)
+    assert reader.getFrequency(0) == reader.getFrequency(0) == 300
+    assert reader.stats()['misses'] == 0
+
+
+def test_reads_in_flight_are_shared():
+    # every call takes 1 s of simulated time, 10 ms of real time
+    sim = SimulatedANC350(clock=VirtualClock(rate=100))
+    pos = pyanc350.v4.Positioner(library=sim)
+    sim.latency = 1.0
+    reader = CoalescingReader(pos)
+    barrier = threading.Barrier(8)
+    results = []
+    def read():
+        barrier.wait()
+        results.append(reader.getPosition(0))
+    threads = [threading.Thread(target=read) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(results)) == 1 and len(results) == 8
+    assert sim.calls['getPosition'] < 8
+    assert reader.stats()['shared'] > 0
+    sim.latency = 0.0
+    pos.disconnect()
+
+
+def test_errors(sim, pos):
+    reader = CoalescingReader(pos, maxAge=1)
+    sim.inject('getPosition', 'timeout')
+    with pytest.raises(CommTimeout):
+        reader.getPosition(0)
+    # failures are not reused
+    reader.getPosition(0)
+    assert reader.stats()['misses'] == 2
@@ -0,0 +1,72 @@
+#
+# DeviceManager connecting several simulated devices
+#
+
+import pytest
+import pyanc350.v3
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.errors import DeviceLocked
+from pyanc350.simulator import SimulatedANC350
+
+
+def test_connect_all():
+    sim = SimulatedANC350(devices=3, clock=VirtualClock(rate=None))
+    with pyanc350.v4.DeviceManager(library=sim) as manager:
+        assert len(manager) == 3
+        assert [info.serialNo for info in manager.devices] == ['L010000', 'L010001', 'L010002']
+        assert manager['L010001'] is manager[1]
+        # each Positioner addresses its own device
+        manager[2].setFrequency(0, 123)
+        assert sim.devices[2].axes[0].frequency == 123
+        assert sim.devices[0].axes[0].frequency != 123
+        with pytest.raises(KeyError):
+            manager['L099999']
+    assert len(manager) == 0
+    assert not any(device.connected for device in sim.devices)
+
+
+def test_connect_in_parallel():
+    sim = SimulatedANC350(devices=4, clock=VirtualClock(rate=100), connectTime=1.0)
+    start = sim.clock.time()
+    with pyanc350.v4.DeviceManager(library=sim) as manager:
+        assert len(manager) == 4
+        # one connection time, not four
+        assert sim.clock.time() - start < 3.0
+
+
+def test_cache():
+    sim = SimulatedANC350(devices=2, clock=VirtualClock(rate=None))
+    with pyanc350.v4.DeviceManager(library=sim, cache=True) as manager:
+        assert all(positioner.cache.enabled for positioner in manager)
+
+
+def test_failed_device():
+    sim = SimulatedANC350(devices=2, clock=VirtualClock(rate=None))
+    sim.inject('connect', 'locked')
+    with pyanc350.v4.DeviceManager(library=sim, strict=False) as manager:
+        assert len(manager) == 1
+        serialNo, = manager.failed
+        assert isinstance(manager.failed[serialNo], DeviceLocked)
+        with pytest.raises(KeyError):
+            manager[serialNo]
+        # a later attempt connects the device
+        manager.connect()
+        assert len(manager) == 2
+        assert not manager.failed
+
+
+def test_failed_device_strict():
+    sim = SimulatedANC350(devices=2, clock=VirtualClock(rate=None))
+    sim.inject('connect', 'locked')
+    with pytest.raises(DeviceLocked):
+        pyanc350.v4.DeviceManager(library=sim)
+    # the device that did connect is released again
+    assert not any(device.connected for device in sim.devices)
+
+
+def test_v3():
+    sim = SimulatedANC350(devices=2, clock=VirtualClock(rate=None))
+    with pyanc350.v3.DeviceManager(library=sim) as manager:
+        assert len(manager) == 2
+        assert all(isinstance(positioner, pyanc350.v3.Positioner) for positioner in manager)
@@ -0,0 +1,96 @@
+#
+# Typed library errors, and RetryPolicy repeating calls that failed on the
+#   simulated library
+#
+
+import pytest
+import pyanc350.v2
+import pyanc350.v2.ANC350lib as NCB
+import pyanc350.v4
+import pyanc350.v4.ANC350libv4 as ANC
+from pyanc350 import errors
+from pyanc350.clock import VirtualClock
+from pyanc350.errors import RetryPolicy
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+@pytest.fixture
+def pos(sim):
+    positioner = pyanc350.v4.Positioner(library=sim)
+    yield positioner
+    positioner.disconnect()
+
+
+def test_hierarchy(pos):
+    with pytest.raises(errors.ParameterError) as info:
+        pos.setFrequency(0, 1e9)
+    error = info.value
+    assert isinstance(error, errors.OutOfRange) and isinstance(error, errors.ANC350Error)
+    assert error.code == ANC.ANC_OutOfRange
+    assert error.func == 'ANC_setFrequency'
+    assert error.arguments[1:] == (0, 1e9)
+    assert issubclass(errors.CommTimeout, errors.TransientError)
+    assert not issubclass(errors.OutOfRange, errors.TransientError)
+
+
+def test_retry(sim, pos):
+    with RetryPolicy(ANC.backend, delay=0.01, jitter=0) as retry:
+        sim.inject('getPosition', 'timeout', count=2)
+        start = sim.clock.time()
+        assert pos.getPosition(0) == 5e-3
+        # backoff on the clock of the library: 10 ms, then 20 ms
+        assert sim.clock.time() - start == pytest.approx(0.03)
+    assert sim.calls['getPosition'] == 3
+    assert retry.stats() == {'retries': 2, 'recovered': 1, 'failed': 0}
+
+
+def test_retry_gives_up(sim, pos):
+    with RetryPolicy(ANC.backend, attempts=3) as retry:
+        sim.inject('getPosition', 'timeout', count=10)
+        with pytest.raises(errors.CommTimeout):
+            pos.getPosition(0)
+    assert sim.calls['getPosition'] == 4
+    assert retry.stats() == {'retries': 3, 'recovered': 0, 'failed': 1}
+
+
+def test_only_idempotent_calls(sim, pos):
+    with RetryPolicy(ANC.backend):
+        # a step may have been made, so it is not repeated
+        sim.inject('startSingleStep', 'timeout')
+        with pytest.raises(errors.CommTimeout):
+            pos.startSingleStep(0, 0)
+        # only transient codes are retried
+        sim.inject('getPosition', 'axis')
+        with pytest.raises(errors.NoAxis):
+            pos.getPosition(0)
+    assert sim.calls['startSingleStep'] == 1
+    assert sim.calls['getPosition'] == 1
+
+
+def test_detach(sim, pos):
+    retry = RetryPolicy(ANC.backend)
+    retry.detach()
+    sim.inject('getPosition', 'timeout')
+    with pytest.raises(errors.CommTimeout):
+        pos.getPosition(0)
+    assert retry.stats()['retries'] == 0
+
+
+def test_waits():
+    retry = RetryPolicy(attempts=5, delay=0.1, factor=3, maxDelay=1.0, jitter=0)
+    assert list(retry.waits()) == pytest.approx([0.1, 0.3, 0.9, 1.0, 1.0])
+    retry.jitter = 0.5
+    assert 0.05 <= next(retry.waits()) <= 0.1
+
+
+def test_retry_v2(sim):
+    pos = pyanc350.v2.Positioner(library=sim)
+    with RetryPolicy(NCB.backend) as retry:
+        sim.inject('GetPosition', 'timeout')
+        pos.getPosition(0)
+    assert retry.stats()['recovered'] == 1
@@ -0,0 +1,56 @@
+#
+# Fly scans on the simulated library, with the v2 and the v4 Positioner
+#
+
+import numpy as np
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.flyscan import FlyScan
+from pyanc350.simulator import SimulatedANC350
+
+#position unit of each library in m
+UNITS = {'v2': 1e9, 'v4': 1.0}
+
+
+def positioner(library):
+    # time only passes when the scan sleeps, so the runs are repeatable
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    module = pyanc350.v2 if library == 'v2' else pyanc350.v4
+    return sim, module.Positioner(library=sim)
+
+
+@pytest.mark.parametrize('library', ['v2', 'v4'])
+def test_fly_scan(library):
+    sim, pos = positioner(library)
+    unit = UNITS[library]
+    axis = sim.devices[0].axes[0]
+    grid = np.linspace(5.0e-3, 5.02e-3, 11)*unit
+    # a detector reading the true position, which regridding should put back onto the grid
+    scan = FlyScan(pos, 0, grid, lambda: axis.read()*unit, lines=2, interval=0.02, timeout=60)
+    results = scan.run()
+    assert results.shape == (2, 11)
+    assert [line.backward for line in scan.lines] == [False, True]
+    assert np.abs(results - grid).max() < 1e-9*unit
+
+
+@pytest.mark.parametrize('library', ['v2', 'v4'])
+def test_fly_scan_end_of_travel(library):
+    sim, pos = positioner(library)
+    unit = UNITS[library]
+    sim.devices[0].axes[0].travel = (0.0, 5.01e-3)
+    scan = FlyScan(pos, 0, np.linspace(5.0e-3, 5.02e-3, 11)*unit, lambda: 0.0, interval=0.02, timeout=60)
+    with pytest.raises(RuntimeError, match='end of travel'):
+        scan.run()
+
+
+def test_status_is_not_read_per_sample():
+    sim, pos = positioner('v4')
+    grid = np.linspace(5.0e-3, 5.02e-3, 11)
+    scan = FlyScan(pos, 0, grid, lambda: 0.0, interval=0.001, timeout=60, check=0.01)
+    scan.run()
+    samples = len(scan.lines[0].values)
+    assert samples > 500
+    # a status read every 10 samples, besides those of the moves to the line start
+    assert sim.calls['getAxisStatus'] < samples/5
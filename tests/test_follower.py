@@ -0,0 +1,45 @@
+#
+# SetpointFollower on the simulated library, with the v2 and the v4
+#   Positioner
+#
+
+import numpy as np
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.follower import SetpointFollower
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.mark.parametrize('library', ['v2', 'v4'])
+def test_follow_ramp(library):
+    # the follower thread alone advances the time, so the run is repeatable
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    module = pyanc350.v2 if library == 'v2' else pyanc350.v4
+    pos = module.Positioner(library=sim)
+    unit = 1e9 if library == 'v2' else 1.0
+    setpoints = list(np.linspace(5.0e-3, 5.01e-3, 100)*unit) + [5.01e-3*unit]*50
+    if library == 'v2':
+        setpoints = [int(round(setpoint)) for setpoint in setpoints]
+    follower = SetpointFollower(pos, 0, rate=50, source=setpoints)
+    follower.start()
+    follower.join()
+    stats = follower.stats()
+    assert stats.ticks > 100
+    assert stats.sent > 50
+    # the axis followed the ramp to its end, not just the first setpoint
+    assert pos.getPosition(0) == pytest.approx(5.01e-3*unit, abs=2e-7*unit)
+    assert stats.maxError < 2e-6*unit
+
+
+def test_put():
+    sim = SimulatedANC350(clock=VirtualClock(rate=10))
+    pos = pyanc350.v4.Positioner(library=sim)
+    with SetpointFollower(pos, 0, rate=50) as follower:
+        follower.put(5.002e-3)
+        sim.clock.sleep(2.0)
+        follower.put(5.004e-3)
+        sim.clock.sleep(2.0)
+    assert follower.stats().sent == 2
+    assert pos.getPosition(0) == pytest.approx(5.004e-3, abs=2e-7)
@@ -0,0 +1,73 @@
+#
+# Getters reuse their output buffers per axis and still return plain values
+#
+
+import ctypes
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.backend import OutParams
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+def test_out_params():
+    single = OutParams(ctypes.c_int)
+    buffer, ref = single[0]
+    assert single[0] == (buffer, ref)
+    assert single[1][0] is not buffer
+    buffers, refs = OutParams(ctypes.c_int, ctypes.c_bool)[2]
+    assert [type(buffer) for buffer in buffers] == [ctypes.c_int, ctypes.c_bool]
+    assert len(refs) == 2
+
+
+def test_buffers_are_reused(sim):
+    pos = pyanc350.v4.Positioner(library=sim)
+    pos.getPosition(0)
+    buffer = pos._position[0][0]
+    pos.getPosition(0)
+    pos.getPosition(1)
+    assert pos._position[0][0] is buffer
+    assert pos._position[1][0] is not buffer
+    pos.disconnect()
+
+
+def test_values(sim):
+    pos = pyanc350.v4.Positioner(library=sim)
+    pos.setFrequency(0, 300)
+    pos.setFrequency(1, 700)
+    pos.setAmplitude(1, 25)
+    assert pos.getFrequency(0) == 300
+    assert pos.getFrequency(1) == 700
+    assert pos.getAmplitude(1) == 25
+    # the value returned is not the buffer, so later calls do not change it
+    first = pos.getPosition(0)
+    pos.startContinuousMove(0, 1, 0)
+    sim.clock.sleep(0.1)
+    pos.startContinuousMove(0, 0, 0)
+    assert pos.getPosition(0) > first
+    status = pos.getAxisStatus(0)
+    assert status == pos.getAxisStatus(0)
+    assert all(isinstance(flag, int) for flag in status)
+    pos.disconnect()
+
+
+def test_values_v2(sim):
+    pos = pyanc350.v2.Positioner(library=sim)
+    pos.frequency(0, 300)
+    pos.frequency(1, 700)
+    assert (pos.getFrequency(0), pos.getFrequency(1)) == (300, 700)
+    first = pos.getPosition(0)
+    buffer = pos._position[0][0]
+    pos.moveContinuous(0, 0)
+    sim.clock.sleep(0.1)
+    pos.stopApproach(0)
+    assert pos.getPosition(0) > first
+    assert pos._position[0][0] is buffer
+    position, valid = pos.getReference(0)
+    assert isinstance(position, int) and isinstance(valid, bool)
@@ -0,0 +1,85 @@
+#
+# Instrument recording the calls of a v4 Positioner into the simulated library
+#
+
+import json
+import pytest
+import pyanc350.v4
+import pyanc350.v4.ANC350libv4 as ANC
+from pyanc350.clock import VirtualClock
+from pyanc350.errors import CommTimeout
+from pyanc350.instrument import CallStats, Instrument
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+@pytest.fixture
+def pos(sim):
+    positioner = pyanc350.v4.Positioner(library=sim)
+    yield positioner
+    positioner.disconnect()
+
+
+def test_counts(sim, pos):
+    with Instrument(ANC.backend) as calls:
+        for axisNo in (0, 1, 2):
+            pos.getPosition(axisNo)
+        pos.setFrequency(0, 300)
+    pos.getPosition(0)
+    snapshot = calls.snapshot()
+    assert set(snapshot) == {'anc350v4.getPosition', 'anc350v4.setFrequency'}
+    stats = snapshot['anc350v4.getPosition']
+    assert stats['count'] == 3
+    assert stats['errors'] == {}
+    assert sum(stats['histogram'].values()) == 3
+    assert 0 < stats['mean'] <= stats['max'] and stats['p50'] <= stats['p99'] <= stats['max']
+
+
+def test_errors(sim, pos):
+    with Instrument(ANC.backend) as calls:
+        sim.inject('getPosition', 'timeout')
+        with pytest.raises(CommTimeout):
+            pos.getPosition(0)
+        pos.getPosition(0)
+    stats = calls.snapshot()['anc350v4.getPosition']
+    assert stats['count'] == 2
+    assert stats['errors'] == {'1': 1}
+
+
+def test_detach(pos):
+    calls = Instrument(ANC.backend)
+    assert ANC.backend.wrappers
+    calls.detach()
+    assert not ANC.backend.wrappers
+    pos.getPosition(0)
+    assert calls.snapshot() == {}
+    # the statistics survive a detach, and reset clears them
+    calls.attach(ANC.backend)
+    pos.getPosition(0)
+    calls.detach()
+    assert calls.snapshot()['anc350v4.getPosition']['count'] == 1
+    calls.reset()
+    assert calls.snapshot() == {}
+
+
+def test_report_and_dump(tmp_path, pos):
+    with Instrument(ANC.backend) as calls:
+        pos.getAxisStatus(0)
+    assert 'anc350v4.getAxisStatus' in calls.report().splitlines()[1]
+    calls.dump(str(tmp_path / 'calls.json'))
+    with open(tmp_path / 'calls.json') as f:
+        assert json.load(f) == calls.snapshot()
+
+
+def test_buckets():
+    stats = CallStats(4)
+    for latency in (500, 1500, 1500, 3000, 10**9):
+        stats.record(latency)
+    assert stats.buckets == [1, 2, 1, 1]
+    assert stats.percentile(0.5) == 2048e-9
+    assert stats.percentile(1.0) == 8192e-9
+    assert stats.max == 10**9
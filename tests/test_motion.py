@@ -0,0 +1,80 @@
+#
+# Blocking moves (moveTo, waitForTarget) and their adaptive polling, with the
+#   v2 and the v4 Positioner on the simulated library
+#
+
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.motion import AdaptivePoller
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+def test_poller():
+    poller = AdaptivePoller(target=10.0, minInterval=1e-3, maxInterval=0.5)
+    # no velocity yet: the interval grows from the minimum
+    assert poller.update(0.0, 0.0) == 2e-3
+    # 1 unit/s and 9 units to go: half of the remaining 9 s, capped
+    assert poller.update(1.0, 1.0) == 0.5
+    assert poller.update(9.99, 10.0) == pytest.approx(0.005, rel=0.1)
+    assert poller.update(10.0, 10.01) == 1e-3
+
+
+def test_move_to(sim):
+    pos = pyanc350.v4.Positioner(library=sim)
+    stats = pos.moveTo(0, 5.2e-3, targetRange=1e-7, timeout=100)
+    assert stats.arrived
+    assert stats.target == 5.2e-3
+    assert abs(stats.position - 5.2e-3) <= 1e-7
+    # polled adaptively, not at the shortest interval all the way
+    assert stats.polls < stats.elapsed/1e-3/10
+    # automatic motion is switched off after arrival unless it is held
+    assert pos.getAxisStatus(0)[2] == 0
+    pos.moveTo(0, 5.1e-3, timeout=100, hold=True)
+    assert pos.getAxisStatus(0)[3] == 1
+    pos.disconnect()
+
+
+def test_move_to_timeout(sim):
+    pos = pyanc350.v4.Positioner(library=sim)
+    start = sim.clock.time()
+    with pytest.raises(TimeoutError):
+        pos.moveTo(0, 9e-3, timeout=0.5)
+    assert sim.clock.time() - start == pytest.approx(0.5)
+    # the move is stopped when the wait fails
+    position = pos.getPosition(0)
+    sim.clock.sleep(1)
+    assert pos.getPosition(0) == position
+    pos.disconnect()
+
+
+def test_wait_without_motion(sim):
+    pos = pyanc350.v4.Positioner(library=sim)
+    stats = pos.waitForTarget(0, 9e-3, timeout=10)
+    assert not stats.arrived
+    assert stats.elapsed < 1
+    pos.disconnect()
+
+
+def test_wait_ends_at_end_of_travel(sim):
+    pos = pyanc350.v4.Positioner(library=sim)
+    # beyond the travel of the axis (0 ... 10 mm)
+    stats = pos.moveTo(0, 11e-3, timeout=1000)
+    assert not stats.arrived
+    assert stats.position == 10e-3
+    pos.disconnect()
+
+
+def test_move_to_v2(sim):
+    pos = pyanc350.v2.Positioner(library=sim)
+    stats = pos.moveTo(0, 5200000, targetRange=100, timeout=100)
+    assert stats.arrived
+    assert abs(pos.getPosition(0) - 5200000) <= 100
+    stats = pos.moveTo(0, 11000000, targetRange=100, timeout=1000)
+    assert not stats.arrived
@@ -0,0 +1,64 @@
+#
+# Coordinated moves of several axes (moveMany) on the simulated library
+#
+
+import pytest
+import pyanc350.v3
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+
+TARGETS = {0: 5.1e-3, 1: 6e-3, 2: 4.5e-3}
+
+
+@pytest.fixture
+def pos():
+    positioner = pyanc350.v4.Positioner(library=SimulatedANC350(clock=VirtualClock(rate=None)))
+    yield positioner
+    positioner.disconnect()
+
+
+def spread(stats):
+    elapsed = [stat.elapsed for stat in stats.values()]
+    return max(elapsed)/min(elapsed)
+
+
+def test_move_many(pos):
+    stats = pos.moveMany(TARGETS, targetRange=1e-7, timeout=1000)
+    assert all(stat.arrived for stat in stats.values())
+    for axisNo, target in TARGETS.items():
+        assert abs(pos.getPosition(axisNo) - target) <= 1e-7
+    # each axis finishes at its own pace
+    assert spread(stats) > 5
+
+
+def test_synchronize(pos):
+    stats = pos.moveMany(TARGETS, targetRange=1e-7, timeout=1000, synchronize=True)
+    assert all(stat.arrived for stat in stats.values())
+    assert spread(stats) < 1.5
+    # the frequencies are restored
+    assert [pos.getFrequency(axisNo) for axisNo in TARGETS] == [1000]*3
+
+
+def test_synchronize_with_speeds(pos):
+    # the axes are alike, so only the ratio of the speeds matters
+    speeds = dict.fromkeys(TARGETS, 3e-5)
+    stats = pos.moveMany(TARGETS, targetRange=1e-7, timeout=1000, synchronize=True, speeds=speeds)
+    assert all(stat.arrived for stat in stats.values())
+    assert spread(stats) < 1.5
+    assert [pos.getFrequency(axisNo) for axisNo in TARGETS] == [1000]*3
+
+
+def test_timeout(pos):
+    with pytest.raises(TimeoutError):
+        pos.moveMany(TARGETS, timeout=1, synchronize=True)
+    # the axes are stopped and the frequencies restored
+    assert [pos.getAxisStatus(axisNo)[2] for axisNo in TARGETS] == [0]*3
+    assert [pos.getFrequency(axisNo) for axisNo in TARGETS] == [1000]*3
+
+
+def test_v3():
+    pos = pyanc350.v3.Positioner(library=SimulatedANC350(clock=VirtualClock(rate=None)))
+    stats = pos.moveMany(TARGETS, targetRange=1e-7, timeout=1000, synchronize=True)
+    assert all(stat.arrived for stat in stats.values())
+    pos.disconnect()
@@ -0,0 +1,68 @@
+#
+# Calibrating a StepModel and dead reckoning with OpenLoopAxis on the
+#   simulated library
+#
+
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.openloop import OpenLoopAxis, StepModel
+from pyanc350.simulator import SimulatedANC350
+
+#position unit of each library in m
+UNITS = {'v2': 1e9, 'v4': 1.0}
+
+
+def positioner(library):
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    module = pyanc350.v2 if library == 'v2' else pyanc350.v4
+    return sim, module.Positioner(library=sim)
+
+
+@pytest.mark.parametrize('library', ['v2', 'v4'])
+def test_calibrate(library):
+    sim, pos = positioner(library)
+    model = StepModel()
+    actuator = model.calibrate(pos, 0, frequencies=(200, 1000), amplitudes=(30, 45), steps=20)
+    axis = sim.devices[0].axes[0]
+    for frequency in (200, 1000):
+        axis.frequency, axis.amplitude = frequency, 45.0
+        # v2 positions are whole nm
+        assert model.step(actuator, frequency, 45, 0) == pytest.approx(axis.step()*UNITS[library], abs=0.05)
+        assert model.step(actuator, frequency, 45, 1) == pytest.approx(axis.step(True)*UNITS[library], abs=0.05)
+    assert model.step(actuator, 1000, 37.5, 0) == pytest.approx((model.step(actuator, 1000, 30, 0) + model.step(actuator, 1000, 45, 0))/2)
+
+
+def test_save_and_load(tmp_path):
+    model = StepModel({'ANPx101res': [(1000, 30, 0, 3.7e-8), (1000, 30, 1, 3.3e-8)]})
+    model.save(str(tmp_path/'steps.json'))
+    assert StepModel.load(str(tmp_path/'steps.json')).table == model.table
+
+
+@pytest.mark.parametrize('library', ['v2', 'v4'])
+def test_move_by(library):
+    sim, pos = positioner(library)
+    unit = UNITS[library]
+    model = StepModel()
+    actuator = model.calibrate(pos, 0, frequencies=(1000,), amplitudes=(30,), steps=20)
+    start = pos.getPosition(0)
+    axis = OpenLoopAxis(pos, 0, model, actuator, position=start)
+    axis.moveBy(2e-6*unit)
+    axis.moveBy(-0.5e-6*unit)
+    # counted steps land where the model predicts, to a fraction of a step
+    assert pos.getPosition(0) == pytest.approx(axis.position, abs=0.05e-6*unit)
+    assert axis.position == pytest.approx(start + 1.5e-6*unit, abs=0.05e-6*unit)
+
+
+def test_long_moves_use_step_n():
+    sim, pos = positioner('v4')
+    model = StepModel()
+    actuator = model.calibrate(pos, 0, frequencies=(1000,), amplitudes=(30,), steps=20)
+    axis = OpenLoopAxis(pos, 0, model, actuator, counted=10)
+    singleSteps = sim.calls.get('startSingleStep', 0)
+    axis.moveBy(5*model.step(actuator, 1000, 30, 0))
+    assert sim.calls['startSingleStep'] == singleSteps + 5
+    axis.moveBy(50*model.step(actuator, 1000, 30, 0))
+    assert sim.calls['startSingleStep'] == singleSteps + 5
+    assert axis.steps == 55
@@ -0,0 +1,56 @@
+#
+# Planning the order of unordered targets, and visiting them on the
+#   simulated library
+#
+
+import numpy as np
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.planner import PointTour, measureSpeed, nearestNeighbour, pathTime, plan
+from pyanc350.simulator import SimulatedANC350
+
+
+def test_plan_shortens_the_path():
+    points = np.random.default_rng(1).uniform(0, 1, (200, 2))
+    speeds = [1.0, 2.0]
+    order = plan(points, speeds, start=[0, 0])
+    assert sorted(order) == list(range(200))
+    assert pathTime(points, order, speeds, [0, 0]) < 0.3*pathTime(points, np.arange(200), speeds, [0, 0])
+
+
+def test_empty():
+    assert len(nearestNeighbour(np.empty((0, 2)), [1, 1])) == 0
+    assert len(plan(np.empty((0, 2)), [1, 1], start=[0, 0])) == 0
+    assert len(plan([[1.0, 2.0]], [1, 1], start=[0, 0])) == 1
+
+
+def test_measure_speed():
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    axis = sim.devices[0].axes[0]
+    pos = pyanc350.v4.Positioner(library=sim)
+    assert measureSpeed(pos, 0) == pytest.approx(axis.velocity())
+    pos.disconnect()
+    assert measureSpeed(pyanc350.v2.Positioner(library=sim), 0) == pytest.approx(axis.velocity()*1e9, abs=1)
+
+
+def test_measure_speed_without_sensor():
+    sim = SimulatedANC350(clock=VirtualClock(rate=None), sensor=False)
+    pos = pyanc350.v4.Positioner(library=sim)
+    with pytest.raises(RuntimeError):
+        measureSpeed(pos, 0)
+    assert measureSpeed(pos, 0, fallback=1e-5) == 1e-5
+    # an axis whose speed is given is not measured
+    assert PointTour(pos, (0, 1), [[0.0, 0.0]], lambda index, point: None, speeds=[1e-5, 1e-5]).speeds.tolist() == [1e-5, 1e-5]
+
+
+def test_point_tour():
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    pos = pyanc350.v4.Positioner(library=sim)
+    points = [[5.01e-3, 5.0e-3], [4.99e-3, 5.01e-3], [5.0e-3, 5.0e-3], [5.01e-3, 5.01e-3]]
+    tour = PointTour(pos, (0, 1), points, lambda index, point: (pos.getPosition(0), pos.getPosition(1)), targetRange=1e-6, timeout=60)
+    assert tour.predicted <= tour.sequential
+    results = tour.run()
+    assert np.allclose(results, points, atol=1e-6)
+    assert PointTour(pos, (0, 1), np.empty((0, 2)), lambda index, point: None).run() == []
@@ -0,0 +1,77 @@
+#
+# Saving and applying configuration profiles on the simulated library
+#
+
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350 import profiles
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+def test_round_trip(sim, tmp_path):
+    pos = pyanc350.v4.Positioner(library=sim, cache=True)
+    pos.setFrequency(1, 400)
+    pos.configureAQuadBOut(0, 1, 1e-8, 1e-6)
+    profile = profiles.snapshot(pos)
+    assert profile['axes']['0']['aQuadBOut'] == [1, 1e-8, 1e-6]
+    for name in ('profile.json', 'profile.toml'):
+        profiles.save(profile, str(tmp_path/name))
+        assert profiles.load(str(tmp_path/name)) == profile
+    stats = profiles.apply(pos, profile)
+    assert (stats.written, stats.saved) == (0, False)
+    assert profiles.diff(pos, profile) == []
+
+
+def test_apply_writes_differences_and_saves(sim):
+    pos = pyanc350.v4.Positioner(library=sim, cache=True)
+    profile = profiles.snapshot(pos)
+    profile['axes']['1']['frequency'] = 700.0
+    assert profiles.diff(pos, profile) == [('axes', 1, 'frequency', 1000.0, 700.0)]
+    stats = profiles.apply(pos, profile)
+    assert (stats.written, stats.saved) == (1, True)
+    assert pos.getFrequency(1) == 700
+    assert sim.devices[0].flashWrites == 1
+    assert profiles.apply(pos, profile).saved is False
+    assert sim.devices[0].flashWrites == 1
+
+
+def test_unknown_settings_do_not_save(sim):
+    pos = pyanc350.v4.Positioner(library=sim, cache=True)
+    pos.configureAQuadBOut(0, 1, 1e-8, 1e-6)
+    profile = profiles.snapshot(pos)
+    pos.disconnect()
+    for i in range(2):
+        # a new Positioner does not know the A-Quad-B setting of the device
+        fresh = pyanc350.v4.Positioner(library=sim, cache=True)
+        stats = profiles.apply(fresh, profile)
+        assert (stats.written, stats.saved) == (1, False)
+        assert profiles.apply(fresh, profile).written == 0
+        fresh.disconnect()
+    assert sim.devices[0].flashWrites == 0
+
+
+def test_apply_needs_cache(sim):
+    pos = pyanc350.v4.Positioner(library=sim)
+    with pytest.raises(ValueError):
+        profiles.apply(pos, profiles.snapshot(pos))
+
+
+def test_v2(sim):
+    pos = pyanc350.v2.Positioner(library=sim, cache=True)
+    pos.dutyCycleEnable(1)
+    profile = profiles.snapshot(pos)
+    assert profile['library'] == 'v2'
+    assert profile['device']['dutyCycleEnable'] is True
+    profile['axes']['0']['frequency'] = 600
+    stats = profiles.apply(pos, profile)
+    assert (stats.written, stats.saved) == (1, False)
+    assert pos.getFrequency(0) == 600
+    with pytest.raises(ValueError):
+        profiles.apply(pyanc350.v4.Positioner(library=SimulatedANC350(), cache=True), profile)
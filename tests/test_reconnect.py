@@ -0,0 +1,62 @@
+#
+# Reconnector on the simulated library: unplugging and resetting the
+#   controller and restoring its configuration
+#
+
+import pytest
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.errors import NotConnected
+from pyanc350.reconnect import Reconnector
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+@pytest.mark.parametrize('cache', [False, True])
+def test_restore_after_reset(sim, cache):
+    pos = pyanc350.v4.Positioner(library=sim, cache=cache)
+    pos.selectActuator(1, 7)
+    reconnector = Reconnector(pos, deadline=5)
+    reconnector.setFrequency(0, 700)
+    reconnector.setAmplitude(0, 40)
+    reconnector.setTargetRange(0, 1e-6)
+    axis = sim.devices[0].axes[1]
+    sim.unplug(0, downtime=0.5)
+    # the device comes back with other presets
+    axis.selectActuator(2)
+    assert reconnector.getPosition(0) == pytest.approx(5e-3)
+    assert len(reconnector.history) == 1
+    assert axis.actuator == 7
+    assert pos.getActuatorName(1) == 'ANPz101res'
+    assert (pos.getFrequency(0), pos.getAmplitude(0)) == (700, 40)
+    assert sim.devices[0].axes[0].targetRange == 1e-6
+
+
+def test_keyword_arguments(sim):
+    reconnector = Reconnector(pyanc350.v4.Positioner(library=sim), deadline=5)
+    reconnector.setFrequency(1, frequency=650)
+    reconnector.setAxisOutput(axisNo=2, enable=0, autoDisable=0)
+    assert reconnector.config[('frequency', 1)] == 650
+    assert reconnector.config[('output', 2)] == (0, 0)
+    stats = reconnector.moveTo(0, 5.05e-3, timeout=30)
+    assert stats.arrived
+
+
+def test_relative_moves_are_not_repeated(sim):
+    reconnector = Reconnector(pyanc350.v4.Positioner(library=sim), deadline=5)
+    sim.unplug(0, downtime=0.5)
+    with pytest.raises(NotConnected):
+        reconnector.startAutoMove(0, enable=1, relative=1)
+    assert len(reconnector.history) == 1
+    reconnector.startAutoMove(0, 0, 0)
+
+
+def test_deadline(sim):
+    reconnector = Reconnector(pyanc350.v4.Positioner(library=sim), deadline=1)
+    sim.unplug(0)
+    with pytest.raises(TimeoutError):
+        reconnector.getPosition(0)
@@ -0,0 +1,45 @@
+#
+# Raster scans on the simulated library, with the v2 and the v4 Positioner
+#
+
+import numpy as np
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.scan import RasterScan, serpentine
+from pyanc350.simulator import SimulatedANC350
+
+#position unit of each library in m
+UNITS = {'v2': 1e9, 'v4': 1.0}
+
+
+def positioner(library):
+    # time only passes when the scan sleeps, so the runs are repeatable
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    module = pyanc350.v2 if library == 'v2' else pyanc350.v4
+    return sim, module.Positioner(library=sim)
+
+
+def test_serpentine():
+    indices = serpentine((3, 4))
+    assert len(indices) == 12
+    assert len({tuple(index) for index in indices}) == 12
+    assert (np.abs(np.diff(indices, axis=0)).sum(axis=1) == 1).all()
+
+
+@pytest.mark.parametrize('library', ['v2', 'v4'])
+def test_raster_scan(library):
+    sim, pos = positioner(library)
+    unit = UNITS[library]
+    xs = np.linspace(4.98e-3, 5.02e-3, 3)*unit
+    ys = np.linspace(5.0e-3, 5.01e-3, 2)*unit
+    scan = RasterScan(pos, (0, 1), (xs, ys), lambda index, point: point, targetRange=1e-6*unit, timeout=60)
+    results = scan.run()
+    assert results.shape == (3, 2, 2)
+    assert scan.missed == []
+    if library == 'v2':
+        # the v2 library takes integer positions
+        assert results.dtype == np.int64
+    assert results[2, 1] == pytest.approx([xs[2], ys[1]], abs=1e-9*unit)
+    assert pos.getPosition(0) == pytest.approx(xs[2], abs=1e-6*unit)
@@ -0,0 +1,86 @@
+#
+# Server and RemotePositioner over loopback TCP, with a v4 Positioner on the
+#   simulated library
+#
+
+import threading, time
+import pytest
+import pyanc350.v2
+import pyanc350.v3
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.errors import OutOfRange
+from pyanc350.motion import MoveStats
+from pyanc350.server import RemotePositioner, Server
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def remote():
+    positioner = pyanc350.v4.Positioner(library=SimulatedANC350(clock=VirtualClock(rate=100)))
+    with Server(positioner, ('127.0.0.1', 0)) as server, RemotePositioner(server.address, timeout=30) as pos:
+        yield pos
+    positioner.disconnect()
+
+
+def test_call(remote):
+    remote.setFrequency(0, 300)
+    assert remote.getFrequency(0) == 300
+    assert remote.library == 'v4'
+
+
+def test_keyword_arguments(remote):
+    stats = remote.moveTo(0, 5.05e-3, timeout=20)
+    assert isinstance(stats, MoveStats)
+    assert stats.arrived
+    assert stats.position == pytest.approx(5.05e-3, abs=1e-6)
+
+
+def test_batch(remote):
+    with remote.batch() as batch:
+        batch.setAmplitude(1, 30)
+        amplitude = batch.getAmplitude(1)
+        status = batch.getAxisStatus(axisNo=1)
+        failed = batch.setFrequency(1, 1e9)
+    assert amplitude.result(10) == 30
+    assert len(status.result(10)) == 7
+    with pytest.raises(OutOfRange):
+        failed.result(10)
+
+
+def test_pipelining(remote):
+    futures = [remote.submit('getPosition', axis) for axis in (0, 1, 2)]*20
+    assert [future.result(10) for future in futures[:3]] == [future.result(10) for future in futures[-3:]]
+
+
+def test_errors(remote):
+    with pytest.raises(OutOfRange):
+        remote.setFrequency(0, 1e9)
+    with pytest.raises(AttributeError):
+        remote.connect
+    with pytest.raises(AttributeError):
+        remote.submit('connect', 0)
+    with pytest.raises(AttributeError):
+        with remote.batch() as batch:
+            batch.disconnect()
+
+
+def test_stop(remote):
+    results = []
+    mover = threading.Thread(target=lambda: results.append(remote.moveTo(0, 1e-3, timeout=600)))
+    mover.start()
+    time.sleep(0.3)
+    # runs right away, although the moveTo of this connection has not finished
+    remote.startAutoMove(0, enable=0, relative=0)
+    mover.join(30)
+    assert not mover.is_alive()
+    assert not results[0].arrived
+    assert results[0].position > 2e-3
+
+
+@pytest.mark.parametrize('module, library', [(pyanc350.v2, 'v2'), (pyanc350.v3, 'v3'), (pyanc350.v4, 'v4')])
+def test_library(module, library):
+    positioner = module.Positioner(library=SimulatedANC350(clock=VirtualClock(rate=100)))
+    with Server(positioner, ('127.0.0.1', 0)) as server, RemotePositioner(server.address, timeout=30) as pos:
+        assert pos.library == library
+        assert pos.getFrequency(0) == 1000
@@ -0,0 +1,144 @@
+#
+# The model behind SimulatedANC350 and the VirtualClock it runs on
+#
+
+import time
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350 import errors
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    # time only passes when something sleeps, so the runs are repeatable
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+@pytest.fixture
+def pos(sim):
+    return pyanc350.v4.Positioner(library=sim)
+
+
+def singleStep(pos, backward=False):
+    start = pos.getPosition(0)
+    pos.startSingleStep(0, backward)
+    return abs(pos.getPosition(0) - start)
+
+
+def test_step_against_amplitude(pos):
+    pos.setFrequency(0, 100)
+    pos.setAmplitude(0, 20)
+    low = singleStep(pos)
+    pos.setAmplitude(0, 40)
+    high = singleStep(pos)
+    # the step grows with the amplitude above the threshold of 5 V
+    assert high == pytest.approx(low*35/15)
+    pos.setAmplitude(0, 4)
+    assert singleStep(pos) == 0
+
+
+def test_step_against_frequency(pos):
+    pos.setFrequency(0, 100)
+    slow = singleStep(pos)
+    pos.setFrequency(0, 4000)
+    assert singleStep(pos) < slow/2
+
+
+def test_backward_steps_are_shorter(pos):
+    forward = singleStep(pos)
+    assert singleStep(pos, backward=True) == pytest.approx(0.9*forward)
+
+
+def test_end_of_travel(sim, pos):
+    pos.startContinuousMove(0, 1, 0)
+    sim.clock.sleep(1000)
+    assert pos.getPosition(0) == 10e-3
+    connected, enabled, moving, target, eotFwd, eotBwd, error = pos.getAxisStatus(0)
+    assert (moving, eotFwd, eotBwd) == (0, 1, 0)
+    # moving away clears the flag
+    pos.startContinuousMove(0, 1, 1)
+    sim.clock.sleep(1)
+    pos.startContinuousMove(0, 0, 1)
+    assert pos.getAxisStatus(0)[4:6] == (0, 0)
+    assert pos.getPosition(0) < 10e-3
+
+
+def test_end_of_travel_v2(sim):
+    pos = pyanc350.v2.Positioner(library=sim)
+    pos.moveContinuous(0, 1)
+    sim.clock.sleep(1000)
+    assert pos.getPosition(0) == 0
+    assert pos.getStatus(0) & 2
+
+
+def test_auto_move_stops_in_target_range(sim, pos):
+    pos.setTargetRange(0, 1e-6)
+    pos.setTargetPosition(0, 5.1e-3)
+    pos.startAutoMove(0, 1, 0)
+    sim.clock.sleep(0.1)
+    assert pos.getAxisStatus(0)[2:4] == (1, 0)
+    sim.clock.sleep(100)
+    connected, enabled, moving, target, eotFwd, eotBwd, error = pos.getAxisStatus(0)
+    assert (moving, target) == (0, 1)
+    assert abs(pos.getPosition(0) - 5.1e-3) <= 1e-6
+    # automatic motion holds the position within the range
+    sim.clock.sleep(100)
+    assert abs(pos.getPosition(0) - 5.1e-3) <= 1e-6
+
+
+def test_measure_capacitance_takes_time(sim, pos):
+    start = sim.clock.time()
+    assert pos.measureCapacitance(0) == 1e-6
+    assert sim.clock.time() - start == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize('kind, error', [('error', errors.UnspecificError), ('timeout', errors.CommTimeout),
+    ('handle', errors.NotConnected), ('locked', errors.DeviceLocked), ('axis', errors.NoAxis),
+    ('range', errors.OutOfRange), ('unavailable', errors.NotAvailable)])
+def test_return_codes(sim, pos, kind, error):
+    sim.inject('getPosition', kind)
+    with pytest.raises(error):
+        pos.getPosition(0)
+    pos.getPosition(0)
+
+
+@pytest.mark.parametrize('kind, error', [('timeout', errors.CommTimeout), ('handle', errors.NotConnected),
+    ('axis', errors.InvalidParam), ('range', errors.NotSpecifiedParam)])
+def test_return_codes_v2(sim, kind, error):
+    pos = pyanc350.v2.Positioner(library=sim)
+    sim.inject('GetPosition', kind)
+    with pytest.raises(error):
+        pos.getPosition(0)
+
+
+def test_invalid_arguments(pos):
+    with pytest.raises(errors.NoAxis):
+        pos.getPosition(3)
+    with pytest.raises(errors.OutOfRange):
+        pos.setFrequency(0, 1e9)
+
+
+def test_stepped_clock():
+    clock = VirtualClock(rate=None)
+    assert clock.time() == 0.0
+    start = time.monotonic()
+    clock.sleep(100)
+    assert clock.time() == 100
+    assert time.monotonic() - start < 1
+    clock.advance(5)
+    assert clock.time() == 105
+
+
+def test_running_clock():
+    clock = VirtualClock(rate=1000)
+    start, realStart = clock.time(), time.monotonic()
+    clock.sleep(1.0)
+    assert clock.time() - start >= 1.0
+    assert time.monotonic() - realStart < 0.5
+    # time keeps running while nothing sleeps
+    before = clock.time()
+    time.sleep(0.01)
+    assert clock.time() - before >= 5
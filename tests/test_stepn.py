@@ -0,0 +1,43 @@
+#
+# Positioner.stepN on the simulated library
+#
+
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+
+
+@pytest.fixture
+def sim():
+    return SimulatedANC350(clock=VirtualClock(rate=None))
+
+
+@pytest.mark.parametrize('n', [1, 100, 70000])
+def test_v2(sim, n):
+    pos = pyanc350.v2.Positioner(library=sim)
+    axis = sim.devices[0].axes[0]
+    axis.travel = (-1.0, 1.0)
+    step = axis.step()
+    start = pos.getPosition(0)
+    assert pos.stepN(0, n, 0, check=True) == pytest.approx(start + n*step*1e9, abs=1)
+    assert axis.stepCount == 1
+    # the step count is written for each burst size and restored once
+    assert sim.calls['StepCount'] == {1: 1, 100: 2, 70000: 3}[n]
+
+
+def test_v2_backward(sim):
+    pos = pyanc350.v2.Positioner(library=sim)
+    start = pos.getPosition(0)
+    pos.stepN(0, 50, 1)
+    assert pos.getPosition(0) == pytest.approx(start - 50*sim.devices[0].axes[0].step(True)*1e9, abs=1)
+
+
+def test_v4(sim):
+    pos = pyanc350.v4.Positioner(library=sim)
+    step = sim.devices[0].axes[0].step()
+    start = pos.getPosition(0)
+    position = pos.stepN(0, 200, 0, check=True)
+    # a timed continuous move: close to, but not exactly, 200 steps
+    assert position - start == pytest.approx(200*step, rel=0.05)
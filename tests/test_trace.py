@@ -0,0 +1,56 @@
+#
+# Recording library calls of a v4 Positioner on the simulated library and
+#   answering or replaying them from the trace
+#
+
+import pytest
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+from pyanc350.trace import ReplayError, ReplayLibrary, TraceRecorder, readTrace, replay, summary
+from pyanc350.v4 import ANC350libv4
+
+
+@pytest.fixture
+def trace(tmp_path):
+    path = str(tmp_path/'run.anctrace')
+    with TraceRecorder(path, ANC350libv4.backend):
+        pos = pyanc350.v4.Positioner(library=SimulatedANC350(clock=VirtualClock(rate=None)))
+        recorded = (pos.getDeviceConfig(), pos.getPosition(0), pos.moveTo(0, 5.05e-3, timeout=60))
+        pos.disconnect()
+    return path, recorded
+
+
+def test_record(trace):
+    path, recorded = trace
+    calls = list(readTrace(path))
+    assert calls[0].alias == 'discover'
+    assert {call.library for call in calls} == {'anc350v4'}
+    assert sum(stats[0] for stats in summary(path).values()) == len(calls)
+
+
+def test_replay_library(trace):
+    path, (config, position, move) = trace
+    pos = pyanc350.v4.Positioner(library=ReplayLibrary(path))
+    # outputs passed as plain ctypes instances are answered as well as those passed by reference
+    assert pos.getDeviceConfig() == config
+    assert pos.getPosition(0) == position
+    stats = pos.moveTo(0, 5.05e-3, timeout=60)
+    assert stats.arrived
+    assert stats.position == move.position
+
+
+def test_replay_library_strict(trace):
+    path, recorded = trace
+    pos = pyanc350.v4.Positioner(library=ReplayLibrary(path))
+    with pytest.raises(ReplayError):
+        pos.setTargetPosition(0, 1e-3)
+    with pytest.raises(AttributeError):
+        pos.setFrequency(0, 123)
+
+
+def test_replay(trace):
+    path, recorded = trace
+    stats = replay(path, SimulatedANC350(clock=VirtualClock(rate=None)), speed=None)
+    assert stats.calls == len(list(readTrace(path)))
+    assert stats.mismatches == 0
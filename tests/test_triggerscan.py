@@ -0,0 +1,45 @@
+#
+# Range-trigger scans on the simulated library, with the v2 and the v4
+#   Positioner
+#
+
+import pytest
+import pyanc350.v2
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+from pyanc350.triggerscan import TriggerScan
+
+#position unit of each library in m
+UNITS = {'v2': 1e9, 'v4': 1.0}
+
+
+def positioner(library):
+    # time only passes when the scan sleeps, so the runs are repeatable
+    sim = SimulatedANC350(clock=VirtualClock(rate=None))
+    module = pyanc350.v2 if library == 'v2' else pyanc350.v4
+    return sim, module.Positioner(library=sim)
+
+
+@pytest.mark.parametrize('library', ['v2', 'v4'])
+def test_trigger_scan(library):
+    sim, pos = positioner(library)
+    unit = UNITS[library]
+    windows = [(5.0e-3*unit, 5.005e-3*unit), (5.01e-3*unit, 5.015e-3*unit)]
+    scan = TriggerScan(pos, 0, [windows]*2, timeout=60)
+    stats = scan.run()
+    assert [line.windows for line in stats] == [2, 2]
+    assert [line.backward for line in stats] == [False, True]
+    # each window switches its output on and off once per line
+    assert len(sim.devices[0].triggerLog) == 8
+
+
+@pytest.mark.parametrize('library', ['v2', 'v4'])
+def test_trigger_scan_end_of_travel(library):
+    sim, pos = positioner(library)
+    unit = UNITS[library]
+    sim.devices[0].axes[0].travel = (0.0, 5.01e-3)
+    windows = [(5.0e-3*unit, 5.005e-3*unit), (5.01e-3*unit, 5.015e-3*unit)]
+    scan = TriggerScan(pos, 0, [windows], timeout=60)
+    with pytest.raises(RuntimeError, match='end of travel'):
+        scan.run()
@@ -0,0 +1,84 @@
+#
+# DeviceWorker on the simulated library: priorities, cancelling of motion
+#   commands and composite moves
+#
+
+import threading, time
+import pytest
+import pyanc350.v4
+from pyanc350.clock import VirtualClock
+from pyanc350.simulator import SimulatedANC350
+from pyanc350.worker import COMMAND, READ, STOP, DeviceWorker, defaultPriority
+
+
+@pytest.fixture
+def worker():
+    sim = SimulatedANC350(clock=VirtualClock(rate=100))
+    with DeviceWorker(pyanc350.v4.Positioner(library=sim)) as worker:
+        yield worker
+
+
+def blocked(worker):
+    #holds the worker thread until the returned event is set
+    release = threading.Event()
+    worker.submit(release.wait, priority=STOP)
+    return release
+
+
+def test_default_priority(worker):
+    positioner = worker.positioner
+    assert defaultPriority('stopMoving', ()) == STOP
+    assert defaultPriority('startAutoMove', (0, 0, 0)) == STOP
+    assert defaultPriority('startAutoMove', (0, 1, 0)) == COMMAND
+    assert defaultPriority('getPosition', (0,)) == READ
+    assert defaultPriority('setAxisOutput', (0,), {'enable': 0, 'autoDisable': 0}, positioner.setAxisOutput) == STOP
+    assert defaultPriority('setAxisOutput', (), {'axisNo': 0, 'enable': 1, 'autoDisable': 0}, positioner.setAxisOutput) == COMMAND
+
+
+def test_calls(worker):
+    worker.setFrequency(0, 300)
+    assert worker.getFrequency(0) == 300
+    assert worker.submit('getAmplitude', axisNo=0).result() == 30
+    futures = [worker.submit('getPosition', axis) for axis in range(3)]
+    assert [future.result() for future in futures] == [pytest.approx(5e-3)]*3
+
+
+def test_priorities(worker):
+    order = []
+    release = blocked(worker)
+    worker.submit(lambda: order.append('read'), priority=READ)
+    worker.submit(lambda: order.append('command'), priority=COMMAND)
+    worker.submit(lambda: order.append('stop'), priority=STOP)
+    release.set()
+    worker.submit(lambda: None, priority=READ).result()
+    assert order == ['stop', 'command', 'read']
+
+
+@pytest.mark.parametrize('args, kwargs', [((0, 0, 0), {}), ((0,), {'enable': 0, 'autoDisable': 0}), ((), {'axisNo': 0, 'enable': 0, 'autoDisable': 0})])
+def test_stop_cancels_queued_motion(worker, args, kwargs):
+    release = blocked(worker)
+    move = worker.submit('startAutoMove', 0, 1, 0)
+    other = worker.submit('startAutoMove', axisNo=1, enable=1, relative=0)
+    stop = worker.submit('setAxisOutput', *args, **kwargs)
+    release.set()
+    stop.result()
+    assert move.cancelled()
+    assert not other.cancelled()
+    assert worker.cancelled == 1
+
+
+def test_stop_ends_move_to(worker):
+    results = []
+    mover = threading.Thread(target=lambda: results.append(worker.moveTo(0, 1e-3, timeout=600)))
+    mover.start()
+    time.sleep(0.2)
+    worker.startAutoMove(0, 0, 0)
+    mover.join(30)
+    assert not results[0].arrived
+    assert results[0].position > 2e-3
+
+
+def test_closed(worker):
+    worker.close()
+    with pytest.raises(RuntimeError):
+        worker.submit('getPosition', 0)